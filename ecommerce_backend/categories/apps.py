@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CategoriesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'categories'
+
+    def ready(self):
+        from ecommerce_backend.images import track_images
+        from ecommerce_backend.response_cache import track_models
+        track_models(self.get_model('Category'), self.get_model('Brand'))
+        track_images(self.get_model('Category'), 'image')
+        track_images(self.get_model('Brand'), 'logo')
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 11:16
+
+from django.db import migrations, models
+
+
+def populate_paths(apps, schema_editor):
+    """Compute `path`/`depth` for existing categories, parents first."""
+    Category = apps.get_model('categories', 'Category')
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+    paths = {}
+
+    def path_for(pk):
+        if pk not in paths:
+            parent_id = parents[pk]
+            prefix = path_for(parent_id) if parent_id else ''
+            paths[pk] = f'{prefix}{pk:010d}/'
+        return paths[pk]
+
+    for pk in parents:
+        path = path_for(pk)
+        Category.objects.filter(pk=pk).update(path=path, depth=path.count('/') - 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
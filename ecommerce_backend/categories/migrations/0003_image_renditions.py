@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0002_category_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='brand',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -1,22 +1,73 @@
 """Category and Brand model definitions.
 
 Provides hierarchical categories (with optional parent) and simple
-brand records used to group products.
+brand records used to group products. Categories also store a
+materialized `path` of ancestor ids so a whole subtree can be loaded
+with a single `path LIKE 'prefix%'` query.
 """
 
-from django.db import models
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Concat, Substr
+
+# Width of each zero-padded id segment in `Category.path`.
+PATH_STEP = 10
+
+
+class CategoryQuerySet(models.QuerySet):
+    """QuerySet helpers for loading category subtrees by materialized path."""
+
+    def descendants_of(self, nodes):
+        """Return every descendant of `nodes` (excluding the nodes) in one query."""
+        nodes = [node for node in nodes if node.path]
+        if not nodes:
+            return self.none()
+        condition = Q()
+        for node in nodes:
+            condition |= Q(path__startswith=node.path)
+        return self.filter(condition).exclude(pk__in=[node.pk for node in nodes])
+
+    def children_map(self, nodes):
+        """Map `parent_id` -> ordered child list for the subtrees below `nodes`."""
+        mapping = defaultdict(list)
+        for category in self.descendants_of(nodes):
+            mapping[category.parent_id].append(category)
+        return mapping
+
+    async def achildren_map(self, nodes):
+        """`children_map` for async views."""
+        mapping = defaultdict(list)
+        async for category in self.descendants_of(nodes):
+            mapping[category.parent_id].append(category)
+        return mapping
+
 
 class Category(models.Model):
-    """Product category supporting optional parent-child relations."""
+    """Product category supporting optional parent-child relations.
+
+    `path` holds the zero-padded ids of every ancestor and the category
+    itself (e.g. `0000000001/0000000004/`) and `depth` is the number of
+    ancestors. Both are maintained by `save()`; moving a category
+    rewrites the paths of its descendants in one `UPDATE`. Deleting a
+    category cascades to its subtree, so no path bookkeeping is needed.
+    """
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True)
     description = models.TextField(blank=True, null=True)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
     image = models.ImageField(upload_to='categories/', blank=True, null=True)
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
+    path = models.CharField(max_length=255, blank=True, default='', editable=False, db_index=True)
+    depth = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CategoryQuerySet.as_manager()
+    
     class Meta:
         verbose_name_plural = "Categories"
         ordering = ['name']
@@ -24,12 +75,45 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    def _parent_path(self):
+        if not self.parent_id:
+            return ''
+        return Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).first() or ''
+
+    def clean(self):
+        """Reject moves that would make a category its own ancestor."""
+        super().clean()
+        if self.pk and self.path and self.parent_id and self._parent_path().startswith(self.path):
+            raise ValidationError({'parent': 'A category cannot be moved below itself.'})
+
+    def save(self, *args, **kwargs):
+        old_path, old_depth = self.path, self.depth
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            parent_path = self._parent_path()
+            if old_path and parent_path.startswith(old_path):
+                raise ValidationError({'parent': 'A category cannot be moved below itself.'})
+            new_path = f'{parent_path}{self.pk:0{PATH_STEP}d}/'
+            new_depth = parent_path.count('/')
+            if new_path == old_path and new_depth == old_depth:
+                return
+            Category.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+            if old_path:
+                # Re-root the moved subtree by swapping its path prefix.
+                Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                    path=Concat(Value(new_path), Substr('path', len(old_path) + 1),
+                                output_field=models.CharField()),
+                    depth=F('depth') + (new_depth - old_depth),
+                )
+            self.path, self.depth = new_path, new_depth
+
 class Brand(models.Model):
     """Brand or manufacturer used to categorize products."""
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True)
     description = models.TextField(blank=True, null=True)
     logo = models.ImageField(upload_to='brands/', blank=True, null=True)
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -5,6 +5,8 @@ and a simple brand serializer for list/detail endpoints.
 """
 
 from rest_framework import serializers
+from ecommerce_backend.images import SrcsetField, srcset_urls
+from ecommerce_backend.row_serializers import RowSerializer, datetime_string, file_url
 from .models import Category, Brand
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -14,19 +16,34 @@ class CategorySerializer(serializers.ModelSerializer):
     present, otherwise returns an empty list.
     """
     children = serializers.SerializerMethodField()
+    image_srcset = SrcsetField()
     
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'description', 'parent', 'image', 
+        fields = ['id', 'name', 'slug', 'description', 'parent', 'image', 'image_srcset',
                  'is_active', 'children', 'created_at']
     
+    def validate_parent(self, parent):
+        """Reject moving a category below itself or one of its descendants."""
+        instance = self.instance
+        if parent and instance is not None and instance.path and parent.path.startswith(instance.path):
+            raise serializers.ValidationError('A category cannot be moved below itself.')
+        return parent
+
     def get_children(self, obj):
         """Return serialized children or an empty list.
 
-        The serializer intentionally materializes child objects here so
-        nested representations are returned in the API. This avoids
-        exposing a lazy queryset to the response formatters.
+        When the view supplies a `category_children` map (built from one
+        materialized-path query) the tree is assembled from it without
+        touching the database. Otherwise child objects are materialized
+        here so nested representations are returned in the API.
         """
+        children_map = self.context.get('category_children')
+        if children_map is not None:
+            children = children_map.get(obj.pk, [])
+            return CategorySerializer(
+                children, many=True, context={'category_children': children_map}
+            ).data
         if obj.children.exists():
             # Explicitly evaluate the children queryset for serialization
             return CategorySerializer(obj.children.all(), many=True).data
@@ -34,6 +51,25 @@ class CategorySerializer(serializers.ModelSerializer):
 
 class BrandSerializer(serializers.ModelSerializer):
     """Serializer for `Brand` model used by brand endpoints."""
+    logo_srcset = SrcsetField()
+
     class Meta:
         model = Brand
-        fields = ['id', 'name', 'slug', 'description', 'logo', 'is_active', 'created_at']
+        fields = ['id', 'name', 'slug', 'description', 'logo', 'logo_srcset', 'is_active', 'created_at']
+
+class BrandRowSerializer(RowSerializer):
+    """`BrandSerializer` output built from `.values()` rows."""
+    columns = ('id', 'name', 'slug', 'description', 'logo', 'renditions', 'is_active', 'created_at')
+
+    def to_representation(self, row):
+        request = self.context.get('request')
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'slug': row['slug'],
+            'description': row['description'],
+            'logo': file_url(row['logo'], request),
+            'logo_srcset': srcset_urls(row['renditions'], row['logo'], request),
+            'is_active': row['is_active'],
+            'created_at': datetime_string(row['created_at']),
+        }
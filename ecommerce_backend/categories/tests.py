@@ -1,3 +1,66 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework import status
+from categories.models import Brand, Category
+from categories.serializers import BrandSerializer, CategorySerializer
+
+
+class CategoryTreeTests(APITestCase):
+	def setUp(self):
+		self.root = Category.objects.create(name='Root', slug='root')
+		self.other = Category.objects.create(name='Other', slug='other')
+		self.child = Category.objects.create(name='Child', slug='child', parent=self.root)
+		self.grandchild = Category.objects.create(name='Grandchild', slug='grandchild', parent=self.child)
+
+	def test_paths_follow_moves(self):
+		self.assertEqual(self.grandchild.depth, 2)
+		self.assertTrue(self.grandchild.path.startswith(self.child.path))
+
+		self.child.parent = self.other
+		self.child.save()
+
+		self.grandchild.refresh_from_db()
+		self.assertEqual(self.child.path, f'{self.other.path}{self.child.pk:010d}/')
+		self.assertEqual(self.grandchild.path, f'{self.child.path}{self.grandchild.pk:010d}/')
+		self.assertEqual(self.grandchild.depth, 2)
+
+	def test_cannot_move_category_below_its_descendant(self):
+		serializer = CategorySerializer(self.root, data={'parent': self.grandchild.pk}, partial=True)
+		self.assertFalse(serializer.is_valid())
+		self.assertIn('parent', serializer.errors)
+
+	def test_nested_tree_query_count_does_not_grow_with_depth(self):
+		for i in range(5):
+			parent = Category.objects.create(name=f'Deep {i}', slug=f'deep-{i}', parent=self.grandchild)
+			Category.objects.create(name=f'Deeper {i}', slug=f'deeper-{i}', parent=parent)
+
+		# count + top-level page + one subtree query
+		with self.assertNumQueries(3):
+			resp = self.client.get('/api/categories/')
+		self.assertEqual(resp.status_code, status.HTTP_200_OK)
+		root = next(item for item in resp.data['results'] if item['slug'] == 'root')
+		grandchild = root['children'][0]['children'][0]
+		self.assertEqual(len(grandchild['children']), 5)
+		self.assertEqual(grandchild['children'][0]['children'][0]['slug'], 'deeper-0')
+
+		# category lookup + one subtree query
+		with self.assertNumQueries(2):
+			resp = self.client.get('/api/categories/child/')
+		self.assertEqual(resp.data['children'][0]['slug'], 'grandchild')
+
+
+class BrandListTests(APITestCase):
+	def test_row_serializer_matches_brand_serializer(self):
+		Brand.objects.create(name='Plain', slug='plain')
+		Brand.objects.create(name='Logo', slug='logo', description='Has a logo', logo='brands/logo.png',
+							 renditions={'source': 'brands/logo.png', 'srcset': {'160w': 'renditions/brands/logo.png/160w.webp'}})
+		Brand.objects.create(name='Hidden', slug='hidden', is_active=False)
+
+		with override_settings(RESPONSE_CACHE_ENABLED=False):
+			resp = self.client.get('/api/categories/brands/')
+		self.assertEqual(resp.status_code, status.HTTP_200_OK)
+		request = APIRequestFactory().get('/api/categories/brands/')
+		expected = BrandSerializer(Brand.objects.filter(is_active=True).order_by('name', 'id'), many=True, context={'request': request}).data
+		self.assertEqual(json.loads(resp.content)['results'], json.loads(json.dumps(expected)))
@@ -7,26 +7,58 @@ level categories by default.
 
 from rest_framework import generics, permissions
 from django.db.models import Count
+from ecommerce_backend.async_views import AsyncListView
+from ecommerce_backend.response_cache import CachedResponseMixin
+from ecommerce_backend.row_serializers import ValuesListMixin
 from .models import Category, Brand
-from .serializers import CategorySerializer, BrandSerializer
+from .serializers import CategorySerializer, BrandSerializer, BrandRowSerializer
 
-class CategoryListView(generics.ListAPIView):
+class CategoryTreeMixin:
+    """Serialize nested categories from a single subtree query.
+
+    Loads every descendant of the categories being rendered with one
+    `path` prefix query and hands the resulting `parent_id -> children`
+    map to `CategorySerializer`, instead of two queries per tree node.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        if args:
+            nodes = args[0] if kwargs.get('many') else [args[0]]
+            context = kwargs.setdefault('context', self.get_serializer_context())
+            if 'category_children' not in context:
+                context['category_children'] = Category.objects.children_map(nodes)
+        return super().get_serializer(*args, **kwargs)
+
+class CategoryListView(CachedResponseMixin, CategoryTreeMixin, generics.ListAPIView):
     """List top-level categories (parent is None) for public consumption."""
     queryset = Category.objects.filter(is_active=True, parent=None)
+    cache_dependencies = (Category,)
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]
 
-class CategoryDetailView(generics.RetrieveAPIView):
+class AsyncCategoryListView(AsyncListView):
+    """`CategoryListView` for ASGI; the subtree map is loaded with the async ORM."""
+    sync_view = CategoryListView
+
+    async def serialize(self, drf_view, data, many=False):
+        context = drf_view.get_serializer_context()
+        context['category_children'] = await Category.objects.achildren_map(data)
+        return drf_view.get_serializer(data, many=many, context=context).data
+
+class CategoryDetailView(CategoryTreeMixin, generics.RetrieveAPIView):
     """Retrieve a single category by slug (public)."""
     queryset = Category.objects.filter(is_active=True)
     serializer_class = CategorySerializer
     lookup_field = 'slug'
     permission_classes = [permissions.AllowAny]
 
-class BrandListView(generics.ListAPIView):
-    """List active brands."""
-    queryset = Brand.objects.filter(is_active=True)
+class BrandListView(CachedResponseMixin, ValuesListMixin, generics.ListAPIView):
+    """List active brands by name, rendered from `.values()` rows."""
+    # `id` breaks name ties so pages never repeat or skip a brand.
+    queryset = Brand.objects.filter(is_active=True).order_by('name', 'id')
+    cache_dependencies = (Brand,)
     serializer_class = BrandSerializer
+    row_serializer_class = BrandRowSerializer
     permission_classes = [permissions.AllowAny]
 
 class CategoryCreateView(generics.CreateAPIView):
@@ -0,0 +1,103 @@
+"""OpenAPI schema generated once and served from memory.
+
+drf_yasg introspects every view, serializer and filter to build the
+schema, which takes about 50 ms per request on this API. `SchemaView`
+serves `/swagger.json` and `/swagger.yaml` instead. Each process renders
+each format once and keeps the bytes in memory, together with their
+ETag and compressed variants. `If-None-Match` requests get a `304`.
+
+Deploys pre-render the files with `manage.py render_openapi_schema`
+(`start.sh` runs it). Processes then load the files from
+`OPENAPI_SCHEMA_DIR` and never introspect; without the files, the first
+request generates the schema. The schema has no `host` or `schemes`
+(unless `SWAGGER_SETTINGS['DEFAULT_API_URL']` is set), so one file
+serves every domain: clients resolve paths against the URL they fetched
+the document from. With `OPENAPI_SCHEMA_CACHE` off (the default under
+`DEBUG`) the schema is regenerated on every request.
+"""
+
+import os
+import threading
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.test import RequestFactory
+from django.utils.cache import patch_cache_control
+from django.views import View
+from drf_yasg import openapi
+from drf_yasg.app_settings import swagger_settings
+from drf_yasg.renderers import SwaggerJSONRenderer, SwaggerYAMLRenderer
+from rest_framework.request import Request
+
+from .response_cache import make_entry, response_from_entry
+
+API_INFO = openapi.Info(
+    title="Ecommerce API",
+    default_version='v1',
+    description="API documentation for the Ecommerce backend",
+)
+
+RENDERERS = {'.json': SwaggerJSONRenderer, '.yaml': SwaggerYAMLRenderer}
+
+
+def generate_schema(format):
+    """Introspect the API and render its schema as `.json` or `.yaml` bytes."""
+    # Filter backends and `swagger_fake_view` querysets expect a request;
+    # an anonymous one sees every public endpoint.
+    request = Request(RequestFactory().get('/swagger' + format))
+    generator = swagger_settings.DEFAULT_GENERATOR_CLASS(API_INFO, url=swagger_settings.DEFAULT_API_URL or '')
+    return RENDERERS[format]().render(generator.get_schema(request, public=True))
+
+
+def schema_path(format, directory=None):
+    return os.path.join(directory or settings.OPENAPI_SCHEMA_DIR, 'swagger' + format)
+
+
+def content_type(format):
+    return f'{RENDERERS[format].media_type}; charset=utf-8'
+
+
+class SchemaCache:
+    """Per-process schema entries, loaded from `OPENAPI_SCHEMA_DIR` or generated."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, format):
+        """Return `(entry, hit)` for `format`, building the entry on first use."""
+        entry = self._entries.get(format)
+        if entry is not None:
+            return entry, True
+        with self._lock:
+            if format not in self._entries:
+                self._entries[format] = make_entry(HttpResponse(self.load(format), content_type=content_type(format)))
+            return self._entries[format], False
+
+    def load(self, format):
+        try:
+            with open(schema_path(format), 'rb') as handle:
+                return handle.read()
+        except FileNotFoundError:
+            return generate_schema(format)
+
+    def clear(self):
+        self._entries.clear()
+
+
+schema_cache = SchemaCache()
+
+
+class SchemaView(View):
+    """`/swagger.json` and `/swagger.yaml`, revalidated by ETag."""
+
+    def get(self, request, format):
+        if format not in RENDERERS:
+            raise Http404
+        if getattr(settings, 'OPENAPI_SCHEMA_CACHE', True):
+            entry, hit = schema_cache.get(format)
+            response = response_from_entry(request, entry, 'HIT' if hit else 'MISS')
+        else:
+            response = HttpResponse(generate_schema(format), content_type=content_type(format))
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
@@ -0,0 +1,153 @@
+"""Async read path for public catalog views, used under ASGI.
+
+`AsyncCatalogView` mirrors a synchronous DRF list/retrieve view
+(`sync_view`) for anonymous JSON `GET`s:
+
+* the versioned response cache is read and written with the async cache
+  API, so cache hits never leave the event loop;
+* on a miss, `load()` fetches rows with the async ORM (`acount`, `aget`,
+  `async for`) and the payload is built with the sync view's serializer
+  (in a worker thread unless `serialize()` is overridden), paginator and
+  renderer. Responses are byte-for-byte those of the sync
+  view and share its cache entries.
+
+Anything else (authenticated requests, non-JSON renderers, opt-in
+modes a subclass does not handle) is delegated to the sync view through
+`sync_to_async`, so behaviour never diverges. Slow queries or cache
+calls wait in a worker thread instead of holding a gunicorn worker.
+URLs switch to these views with `ASYNC_CATALOG_VIEWS`.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.http import Http404, HttpResponseNotModified
+from django.utils.decorators import classonlymethod
+from django.views import View
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.response import Response
+
+from .compression import serve_entry
+from .response_cache import (aget_versions, cache_key, etag_matches, get_cache, make_entry,
+                             response_from_entry)
+
+
+async def apaginate(paginator, queryset, request):
+    """`PageNumberPagination.paginate_queryset` with the async ORM."""
+    page_size = paginator.get_page_size(request)
+    django_paginator = paginator.django_paginator_class(queryset, page_size)
+    django_paginator.count = await queryset.acount()
+    page_number = paginator.get_page_number(request, django_paginator)
+    try:
+        page = django_paginator.page(page_number)
+    except InvalidPage as exc:
+        raise NotFound(paginator.invalid_page_message.format(page_number=page_number, message=str(exc)))
+    page.object_list = [obj async for obj in page.object_list]
+    paginator.page, paginator.request = page, request
+    return page.object_list
+
+
+class AsyncCatalogView(View):
+    """Async variant of `sync_view`; subclasses implement `load()`."""
+    sync_view = None
+    http_method_names = ['get', 'head', 'options']
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        cls._sync_callable = staticmethod(sync_to_async(cls.sync_view.as_view()))
+        # Schema generators and `csrf_exempt` look for DRF's attributes;
+        # the public contract is the sync view's.
+        view.cls, view.initkwargs = cls.sync_view, {}
+        view.csrf_exempt = True
+        return view
+
+    def prepare(self, request, *args, **kwargs):
+        """Build the sync view and DRF request, or return None to delegate."""
+        if 'HTTP_AUTHORIZATION' in request.META:
+            return None
+        drf_view = self.sync_view()
+        drf_view.args, drf_view.kwargs = args, kwargs
+        drf_view.headers = drf_view.default_response_headers
+        drf_request = drf_view.initialize_request(request, *args, **kwargs)
+        drf_view.request = drf_request
+        drf_view.format_kwarg = drf_view.get_format_suffix(**kwargs)
+        try:
+            renderer, media_type = drf_view.perform_content_negotiation(drf_request)
+        except APIException:
+            return None  # let the sync view produce the error response
+        if renderer.format != 'json' or not self.supports(drf_request):
+            return None
+        drf_request.accepted_renderer, drf_request.accepted_media_type = renderer, media_type
+        drf_view._response_cache_key = None  # caching is done here, asynchronously
+        return drf_view
+
+    def supports(self, request):
+        """Whether `load()` handles this request; otherwise the sync view does."""
+        return True
+
+    async def load(self, drf_view):
+        """Return the DRF `Response` for `drf_view.request`."""
+        raise NotImplementedError
+
+    async def serialize(self, drf_view, data, many=False):
+        """Serialize `data`; off the loop, as nested fields may query lazily."""
+        return await sync_to_async(lambda: drf_view.get_serializer(data, many=many).data)()
+
+    async def get(self, request, *args, **kwargs):
+        drf_view = self.prepare(request, *args, **kwargs)
+        if drf_view is None:
+            return await self._sync_callable(request, *args, **kwargs)
+        drf_request = drf_view.request
+
+        key = None
+        if getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+            versions = await aget_versions(self.sync_view.cache_dependencies)
+            key = cache_key(self.sync_view.__name__, drf_request, versions)
+            entry = await get_cache().aget(key)
+            if entry is not None:
+                return response_from_entry(drf_request, entry, 'HIT')
+
+        try:
+            response = await self.load(drf_view)
+        except (Http404, APIException) as exc:
+            response = drf_view.handle_exception(exc)
+        response = drf_view.finalize_response(drf_request, response)
+        response.render()
+        if key is None or response.status_code != 200:
+            return response
+
+        entry = make_entry(response)
+        await get_cache().aset(key, entry, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+        if etag_matches(drf_request, entry['etag']):
+            response = HttpResponseNotModified()
+        response['ETag'] = entry['etag']
+        response['X-Cache'] = 'MISS'
+        return serve_entry(drf_request, response, entry)
+
+
+class AsyncListView(AsyncCatalogView):
+    """Async `ListAPIView.list` using the sync view's filters and pagination."""
+
+    async def load(self, drf_view):
+        # Filter backends may validate against the database (e.g. a
+        # `ModelChoiceFilter`), so the queryset is built off the loop.
+        queryset = await sync_to_async(drf_view.filter_queryset)(drf_view.get_queryset())
+        paginator = drf_view.paginator
+        if paginator is None:
+            return Response(await self.serialize(drf_view, [obj async for obj in queryset], many=True))
+        page = await apaginate(paginator, queryset, drf_view.request)
+        return paginator.get_paginated_response(await self.serialize(drf_view, page, many=True))
+
+
+class AsyncRetrieveView(AsyncCatalogView):
+    """Async `RetrieveAPIView.retrieve` by the sync view's lookup field."""
+
+    async def load(self, drf_view):
+        lookup_url_kwarg = drf_view.lookup_url_kwarg or drf_view.lookup_field
+        queryset = drf_view.get_queryset()
+        try:
+            obj = await queryset.aget(**{drf_view.lookup_field: drf_view.kwargs[lookup_url_kwarg]})
+        except queryset.model.DoesNotExist:
+            raise Http404
+        return Response(await self.serialize(drf_view, obj))
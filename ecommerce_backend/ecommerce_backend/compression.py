@@ -0,0 +1,194 @@
+"""Response compression (Brotli when available, otherwise gzip).
+
+`CompressionMiddleware` compresses textual responses of at least
+`COMPRESSION_MIN_SIZE` bytes for clients that accept it. It picks the
+coding by the `Accept-Encoding` q-values; on a tie it prefers `br`,
+which needs the optional `brotli` package. Streaming responses (the
+catalog export) are compressed incrementally. Responses that already
+carry a `Content-Encoding` are left alone. This is how the response
+cache hands out the variants it stores: `encode_entry()` compresses
+the payload once when an entry is written, with the stronger
+`COMPRESSION_CACHED_*` levels, and every hit reuses those bytes.
+
+Compressed responses get `Vary: Accept-Encoding` and, like Django's
+`GZipMiddleware`, a weak ETag. `If-None-Match` is compared weakly, so
+revalidation works across codings.
+
+BREACH: compressing a secret next to reflected input leaks the secret
+through the compressed length. Only API data is compressed: JSON, YAML,
+NDJSON, plain text and CSV. HTML is not, because the browsable API and
+the admin embed CSRF tokens next to reflected input, and Django's
+`GZipMiddleware` padding would be needed to compress them safely. Only
+responses to `GET`/`HEAD` are compressed, which keeps out the JWTs
+returned by the login/refresh `POST`s whatever their size.
+"""
+
+import gzip
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/(plain|csv)|application/(json|[\w.-]+\+json|x-ndjson|yaml|x-yaml))\s*(;|$)'
+)
+SAFE_METHODS = ('GET', 'HEAD')
+_ACCEPT_ENCODING = re.compile(r'\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*(?:,|$)')
+
+
+def available_encodings():
+    """Codings this process can produce, in order of preference."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def accepted_encoding(request):
+    """The best coding `request` accepts, or `None` for identity."""
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if not header:
+        return None
+    weights = {}
+    for name, q in _ACCEPT_ENCODING.findall(header.lower()):
+        try:
+            weights[name] = float(q) if q else 1.0
+        except ValueError:
+            continue
+    best, best_q = None, 0.0
+    for encoding in available_encodings():
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(content, encoding, cached=False):
+    """Compress `content` with `encoding` at the per-request or cached level."""
+    if encoding == 'br':
+        quality = (getattr(settings, 'COMPRESSION_CACHED_BROTLI_QUALITY', 9) if cached
+                   else getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4))
+        return brotli.compress(content, quality=quality)
+    level = (getattr(settings, 'COMPRESSION_CACHED_GZIP_LEVEL', 9) if cached
+             else getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6))
+    # `mtime=0` keeps the output identical for identical input.
+    return gzip.compress(content, compresslevel=level, mtime=0)
+
+
+def _stream_compressor(encoding):
+    """`(process, finish)` callables compressing a stream chunk by chunk."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4))
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6), zlib.DEFLATED,
+                                  16 + zlib.MAX_WBITS)
+    return compressor.compress, compressor.flush
+
+
+def _compress_stream(chunks, encoding):
+    process, finish = _stream_compressor(encoding)
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+async def _acompress_stream(chunks, encoding):
+    process, finish = _stream_compressor(encoding)
+    async for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def enabled():
+    return getattr(settings, 'COMPRESSION_ENABLED', True)
+
+
+def is_compressible(content_type, size):
+    return (enabled() and size >= getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+            and bool(COMPRESSIBLE_TYPES.match(content_type or '')))
+
+
+def encode_entry(entry):
+    """Add the compressed variants of a response-cache entry's body."""
+    if is_compressible(entry['content_type'], len(entry['content'])):
+        encoded = {}
+        for encoding in available_encodings():
+            body = compress(entry['content'], encoding, cached=True)
+            if len(body) < len(entry['content']):
+                encoded[encoding] = body
+        entry['encoded'] = encoded
+    return entry
+
+
+def _weaken_etag(response):
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+
+
+def apply_encoding(response, body, encoding):
+    """Replace `response`'s body by `body`, compressed with `encoding`."""
+    response.content = body
+    response['Content-Length'] = str(len(body))
+    response['Content-Encoding'] = encoding
+    _weaken_etag(response)
+
+
+def serve_entry(request, response, entry):
+    """Use the cached variant of `entry` that `request` accepts, if any."""
+    encoded = entry.get('encoded')
+    if encoded is None:
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = accepted_encoding(request)
+    if encoding in encoded:
+        if response.status_code == 200:
+            apply_encoding(response, encoded[encoding], encoding)
+        else:
+            _weaken_etag(response)
+    return response
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress responses the response cache did not already encode."""
+
+    def process_response(self, request, response):
+        if (request.method not in SAFE_METHODS or response.has_header('Content-Encoding')
+                or 'no-transform' in response.get('Cache-Control', '')):
+            return response
+        if response.streaming:
+            return self.compress_stream(request, response)
+        if not is_compressible(response.get('Content-Type'), len(response.content)):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = accepted_encoding(request)
+        if encoding is None:
+            return response
+        body = compress(response.content, encoding)
+        if len(body) < len(response.content):
+            apply_encoding(response, body, encoding)
+        return response
+
+    def compress_stream(self, request, response):
+        if not (enabled() and COMPRESSIBLE_TYPES.match(response.get('Content-Type', ''))):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = accepted_encoding(request)
+        if encoding is None:
+            return response
+        if response.is_async:
+            response.streaming_content = _acompress_stream(response.streaming_content, encoding)
+        else:
+            response.streaming_content = _compress_stream(response.streaming_content, encoding)
+        del response['Content-Length']
+        response['Content-Encoding'] = encoding
+        _weaken_etag(response)
+        return response
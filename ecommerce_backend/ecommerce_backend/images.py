@@ -0,0 +1,227 @@
+"""Resized renditions of uploaded images.
+
+Image fields registered with `track_images()` get downscaled copies at
+each `IMAGE_RENDITION_WIDTHS` width, in `IMAGE_RENDITION_FORMAT` (WebP
+by default). They are stored as `renditions/<name>/<width>w.<ext>` in
+the default storage; the name keeps its extension, so `shoe.jpg` and
+`shoe.png` never share (and overwrite) a directory. After an upload commits, the renditions are
+built on a small background pool (`IMAGE_PROCESSING_THREADS`; `0` builds
+them inline). The stored names are then saved on the model's
+`renditions` JSON field:
+
+    {"source": "products/shoe.jpg",
+     "srcset": {"160w": "renditions/products/shoe.jpg/160w.webp", ...}}
+
+`source` records which upload the renditions belong to, so replacing
+the file schedules a rebuild. Until it matches the current file,
+`srcset_urls` returns no renditions and clients fall back to the
+original. `SrcsetField` turns the map into `{"160w": url, ...}` for
+API responses. `manage.py generate_renditions` backfills existing rows.
+"""
+
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.utils.encoding import filepath_to_uri
+from django.utils.functional import empty
+from PIL import ExifTags, Image, ImageOps
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {'webp': ('WEBP', 'webp'), 'jpeg': ('JPEG', 'jpg')}
+
+# model -> name of its image field, filled by `track_images()`.
+tracked = {}
+
+
+def rendition_widths():
+    return sorted({int(width) for width in getattr(settings, 'IMAGE_RENDITION_WIDTHS', (160, 320, 640, 1280))})
+
+
+def _prepare(image, image_format):
+    """Apply EXIF rotation and convert to a mode `image_format` can encode."""
+    image = ImageOps.exif_transpose(image)
+    if image.mode == 'P':
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    if image_format == 'JPEG' and image.mode in ('RGBA', 'LA'):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.mode else 'RGB')
+    return image
+
+
+def build_renditions(name, storage=None):
+    """Write the renditions of the stored image `name`; return its srcset map.
+
+    Images are only ever scaled down. An image narrower than the smallest
+    width gets a single rendition at its own width.
+    """
+    storage = storage or default_storage
+    image_format, extension = FORMATS[getattr(settings, 'IMAGE_RENDITION_FORMAT', 'webp')]
+    quality = getattr(settings, 'IMAGE_RENDITION_QUALITY', 80)
+
+    with storage.open(name, 'rb') as source, Image.open(source) as image:
+        rotated = image.getexif().get(ExifTags.Base.Orientation, 1) in (5, 6, 7, 8)
+        width = image.height if rotated else image.width
+        widths = [target for target in rendition_widths() if target < width] or [width]
+        # JPEG can decode straight to a reduced scale, which is much cheaper
+        # than decoding at full size and resizing.
+        image.draft('RGB', (max(widths), max(widths)))
+        base = _prepare(image, image_format)
+
+    srcset = {}
+    for width in sorted(widths, reverse=True):
+        height = max(1, round(base.height * width / base.width))
+        if base.width != width:
+            base = base.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+        buffer = io.BytesIO()
+        options = {'method': 4} if image_format == 'WEBP' else {'optimize': True, 'progressive': True}
+        base.save(buffer, image_format, quality=quality, **options)
+        path = f'renditions/{name}/{width}w.{extension}'
+        if storage.exists(path):
+            storage.delete(path)
+        srcset[f'{width}w'] = storage.save(path, ContentFile(buffer.getvalue()))
+    return dict(sorted(srcset.items(), key=lambda item: int(item[0][:-1])))
+
+
+def render(name):
+    """`build_renditions`, recording unreadable images as having none."""
+    try:
+        return build_renditions(name)
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        logger.warning('Cannot build renditions of %s: %s', name, exc)
+        return {}
+
+
+def apply_renditions(model, pk, name, srcset):
+    """Store `srcset` on row `pk` unless its image was replaced meanwhile.
+
+    Saves through the model so the response cache and profile ETags see
+    the change.
+    """
+    instance = model._default_manager.filter(pk=pk).first()
+    if instance is None or getattr(instance, tracked[model]).name != name:
+        return False
+    instance.renditions = {'source': name, 'srcset': srcset}
+    instance.save(update_fields=['renditions'])
+    return True
+
+
+def process(model, pk, name):
+    apply_renditions(model, pk, name, render(name))
+
+
+class ProcessingPool:
+    """Background threads building renditions; runs inline when disabled."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _ensure(self):
+        threads = getattr(settings, 'IMAGE_PROCESSING_THREADS', 2)
+        if threads <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='image-renditions')
+            return self._executor
+
+    def submit(self, fn, *args):
+        executor = self._ensure()
+        if executor is None:
+            fn(*args)
+        else:
+            executor.submit(self._run, fn, *args)
+
+    @staticmethod
+    def _run(fn, *args):
+        try:
+            fn(*args)
+        except Exception:
+            logger.exception('Rendition job %s%r failed', fn.__name__, args)
+        finally:
+            connection.close()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+pool = ProcessingPool()
+
+
+def _schedule(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    name = getattr(instance, tracked[sender]).name or ''
+    if (instance.renditions or {}).get('source', '') == name:
+        return
+    if not name:
+        sender._default_manager.filter(pk=instance.pk).update(renditions={})
+        instance.renditions = {}
+        return
+    pk = instance.pk
+    transaction.on_commit(lambda: pool.submit(process, sender, pk, name))
+
+
+def track_images(model, field_name):
+    """Build renditions of `model.<field_name>` whenever a new file is saved."""
+    tracked[model] = field_name
+    post_save.connect(_schedule, sender=model, weak=False,
+                      dispatch_uid=f'images:{model._meta.label_lower}')
+
+
+def storage_url(name):
+    """`default_storage.url(name)`, without `urljoin` for local files.
+
+    `FileSystemStorage.url` joins `MEDIA_URL` and the quoted name with
+    `urljoin`, which dominates the cost of rendering list rows. Plain
+    relative names join by concatenation.
+    """
+    storage = default_storage._wrapped if default_storage._wrapped is not empty else None
+    if isinstance(storage, FileSystemStorage) and ':' not in name and not name.startswith(('/', '.')):
+        return storage.base_url + filepath_to_uri(name)
+    return default_storage.url(name)
+
+
+def srcset_urls(renditions, name, request=None):
+    """`{"160w": url, ...}` for the renditions of file `name`, or `{}` if not built yet."""
+    renditions = renditions or {}
+    if not name or renditions.get('source') != str(name):
+        # Built for a previous file (or never): do not show the old image.
+        return {}
+    urls = {}
+    for descriptor, path in renditions.get('srcset', {}).items():
+        url = storage_url(path)
+        urls[descriptor] = request.build_absolute_uri(url) if request is not None else url
+    return urls
+
+
+class SrcsetField(serializers.ReadOnlyField):
+    """Rendition URLs keyed by srcset width descriptor.
+
+    Reads the instance's `renditions` and its image field registered with
+    `track_images()`. URLs are absolute when the serializer has a
+    request, like DRF's `ImageField`.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', '*')
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        image = getattr(instance, tracked[type(instance)])
+        return srcset_urls(instance.renditions, image.name, self.context.get('request'))
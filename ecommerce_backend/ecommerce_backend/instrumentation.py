@@ -0,0 +1,275 @@
+"""Per-request query count and latency instrumentation.
+
+`RequestMetricsMiddleware` (first in `MIDDLEWARE`) records, for every
+request, the number of SQL queries, time spent in SQL, time spent in
+top-level DRF serializer `.data` calls and total time, keyed by URL name.
+
+* Queries are counted by an execute wrapper installed on every
+  connection that reports to the current request through a context
+  variable, so queries run by async views in worker threads
+  (`sync_to_async`, the async ORM) are attributed to their request.
+* Each response gets a `Server-Timing` header (when
+  `SERVER_TIMING_ENABLED`), readable in browser dev tools.
+* Aggregates and histograms per route are kept in process memory and
+  served to admins by `RequestMetricsView` (`/api/metrics/`).
+* `REQUEST_BUDGETS` maps URL names to ceilings such as
+  `{'queries': 6, 'total_ms': 250}`. Exceeding one logs a warning, or
+  raises `BudgetExceeded` when `REQUEST_BUDGETS_ENFORCE` is on, which
+  `BudgetTestRunner` does for the test suite.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.runner import DiscoverRunner
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('queries', 'sql_ms', 'serializer_ms', 'total_ms')
+# Upper bounds of histogram buckets; the last bucket is open-ended.
+BUCKETS = {
+    'queries': (1, 2, 5, 10, 20, 50, 100),
+    'sql_ms': (1, 5, 10, 25, 50, 100, 250, 500, 1000),
+    'serializer_ms': (1, 5, 10, 25, 50, 100, 250, 500, 1000),
+    'total_ms': (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+}
+UNRESOLVED = '<unresolved>'
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class BudgetExceeded(AssertionError):
+    """A request went over its route's `REQUEST_BUDGETS` entry."""
+
+
+class RequestMetrics:
+    """Counters for a single request; also a `connection.execute_wrapper`."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_seconds += time.perf_counter() - start
+
+    def as_dict(self, total_seconds):
+        return {
+            'queries': self.queries,
+            'sql_ms': round(self.sql_seconds * 1000, 2),
+            'serializer_ms': round(self.serializer_seconds * 1000, 2),
+            'total_ms': round(total_seconds * 1000, 2),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe per-route counts, sums, maxima and bucket histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route, values):
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {
+                    'count': 0,
+                    'metrics': {
+                        name: {'sum': 0, 'max': 0, 'buckets': [0] * (len(BUCKETS[name]) + 1)}
+                        for name in METRICS
+                    },
+                }
+            entry['count'] += 1
+            for name in METRICS:
+                value, stats = values[name], entry['metrics'][name]
+                stats['sum'] += value
+                stats['max'] = max(stats['max'], value)
+                stats['buckets'][_bucket_index(BUCKETS[name], value)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            routes = {}
+            for route, entry in self._routes.items():
+                count = entry['count']
+                routes[route] = {'count': count, 'metrics': {
+                    name: {
+                        'avg': round(stats['sum'] / count, 2),
+                        'max': stats['max'],
+                        'histogram': _histogram(BUCKETS[name], stats['buckets']),
+                    }
+                    for name, stats in entry['metrics'].items()
+                }}
+            return routes
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+def _bucket_index(bounds, value):
+    for index, bound in enumerate(bounds):
+        if value <= bound:
+            return index
+    return len(bounds)
+
+
+def _histogram(bounds, counts):
+    labels = [f'le_{bound}' for bound in bounds] + ['inf']
+    return dict(zip(labels, counts))
+
+
+registry = MetricsRegistry()
+
+
+def _timed_data(original):
+    def data(self):
+        metrics = _current.get()
+        # Only the outermost `.data` call is timed; nested serializers
+        # built inside method fields would otherwise be counted twice.
+        if metrics is None or metrics.serializer_depth:
+            return original(self)
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return original(self)
+        finally:
+            metrics.serializer_seconds += time.perf_counter() - start
+            metrics.serializer_depth -= 1
+    data._request_metrics = True
+    return data
+
+
+def _count_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_counter(connection, **kwargs):
+    """Add the request query counter to `connection` (idempotent)."""
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+def instrument_queries():
+    """Count queries on this thread's connections and on every new connection."""
+    connection_created.connect(install_query_counter, dispatch_uid='request_metrics.query_counter')
+    for connection in connections.all():
+        install_query_counter(connection)
+
+
+def instrument_serializers():
+    """Time `BaseSerializer.data` (idempotent)."""
+    fget = BaseSerializer.data.fget
+    if not getattr(fget, '_request_metrics', False):
+        BaseSerializer.data = property(_timed_data(fget))
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return (match.view_name if match else None) or UNRESOLVED
+
+
+def check_budget(route, values):
+    """Return the names of metrics over `REQUEST_BUDGETS[route]`."""
+    budget = getattr(settings, 'REQUEST_BUDGETS', {}).get(route, {})
+    return [name for name, limit in budget.items() if values.get(name, 0) > limit]
+
+
+def server_timing(values):
+    return ', '.join([
+        f'db;dur={values["sql_ms"]};desc="{values["queries"]} queries"',
+        f'serializer;dur={values["serializer_ms"]}',
+        f'total;dur={values["total_ms"]}',
+    ])
+
+
+class RequestMetricsMiddleware:
+    """Record query count and timings for every request; see module docs."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        instrument_queries()
+        instrument_serializers()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    def finish(self, request, response, metrics, seconds):
+        values = metrics.as_dict(seconds)
+        route = route_name(request)
+        registry.record(route, values)
+        if getattr(settings, 'SERVER_TIMING_ENABLED', False):
+            response['Server-Timing'] = server_timing(values)
+
+        exceeded = check_budget(route, values)
+        if exceeded:
+            message = f'{request.method} {request.path} ({route}) over budget: ' + ', '.join(
+                f'{name}={values[name]} > {settings.REQUEST_BUDGETS[route][name]}' for name in exceeded
+            )
+            if getattr(settings, 'REQUEST_BUDGETS_ENFORCE', False):
+                raise BudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+class RequestMetricsView(APIView):
+    """Admin-only per-route metrics for this process; `DELETE` resets them."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({'buckets': BUCKETS, 'routes': registry.snapshot()})
+
+    def delete(self, request):
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BudgetTestRunner(DiscoverRunner):
+    """Test runner that turns `REQUEST_BUDGETS` overruns into failures."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.REQUEST_BUDGETS_ENFORCE = True
@@ -0,0 +1,80 @@
+"""JSON renderer and parser backed by `orjson` when it is installed.
+
+`FastJSONRenderer` and `FastJSONParser` are drop-in replacements for
+DRF's `JSONRenderer`/`JSONParser` and produce the same bytes. Values
+`orjson` does not handle the same way (`Decimal`, datetimes, lazy
+strings, ...) are passed to DRF's `JSONEncoder.default`, so prices and
+timezone-aware datetimes are encoded exactly as before. `U+2028`/`U+2029`
+are escaped as DRF does.
+
+`JSON_BACKEND=stdlib`, a missing `orjson` package, indented output
+(`Accept: application/json; indent=4`) and anything `orjson` rejects
+(integers over 64 bits, non-UTF-8 request bodies) use DRF's stdlib
+implementation. One known difference: with `orjson`, NaN and infinity
+render as `null` where `json` would raise.
+"""
+
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+# `orjson` reads integers beyond 64 bits as floats; bodies with 19 or
+# more consecutive digits (possibly inside strings) are left to `json`.
+# Mapping every digit to `0` and searching is much cheaper than a regex.
+DIGITS_TO_ZERO = bytes.maketrans(b'123456789', b'000000000')
+LONG_NUMBER = b'0' * 19
+
+
+def get_backend():
+    """The `orjson` module when it is installed and `JSON_BACKEND` allows it."""
+    if orjson is None or getattr(settings, 'JSON_BACKEND', 'orjson') != 'orjson':
+        return None
+    return orjson
+
+
+class FastJSONRenderer(JSONRenderer):
+    """`JSONRenderer` encoding compact UTF-8 output with `orjson`."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        backend = get_backend()
+        if (data is None or backend is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = backend.dumps(
+                data, default=self.encoder_class().default,
+                option=backend.OPT_PASSTHROUGH_DATETIME | backend.OPT_NON_STR_KEYS,
+            )
+        except backend.JSONEncodeError:
+            # Let the stdlib encoder succeed (big integers) or raise its own error.
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """`JSONParser` decoding UTF-8 request bodies with `orjson`."""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        backend = get_backend()
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if backend is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        if LONG_NUMBER in body.translate(DIGITS_TO_ZERO):
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+        try:
+            return backend.loads(body)
+        except backend.JSONDecodeError:
+            # Re-parse with `json` for its leniency (NaN when not
+            # strict) and its error messages.
+            return super().parse(io.BytesIO(body), media_type, parser_context)
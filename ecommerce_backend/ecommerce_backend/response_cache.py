@@ -0,0 +1,194 @@
+"""Versioned response cache for public, read-only catalog endpoints.
+
+Views opt in with `CachedResponseMixin` and list the models their
+payload depends on in `cache_dependencies`. Cache keys combine the
+normalized URL (host, path and sorted query parameters), the negotiated
+renderer and the current version of every dependency. Writes bump a
+model's version from `post_save`/`post_delete` once their transaction
+commits, so stale entries are never read again and simply expire. Cached entries carry an ETag and
+`If-None-Match` requests are answered with `304 Not Modified`. Entries
+also store gzip/Brotli variants of their body, compressed once when the
+entry is written (see `compression`).
+
+Versions live in the cache itself, so workers only see each other's
+writes through a shared backend (Redis or the file cache). On a
+per-process `LocMemCache` the other workers keep serving stale payloads
+until `RESPONSE_CACHE_TIMEOUT`; the `response_cache.W001` check warns
+about that configuration.
+"""
+
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+
+from .compression import encode_entry, serve_entry
+
+VERSION_KEY = 'catalog:version:{}'
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def _version_key(model):
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if not getattr(settings, 'RESPONSE_CACHE_ENABLED', True) or not isinstance(get_cache(), LocMemCache):
+        return []
+    return [checks.Warning(
+        'The response cache is enabled on a per-process LocMemCache.',
+        hint='Writes only invalidate cached responses in the worker that made them. Use '
+             'CACHE_BACKEND=redis or file, or run a single worker.',
+        id='response_cache.W001',
+    )]
+
+
+def _fresh_version():
+    # Time-based seed so an evicted counter never restarts at a value an
+    # older cached entry was keyed on.
+    return int(time.time() * 1000)
+
+
+def bump_version(model):
+    """Invalidate every cached response that depends on `model`.
+
+    Inside a transaction the bump waits for the commit: bumped earlier, a
+    concurrent reader could cache the pre-commit payload under the new
+    version, where it would stay until the next write.
+    """
+    transaction.on_commit(lambda: _bump(model))
+
+
+def _bump(model):
+    cache, key = get_cache(), _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), None)
+
+
+def get_versions(models):
+    """Return the current version of each model, fetched in one round trip."""
+    cache = get_cache()
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _fresh_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+async def aget_versions(models):
+    """`get_versions` for async views."""
+    cache = get_cache()
+    keys = [_version_key(model) for model in models]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, _fresh_version(), None)
+            versions[key] = await cache.aget(key)
+    return [versions[key] for key in keys]
+
+
+def cache_key(name, request, versions):
+    """Key for `request` (a DRF request with a negotiated renderer) to view `name`."""
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    url = f'{request.scheme}://{request.get_host()}{request.path}?{query}'
+    digest = hashlib.md5(url.encode('utf-8')).hexdigest()
+    renderer = request.accepted_renderer.format
+    return f'resp:{name}:{renderer}:{digest}:' + '.'.join(str(v) for v in versions)
+
+
+def make_entry(response):
+    """Cache entry for a rendered `200` response, with its compressed variants."""
+    return encode_entry({
+        'content': response.content,
+        'content_type': response['Content-Type'],
+        'etag': quote_etag(hashlib.md5(response.content).hexdigest()),
+    })
+
+
+def response_from_entry(request, entry, status):
+    """Build the reply for a cache entry: the body, or `304` when the ETag matches."""
+    if etag_matches(request, entry['etag']):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    response['ETag'] = entry['etag']
+    response['X-Cache'] = status
+    return serve_entry(request, response, entry)
+
+
+def _invalidate(sender, **kwargs):
+    bump_version(sender)
+
+
+def track_models(*models):
+    """Bump `model`'s cache version whenever an instance is saved or deleted."""
+    for model in models:
+        uid = f'response_cache:{model._meta.label_lower}'
+        post_save.connect(_invalidate, sender=model, dispatch_uid=uid + ':save', weak=False)
+        post_delete.connect(_invalidate, sender=model, dispatch_uid=uid + ':delete', weak=False)
+
+
+def etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    # Weak comparison: compressed variants carry the same ETag as `W/"..."`.
+    etags = [tag[2:] if tag.startswith('W/') else tag for tag in parse_etags(header)]
+    return '*' in etags or etag in etags
+
+
+class CachedResponseMixin:
+    """Serve anonymous GET responses from the versioned response cache.
+
+    Set `cache_dependencies` to the models whose changes should
+    invalidate the view's responses. Authenticated requests bypass the
+    cache entirely.
+    """
+    cache_dependencies = ()
+
+    def get_response_cache_key(self, request):
+        if not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+            return None
+        if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+            return None
+        return cache_key(self.__class__.__name__, request, get_versions(self.cache_dependencies))
+
+    def get(self, request, *args, **kwargs):
+        self._response_cache_key = self.get_response_cache_key(request)
+        if self._response_cache_key is not None:
+            entry = get_cache().get(self._response_cache_key)
+            if entry is not None:
+                self._response_cache_key = None
+                return response_from_entry(request, entry, 'HIT')
+        return super().get(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, '_response_cache_key', None)
+        if key is None or response.status_code != 200:
+            return response
+
+        response.render()
+        entry = make_entry(response)
+        get_cache().set(key, entry, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+        if etag_matches(request, entry['etag']):
+            response = HttpResponseNotModified()
+        response['ETag'] = entry['etag']
+        response['X-Cache'] = 'MISS'
+        return serve_entry(request, response, entry)
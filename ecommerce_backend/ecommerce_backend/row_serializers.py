@@ -0,0 +1,111 @@
+"""Read-only serializers over `.values()` rows for hot list endpoints.
+
+`ModelSerializer` walks its bound fields for every object: attribute
+lookup, `to_representation` per field, string/decimal coercion. On a
+100-row product page that is most of the request's CPU time, on top
+of building one model instance per row. `RowSerializer` instead maps
+the plain dicts produced by `queryset.values()` to output dicts with a
+hand-written `to_representation`, producing the same JSON as the model
+serializer it shadows (checked by parity tests).
+
+Views opt in with `ValuesListMixin` and `row_serializer_class`; the
+model serializer stays the view's `serializer_class` for writes, schema
+generation and anything else that needs instances.
+"""
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+
+from .images import storage_url
+
+
+def decimal_string(value, decimal_places=2):
+    """`DecimalField` output. Expressions such as `Coalesce` come back unscaled."""
+    return None if value is None else f'{value:.{decimal_places}f}'
+
+
+def datetime_string(value):
+    """`DateTimeField` output (ISO 8601 in the current timezone, `Z` for UTC)."""
+    if value is None:
+        return None
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = value.astimezone(timezone.get_current_timezone())
+    value = value.isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+def file_url(name, request=None):
+    """`FileField` output for a stored file name (absolute with a request)."""
+    if not name:
+        return None
+    url = storage_url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+class RowListSerializer(serializers.ListSerializer):
+    """Lets the child load per-page extras (`prepare`) before mapping rows."""
+
+    def to_representation(self, data):
+        rows = list(data)
+        self.child.prepare(rows)
+        to_representation = self.child.to_representation
+        return [to_representation(row) for row in rows]
+
+
+class RowSerializer(serializers.BaseSerializer):
+    """Base for read-only serializers of `.values()` dicts.
+
+    Subclasses list the `columns` to select (`values()` lookups, e.g.
+    `brand__name`) and any `annotations` they need, and implement
+    `to_representation(row)`.
+    """
+    columns = ()
+    annotations = {}
+
+    class Meta:
+        list_serializer_class = RowListSerializer
+
+    @classmethod
+    def rows(cls, queryset):
+        """Turn a filtered model queryset into the `.values()` queryset to page over.
+
+        Ordering columns are selected too, so keyset pagination can read
+        its cursor position from the last row.
+        """
+        selected = [*cls.columns, *cls.annotations]
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        for field in ordering:
+            name = field.lstrip('-') if isinstance(field, str) else None
+            if name and name not in selected and name not in ('?', 'pk') and '__' not in name:
+                selected.append(name)
+        return queryset.prefetch_related(None).annotate(**cls.annotations).values(*selected)
+
+    def prepare(self, rows):
+        """Hook to batch-load data for one page of rows (one query, not one per row)."""
+
+
+class ValuesListMixin:
+    """Serve list `GET`s as `.values()` rows through `row_serializer_class`.
+
+    Keeps ordering, filtering and pagination on the model queryset and
+    swaps it for `row_serializer_class.rows(queryset)` last.
+    """
+    row_serializer_class = None
+
+    def use_rows(self):
+        request = getattr(self, 'request', None)
+        return (self.row_serializer_class is not None and request is not None
+                and request.method in ('GET', 'HEAD')
+                and not getattr(self, 'swagger_fake_view', False))
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.use_rows():
+            queryset = self.row_serializer_class.rows(queryset)
+        return queryset
+
+    def get_serializer_class(self):
+        if self.use_rows():
+            return self.row_serializer_class
+        return super().get_serializer_class()
@@ -58,6 +58,8 @@ INSTALLED_APPS = [
 # MIDDLEWARE
 # --------------------------------------------------
 MIDDLEWARE = [
+    'ecommerce_backend.instrumentation.RequestMetricsMiddleware',
+    'ecommerce_backend.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -68,6 +70,28 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# --------------------------------------------------
+# REQUEST INSTRUMENTATION
+# --------------------------------------------------
+# See `ecommerce_backend.instrumentation`. Budgets are per URL name;
+# available keys are `queries`, `sql_ms`, `serializer_ms` and `total_ms`.
+# Overruns are logged, and fail the test suite (`BudgetTestRunner`).
+# Streaming responses (the product export) run their queries after the
+# middleware has returned, so they cannot be budgeted here.
+SERVER_TIMING_ENABLED = config('SERVER_TIMING_ENABLED', default=DEBUG, cast=bool)
+REQUEST_BUDGETS_ENFORCE = config('REQUEST_BUDGETS_ENFORCE', default=False, cast=bool)
+REQUEST_BUDGETS = {
+    'product-list': {'queries': 5},
+    'product-detail': {'queries': 6},
+    'product-review-create': {'queries': 10},
+    'category-list': {'queries': 5},
+    'category-detail': {'queries': 4},
+    'brand-list': {'queries': 3},
+    'profile': {'queries': 2},
+    'login': {'queries': 3},
+}
+TEST_RUNNER = 'ecommerce_backend.instrumentation.BudgetTestRunner'
+
 # --------------------------------------------------
 # URLS / WSGI
 # --------------------------------------------------
@@ -96,6 +120,15 @@ TEMPLATES = [
 # --------------------------------------------------
 # DATABASE
 # --------------------------------------------------
+# Each worker thread keeps its connection for DB_CONN_MAX_AGE seconds
+# (0 closes it after every request); health checks replace connections
+# the server dropped before they are reused. `DB_POOL_MODE=pgbouncer`
+# targets a transaction-pooling PgBouncer at POSTGRES_HOST/PORT, which
+# cannot keep server-side cursors open across transactions.
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+DB_POOL_MODE = config('DB_POOL_MODE', default='none').lower()
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -104,6 +137,12 @@ DATABASES = {
         'PASSWORD': config('POSTGRES_PASSWORD', default=''),
         'HOST': config('POSTGRES_HOST', default='localhost'),
         'PORT': config('POSTGRES_PORT', default='5432'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOL_MODE == 'pgbouncer',
+        'OPTIONS': {
+            'connect_timeout': config('POSTGRES_CONNECT_TIMEOUT', default=5, cast=int),
+        },
     }
 }
 
@@ -114,12 +153,91 @@ if DB_ENGINE != 'postgres':
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
         }
     }
 
 # --------------------------------------------------
-# PASSWORD VALIDATION
+# CACHE
+# --------------------------------------------------
+# `CACHE_BACKEND` picks local memory (default), a shared file cache or a
+# Redis-compatible server (`REDIS_URL`, e.g. Redis, KeyDB or Valkey).
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem').lower()
+
+_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ecommerce-backend',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / '.cache')),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/1'),
+    },
+}
+
+CACHES = {
+    'default': _CACHE_BACKENDS[CACHE_BACKEND],
+}
+
+# Versioned response cache for anonymous catalog reads
+# (see `ecommerce_backend.response_cache`). Writes invalidate it by
+# bumping a version in the cache, which only reaches other workers
+# through a shared backend: with `locmem` every worker but the writer
+# keeps serving stale prices and stock for up to RESPONSE_CACHE_TIMEOUT
+# seconds. It is therefore off by default on `locmem`; turn it on there
+# only for a single worker.
+RESPONSE_CACHE_ENABLED = config('RESPONSE_CACHE_ENABLED', default=CACHE_BACKEND != 'locmem', cast=bool)
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+
+# --------------------------------------------------
+# RESPONSE COMPRESSION
+# --------------------------------------------------
+# gzip, or Brotli with the optional `brotli` package (see
+# `ecommerce_backend.compression`). Bodies below COMPRESSION_MIN_SIZE
+# bytes are sent as is. Cached catalog responses are compressed once,
+# at the stronger COMPRESSION_CACHED_* levels, when they are stored.
+COMPRESSION_ENABLED = config('COMPRESSION_ENABLED', default=True, cast=bool)
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+COMPRESSION_GZIP_LEVEL = config('COMPRESSION_GZIP_LEVEL', default=6, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=4, cast=int)
+COMPRESSION_CACHED_GZIP_LEVEL = config('COMPRESSION_CACHED_GZIP_LEVEL', default=9, cast=int)
+COMPRESSION_CACHED_BROTLI_QUALITY = config('COMPRESSION_CACHED_BROTLI_QUALITY', default=9, cast=int)
+
 # --------------------------------------------------
+# PASSWORD HASHING & VALIDATION
+# --------------------------------------------------
+# Preferred hasher and its cost (see `users.hashers`). The other
+# algorithms stay listed so existing hashes verify and are upgraded to
+# the preferred one on the next successful login.
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='scrypt').lower()
+PASSWORD_SCRYPT_WORK_FACTOR = config('PASSWORD_SCRYPT_WORK_FACTOR', default=2 ** 14, cast=int)
+PASSWORD_SCRYPT_BLOCK_SIZE = config('PASSWORD_SCRYPT_BLOCK_SIZE', default=8, cast=int)
+PASSWORD_SCRYPT_PARALLELISM = config('PASSWORD_SCRYPT_PARALLELISM', default=1, cast=int)
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=102400, cast=int)
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=8, cast=int)
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=600_000, cast=int)
+
+_PASSWORD_HASHERS = {
+    'scrypt': 'users.hashers.ScryptPasswordHasher',
+    'argon2': 'users.hashers.Argon2PasswordHasher',
+    'pbkdf2': 'users.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+]
+
+# Threads deriving password hashes per process; 0 hashes on the request thread.
+PASSWORD_HASHING_THREADS = config('PASSWORD_HASHING_THREADS', default=0, cast=int)
+# Hash calls allowed to wait for a thread before logins get HTTP 429 (default 8 per thread).
+PASSWORD_HASHING_QUEUE = config('PASSWORD_HASHING_QUEUE', default=0, cast=int)
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -144,6 +262,15 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Downscaled copies of uploaded images (`ecommerce_backend.images`),
+# exposed as `*_srcset` maps next to the original URLs.
+IMAGE_RENDITION_WIDTHS = config('IMAGE_RENDITION_WIDTHS', default='160,320,640,1280', cast=Csv(int))
+IMAGE_RENDITION_FORMAT = config('IMAGE_RENDITION_FORMAT', default='webp')  # webp | jpeg
+IMAGE_RENDITION_QUALITY = config('IMAGE_RENDITION_QUALITY', default=80, cast=int)
+# Background threads per process building renditions after an upload;
+# 0 builds them in the request.
+IMAGE_PROCESSING_THREADS = config('IMAGE_PROCESSING_THREADS', default=2, cast=int)
+
 # --------------------------------------------------
 # DEFAULT PK
 # --------------------------------------------------
@@ -157,9 +284,18 @@ AUTH_USER_MODEL = 'users.User'
 # --------------------------------------------------
 # REST FRAMEWORK
 # --------------------------------------------------
+# Trust the `is_staff`/`is_active` claims in access tokens instead of
+# loading the user on every request (see `users.authentication`).
+JWT_STATELESS_AUTH = config('JWT_STATELESS_AUTH', default=True, cast=bool)
+
+# `orjson` (pinned in requirements.txt) or `stdlib` for API JSON; see
+# `ecommerce_backend.renderers`. Without the package, `json` is used.
+JSON_BACKEND = config('JSON_BACKEND', default='orjson')
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication' if JWT_STATELESS_AUTH
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -169,10 +305,40 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
         'rest_framework.filters.SearchFilter',
     ],
+    'DEFAULT_RENDERER_CLASSES': (
+        'ecommerce_backend.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'ecommerce_backend.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'products.pagination.CustomPageNumberPagination',
     'PAGE_SIZE': 20,
 }
 
+# OpenAPI schema (see `ecommerce_backend.api_schema`): generated once per
+# process, or loaded from the files `manage.py render_openapi_schema`
+# writes to OPENAPI_SCHEMA_DIR. Off, it is regenerated on every request.
+OPENAPI_SCHEMA_CACHE = config('OPENAPI_SCHEMA_CACHE', default=not DEBUG, cast=bool)
+OPENAPI_SCHEMA_DIR = config('OPENAPI_SCHEMA_DIR', default=str(BASE_DIR / 'openapi'))
+SWAGGER_SETTINGS = {'SPEC_URL': ('schema-json', {'format': '.json'})}
+REDOC_SETTINGS = {'SPEC_URL': ('schema-json', {'format': '.json'})}
+
+# Route the public product list/detail and category list to their async
+# variants (`ecommerce_backend.async_views`). Enable when serving ASGI
+# (`SERVER_MODE=asgi` in start.sh); under WSGI each async view would
+# need its own event loop.
+ASYNC_CATALOG_VIEWS = config('ASYNC_CATALOG_VIEWS', default=False, cast=bool)
+
+# --------------------------------------------------
+# PRODUCT SEARCH
+# --------------------------------------------------
+# `auto` uses Postgres full-text search or SQLite FTS5 depending on the
+# database; `basic` keeps the plain `icontains` SearchFilter.
+PRODUCT_SEARCH_ENGINE = config('PRODUCT_SEARCH_ENGINE', default='auto')
+
 # --------------------------------------------------
 # JWT
 # --------------------------------------------------
@@ -182,8 +348,23 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': True,
     'UPDATE_LAST_LOGIN': False,
+    # Also used by `/api/token/refresh/`: reloads the user on every refresh.
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.TokenRefreshRevocableSerializer',
 }
 
+# In-process Bloom filter + LRU in front of the refresh-token blacklist
+# (see `users.revocation`). Remote logouts are picked up on the next
+# cache version change, or after TOKEN_REVOCATION_SYNC_SECONDS.
+TOKEN_REVOCATION_BLOOM_CAPACITY = config('TOKEN_REVOCATION_BLOOM_CAPACITY', default=100_000, cast=int)
+TOKEN_REVOCATION_BLOOM_ERROR_RATE = 0.001
+TOKEN_REVOCATION_LRU_SIZE = config('TOKEN_REVOCATION_LRU_SIZE', default=10_000, cast=int)
+TOKEN_REVOCATION_SYNC_SECONDS = config('TOKEN_REVOCATION_SYNC_SECONDS', default=5, cast=float)
+# Blacklist ids skipped by a sync (not yet committed) are re-checked for
+# this long; the filter is rebuilt from the table every REBUILD seconds.
+TOKEN_REVOCATION_GAP_SECONDS = config('TOKEN_REVOCATION_GAP_SECONDS', default=60, cast=float)
+TOKEN_REVOCATION_REBUILD_SECONDS = config('TOKEN_REVOCATION_REBUILD_SECONDS', default=600, cast=float)
+TOKEN_REVOCATION_CACHE_ALIAS = 'default'
+
 # --------------------------------------------------
 # EMAIL (DEV)
 # --------------------------------------------------
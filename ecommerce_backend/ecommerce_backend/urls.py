@@ -3,7 +3,8 @@ from django.urls import path, include, re_path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+from .api_schema import API_INFO, SchemaView
+from .instrumentation import RequestMetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -16,21 +17,21 @@ urlpatterns = [
     path('api/users/', include('users.urls')),
     path('api/products/', include('products.urls')),
     path('api/categories/', include('categories.urls')),
+
+    # Per-route query/latency metrics (admin only)
+    path('api/metrics/', RequestMetricsView.as_view(), name='request-metrics'),
 ]
 
-# OpenAPI / Swagger
+# OpenAPI / Swagger. The UIs load the cached `/swagger.json`
+# (`SPEC_URL` in settings); see `ecommerce_backend.api_schema`.
 schema_view = get_schema_view(
-    openapi.Info(
-        title="Ecommerce API",
-        default_version='v1',
-        description="API documentation for the Ecommerce backend",
-    ),
+    API_INFO,
     public=True,
     permission_classes=(permissions.AllowAny,),
 )
 
 urlpatterns += [
-    re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
+    re_path(r'^swagger(?P<format>\.json|\.yaml)$', SchemaView.as_view(), name='schema-json'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ]
\ No newline at end of file
@@ -5,6 +5,7 @@ product images and reviews in the Django admin site.
 """
 
 from django.contrib import admin
+from . import ratings
 from .models import Product, ProductImage, ProductReview
 
 class ProductImageInline(admin.TabularInline):
@@ -36,6 +37,6 @@ class ProductReviewAdmin(admin.ModelAdmin):
     actions = ['approve_reviews']
     
     def approve_reviews(self, request, queryset):
-        """Mark selected reviews as approved."""
-        queryset.update(is_approved=True)
+        """Mark selected reviews as approved and update product ratings."""
+        ratings.approve_reviews(queryset)
     approve_reviews.short_description = "Approve selected reviews"
@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _ensure_search_index(sender, using, **kwargs):
+    from .search import ensure_sqlite_fts
+    ensure_sqlite_fts(using)
 
 
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
+
+    def ready(self):
+        from ecommerce_backend.images import track_images
+        from ecommerce_backend.response_cache import track_models
+        from . import signals  # noqa: F401
+        post_migrate.connect(_ensure_search_index, sender=self)
+        track_models(self.get_model('Product'), self.get_model('ProductImage'),
+                     self.get_model('ProductReview'))
+        track_images(self.get_model('ProductImage'), 'image')
@@ -0,0 +1,78 @@
+"""Streaming catalog export as NDJSON or CSV.
+
+Rows are read with `QuerySet.values(...).iterator(chunk_size=...)` and
+encoded one at a time, so memory stays flat regardless of catalog size.
+Category and brand are exported as slugs (the same form the bulk
+importer accepts) and the primary image as a media URL.
+"""
+
+import csv
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import OuterRef, Subquery
+
+from .models import ProductImage
+
+# (output column, queryset lookup)
+EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('sku', 'sku'),
+    ('slug', 'slug'),
+    ('name', 'name'),
+    ('description', 'description'),
+    ('price', 'price'),
+    ('discounted_price', 'discounted_price'),
+    ('category', 'category__slug'),
+    ('brand', 'brand__slug'),
+    ('stock_quantity', 'stock_quantity'),
+    ('is_active', 'is_active'),
+    ('is_featured', 'is_featured'),
+    ('rating_avg', 'rating_avg'),
+    ('rating_count', 'rating_count'),
+    ('primary_image', 'primary_image_name'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+]
+HEADER = [column for column, _ in EXPORT_COLUMNS] + ['final_price']
+
+
+def export_rows(queryset, chunk_size=2000):
+    """Yield one plain dict per product in `queryset`."""
+    primary_image = ProductImage.objects.filter(
+        product=OuterRef('pk'), is_primary=True
+    ).order_by('created_at').values('image')[:1]
+    storage = ProductImage._meta.get_field('image').storage
+    queryset = queryset.select_related(None).prefetch_related(None).annotate(
+        primary_image_name=Subquery(primary_image)
+    )
+    lookups = [lookup for _, lookup in EXPORT_COLUMNS]
+    for values in queryset.values(*lookups).iterator(chunk_size=chunk_size):
+        row = {column: values[lookup] for column, lookup in EXPORT_COLUMNS}
+        row['final_price'] = row['discounted_price'] or row['price']
+        if row['primary_image']:
+            row['primary_image'] = storage.url(row['primary_image'])
+        yield row
+
+
+def render_ndjson(rows):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+class _Echo:
+    """Pseudo-buffer whose `write` returns the value, for streaming `csv`."""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    writer = csv.DictWriter(_Echo(), fieldnames=HEADER)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow({
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in row.items()
+        })
@@ -0,0 +1,343 @@
+"""Synthetic catalog generation for performance testing.
+
+`CatalogGenerator` writes users, a category tree, brands, products,
+images and reviews with `bulk_create` and realistic skew:
+
+* product popularity follows a Zipf law: the product of popularity
+  rank `r` gets about `mean * N / (H * r**s)` reviews (capped at the
+  number of users), so a few products carry most reviews and most have
+  none or a handful;
+* categories, brands and review authors are also picked with Zipf
+  weights, prices are log-normal and ratings lean towards 4-5 stars
+  around a per-product quality score.
+
+Products are generated in fixed chunks, each with its own RNG seeded
+from `(seed, chunk)`, so the same seed and sizes produce the same
+catalog whatever the batch size or number of worker processes. The
+denormalized rating aggregates are computed while generating, so no
+`recompute_ratings` pass is needed afterwards.
+"""
+
+import math
+import multiprocessing
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+
+from categories.models import PATH_STEP, Brand, Category
+from ecommerce_backend.response_cache import bump_version
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from users.models import User, UserProfile
+from .models import Product, ProductImage, ProductReview
+
+CHUNK_SIZE = 5000
+DEFAULT_PASSWORD = 'password123'
+WORDS = (
+    'wireless bluetooth speaker portable waterproof laptop gaming keyboard '
+    'mechanical mouse ergonomic monitor curved ultra phone galaxy pixel case '
+    'leather wallet running shoes trail jacket winter cotton shirt denim '
+    'kitchen blender stainless kettle coffee grinder garden hose lamp desk '
+    'organic tea ceramic mug travel backpack smart watch fitness tracker'
+).split()
+REVIEW_TITLES = ['Great value', 'Does the job', 'Disappointed', 'Love it', 'Not as described', 'Solid build']
+
+# Per-process state for chunk workers; set before the pool forks.
+_spec = None
+
+
+def zipf_cum_weights(count, exponent):
+    """Cumulative Zipf weights for `random.choices(cum_weights=...)`."""
+    total, weights = 0.0, []
+    for rank in range(1, count + 1):
+        total += rank ** -exponent
+        weights.append(total)
+    return weights
+
+
+def harmonic(count, exponent):
+    """Generalized harmonic number H(count, exponent)."""
+    if count <= 100_000:
+        return sum(rank ** -exponent for rank in range(1, count + 1))
+    # Euler-Maclaurin tail approximation beyond the exact head.
+    head = sum(rank ** -exponent for rank in range(1, 100_001))
+    a, b = 100_000.5, count + 0.5
+    if exponent == 1:
+        return head + math.log(b / a)
+    return head + (b ** (1 - exponent) - a ** (1 - exponent)) / (1 - exponent)
+
+
+def _rank_multiplier(count):
+    """A multiplier coprime with `count`, used to permute popularity ranks."""
+    multiplier = int(count * 0.618) | 1
+    while math.gcd(multiplier, count) != 1:
+        multiplier += 2
+    return multiplier
+
+
+class CatalogGenerator:
+    """Generate a reproducible synthetic catalog; see the module docs."""
+
+    def __init__(self, prefix='gen', seed=1, batch_size=2000, zipf=1.1, stdout=None):
+        self.prefix = prefix
+        self.seed = seed
+        self.batch_size = batch_size
+        self.zipf = zipf
+        self.stdout = stdout
+        self.report = {'tables': {}}
+
+    def log(self, message):
+        if self.stdout:
+            self.stdout.write(message)
+
+    def _timed(self, table, rows, start):
+        elapsed = time.perf_counter() - start
+        self.report['tables'][table] = {
+            'rows': rows, 'seconds': round(elapsed, 2),
+            'rows_per_second': round(rows / elapsed) if elapsed else None,
+        }
+        self.log(f'  {table:<10} {rows:>10} rows in {elapsed:7.1f}s ({rows / elapsed if elapsed else 0:,.0f}/s)')
+
+    # -- reference data ------------------------------------------------
+
+    def generate_users(self, count, password=DEFAULT_PASSWORD):
+        start = time.perf_counter()
+        hashed = make_password(password)  # hash once; every generated user shares it
+        for first in range(0, count, self.batch_size):
+            User.objects.bulk_create([
+                User(username=f'{self.prefix}-user-{i}', email=f'{self.prefix}-user-{i}@example.com',
+                     password=hashed)
+                for i in range(first, min(first + self.batch_size, count))
+            ], ignore_conflicts=True)
+        ids = list(User.objects.filter(username__startswith=f'{self.prefix}-user-')
+                   .order_by('pk').values_list('pk', flat=True))
+        self._timed('users', count, start)
+        return ids
+
+    def generate_categories(self, depth, branching):
+        """Create a `branching`-ary tree `depth` levels deep; return the leaf ids.
+
+        An existing tree with this prefix is reused as is.
+        """
+        existing = Category.objects.filter(slug__startswith=f'{self.prefix}-cat-')
+        if existing.exists():
+            max_depth = max(existing.values_list('depth', flat=True))
+            return list(existing.filter(depth=max_depth).order_by('pk').values_list('pk', flat=True))
+        start = time.perf_counter()
+        total = 0
+        parents = [(None, '', '')]  # (id, path, label)
+        with transaction.atomic():
+            for level in range(depth):
+                nodes = []
+                for parent_id, parent_path, label in parents:
+                    for n in range(branching):
+                        child_label = f'{label}.{n}' if label else str(n)
+                        nodes.append((Category(
+                            name=f'{self.prefix.title()} {child_label}',
+                            slug=f'{self.prefix}-cat-{child_label.replace(".", "-")}',
+                            parent_id=parent_id, depth=level,
+                        ), parent_path, child_label))
+                created = _bulk_create_with_ids(Category, [node for node, _, _ in nodes],
+                                                self.batch_size, 'slug')
+                for category, parent_path, _ in nodes:
+                    category.path = f'{parent_path}{category.pk:0{PATH_STEP}d}/'
+                Category.objects.bulk_update(created, ['path'], batch_size=self.batch_size)
+                parents = [(category.pk, category.path, label) for category, _, label in nodes]
+                total += len(nodes)
+        self._timed('categories', total, start)
+        return [pk for pk, _, _ in parents]
+
+    def generate_brands(self, count):
+        start = time.perf_counter()
+        Brand.objects.bulk_create([
+            Brand(name=f'{self.prefix.title()} Brand {i}', slug=f'{self.prefix}-brand-{i}')
+            for i in range(count)
+        ], batch_size=self.batch_size, ignore_conflicts=True)
+        ids = list(Brand.objects.filter(slug__startswith=f'{self.prefix}-brand-')
+                   .order_by('pk').values_list('pk', flat=True))
+        self._timed('brands', count, start)
+        return ids
+
+    # -- products ------------------------------------------------------
+
+    def generate_products(self, count, leaf_ids, brand_ids, user_ids, reviews_per_product=3,
+                          max_images=4, workers=1):
+        global _spec
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.log('  SQLite allows one writer at a time; generating products in one process.')
+            workers = 1
+        if workers > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+            self.log('  Multiple workers need the "fork" start method; using one process.')
+            workers = 1
+
+        _spec = {
+            'prefix': self.prefix, 'seed': self.seed, 'batch_size': self.batch_size, 'count': count,
+            'zipf': self.zipf, 'reviews_per_product': reviews_per_product, 'max_images': max_images,
+            'harmonic': harmonic(count, self.zipf), 'rank_multiplier': _rank_multiplier(count),
+            'leaf_ids': leaf_ids, 'leaf_weights': zipf_cum_weights(len(leaf_ids), 1.0),
+            'brand_ids': brand_ids, 'brand_weights': zipf_cum_weights(len(brand_ids), 1.0),
+            'user_ids': user_ids, 'user_weights': zipf_cum_weights(len(user_ids), 0.8),
+        }
+        chunks = range(math.ceil(count / CHUNK_SIZE))
+        totals = {'products': 0, 'images': 0, 'reviews': 0}
+        start = time.perf_counter()
+        if workers > 1:
+            connections.close_all()  # children must open their own connections
+            with multiprocessing.get_context('fork').Pool(workers) as pool:
+                results = pool.imap_unordered(_generate_chunk, chunks)
+                self._collect(results, totals, count)
+        else:
+            self._collect(map(_generate_chunk, chunks), totals, count)
+        self.log('')
+        for table, rows in totals.items():
+            self._timed(table, rows, start)
+        return totals
+
+    def _collect(self, results, totals, count):
+        for counts in results:
+            for table, rows in counts.items():
+                totals[table] += rows
+            if self.stdout:
+                self.stdout.write(f'  {totals["products"]:>10} / {count} products', ending='\r')
+                self.stdout.flush()
+
+    # -- orchestration -------------------------------------------------
+
+    def run(self, products, users, brands, depth, branching, reviews_per_product=3, max_images=4,
+            workers=1, password=DEFAULT_PASSWORD):
+        start = time.perf_counter()
+        user_ids = self.generate_users(users, password)
+        leaf_ids = self.generate_categories(depth, branching)
+        brand_ids = self.generate_brands(brands)
+        self.generate_products(products, leaf_ids, brand_ids, user_ids, reviews_per_product,
+                               max_images, workers)
+        if connection.vendor in ('postgresql', 'sqlite'):
+            # Refresh planner statistics after a bulk load.
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        for model in (Category, Brand, Product, ProductImage, ProductReview):
+            bump_version(model)
+
+        elapsed = time.perf_counter() - start
+        rows = sum(table['rows'] for table in self.report['tables'].values())
+        self.report.update(seconds=round(elapsed, 2), rows=rows,
+                           rows_per_second=round(rows / elapsed) if elapsed else None)
+        return self.report
+
+    def exists(self):
+        return Product.objects.filter(sku__startswith=f'{self.prefix.upper()}-').exists()
+
+    def reset(self):
+        """Delete every row previously generated with this prefix."""
+        prefix = self.prefix
+        # `_raw_delete` skips Django's in-memory cascade collection (and
+        # the review signals), which would not scale to millions of rows.
+        products = Product.objects.filter(sku__startswith=f'{prefix.upper()}-')
+        users = User.objects.filter(username__startswith=f'{prefix}-user-')
+        # Generated users that logged in (e.g. `loadtest.py run`) own
+        # refresh tokens and possibly a profile; those go first.
+        tokens = OutstandingToken.objects.filter(user__in=users)
+        for queryset in (
+            ProductReview.objects.filter(product__in=products),
+            ProductReview.objects.filter(user__in=users),
+            ProductImage.objects.filter(product__in=products),
+            products,
+            Brand.objects.filter(slug__startswith=f'{prefix}-brand-'),
+            BlacklistedToken.objects.filter(token__in=tokens),
+            tokens,
+            UserProfile.objects.filter(user__in=users),
+            users,
+        ):
+            queryset._raw_delete(queryset.db)
+        Category.objects.filter(slug__startswith=f'{prefix}-cat-').order_by('-depth').delete()
+
+
+def _bulk_create_with_ids(model, objs, batch_size, key):
+    """`bulk_create` and make sure every object has its primary key set."""
+    created = model.objects.bulk_create(objs, batch_size=batch_size)
+    if connection.features.can_return_rows_from_bulk_insert:
+        return created
+    ids = dict(model.objects.filter(**{f'{key}__in': [getattr(obj, key) for obj in objs]})
+               .values_list(key, 'pk'))
+    for obj in objs:
+        obj.pk = ids[getattr(obj, key)]
+    return objs
+
+
+def _generate_chunk(chunk):
+    """Build and insert one chunk of products with their images and reviews."""
+    spec = _spec
+    rng = random.Random(f"{spec['seed']}:{chunk}")
+    first = chunk * CHUNK_SIZE
+    last = min(first + CHUNK_SIZE, spec['count'])
+    prefix, sku_prefix = spec['prefix'], spec['prefix'].upper()
+    user_ids = spec['user_ids']
+    scale = spec['reviews_per_product'] * spec['count'] / spec['harmonic']
+
+    products, extras = [], []
+    for i in range(first, last):
+        rank = (i * spec['rank_multiplier']) % spec['count'] + 1
+        expected = scale / rank ** spec['zipf']
+        n_reviews = min(len(user_ids), int(expected) + (rng.random() < expected % 1))
+        quality = rng.betavariate(5, 2)
+        ratings = []
+        for author in _distinct_authors(rng, spec, n_reviews):
+            stars = min(5, max(1, round(1 + 4 * quality + rng.gauss(0, 0.9))))
+            ratings.append((author, stars, rng.random() < 0.85))
+
+        price = Decimal(min(9999.0, max(0.99, math.exp(rng.gauss(3.6, 1.0))))).quantize(Decimal('0.01'))
+        product = Product(
+            name=' '.join(rng.choice(WORDS) for _ in range(3)).title() + f' {i}',
+            slug=f'{prefix}-{i}', sku=f'{sku_prefix}-{i:08d}',
+            description=' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))),
+            price=price,
+            discounted_price=(price * Decimal(rng.uniform(0.5, 0.95))).quantize(Decimal('0.01'))
+            if rng.random() < 0.2 else None,
+            category_id=rng.choices(spec['leaf_ids'], cum_weights=spec['leaf_weights'])[0],
+            brand_id=rng.choices(spec['brand_ids'], cum_weights=spec['brand_weights'])[0]
+            if spec['brand_ids'] and rng.random() < 0.9 else None,
+            stock_quantity=0 if rng.random() < 0.05 else min(10_000, int(rng.paretovariate(1.5) * 10)),
+            is_active=rng.random() < 0.97,
+            is_featured=rng.random() < 0.02,
+        )
+        approved = [stars for _, stars, ok in ratings if ok]
+        product.rating_count = len(approved)
+        product.rating_sum = sum(approved)
+        product.rating_avg = (Decimal(product.rating_sum) / product.rating_count).quantize(Decimal('0.01')) \
+            if approved else Decimal('0')
+        for stars in range(1, 6):
+            setattr(product, f'rating_{stars}_count', approved.count(stars))
+        products.append(product)
+        extras.append((rng.randint(1, spec['max_images']), ratings))
+
+    with transaction.atomic():
+        _bulk_create_with_ids(Product, products, spec['batch_size'], 'sku')
+        images, reviews = [], []
+        for product, (n_images, ratings) in zip(products, extras):
+            images.extend(
+                ProductImage(product_id=product.pk, image=f'products/{product.slug}-{n}.jpg',
+                             alt_text=product.name, is_primary=n == 0)
+                for n in range(n_images)
+            )
+            reviews.extend(
+                ProductReview(product_id=product.pk, user_id=author, rating=stars, is_approved=ok,
+                              title=REVIEW_TITLES[(author + stars) % len(REVIEW_TITLES)],
+                              comment=' '.join(WORDS[(author * k) % len(WORDS)] for k in range(1, 15)))
+                for author, stars, ok in ratings
+            )
+        ProductImage.objects.bulk_create(images, batch_size=spec['batch_size'])
+        ProductReview.objects.bulk_create(reviews, batch_size=spec['batch_size'])
+    return {'products': len(products), 'images': len(images), 'reviews': len(reviews)}
+
+
+def _distinct_authors(rng, spec, count):
+    """`count` distinct user ids, favouring the (Zipf-)active users."""
+    user_ids = spec['user_ids']
+    if count * 4 > len(user_ids):
+        return rng.sample(user_ids, count)
+    chosen = set()
+    while len(chosen) < count:
+        chosen.update(rng.choices(user_ids, cum_weights=spec['user_weights'], k=count - len(chosen)))
+    return sorted(chosen)
@@ -0,0 +1,175 @@
+"""Bulk product upsert from JSONL or CSV supplier feeds.
+
+`ProductImporter` streams rows, validates them with the model fields'
+own `clean()` (no serializer per row), resolves `category`/`brand`
+slugs from in-memory lookups and writes batches with
+`bulk_create(update_conflicts=True)` keyed on `sku`. Existing products
+keep their `slug` and `created_at`, and only the columns a row carries
+are overwritten: a price-only row leaves stock, category and
+`is_active` alone. Invalid rows are skipped and reported with their line
+number instead of aborting the import.
+"""
+
+import csv
+import json
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+from categories.models import Brand, Category
+from ecommerce_backend.response_cache import bump_version
+from .models import Product
+
+UPDATE_FIELDS = [
+    'name', 'description', 'price', 'discounted_price', 'category', 'brand',
+    'stock_quantity', 'is_active', 'is_featured',
+]
+TEXT_FIELDS = ['name', 'slug', 'sku', 'description']
+VALUE_FIELDS = ['price', 'discounted_price', 'stock_quantity', 'is_active', 'is_featured']
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'f'}
+
+
+def read_rows(lines, fmt):
+    """Yield `(line_number, row_dict_or_error)` from an iterable of text lines."""
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, ValidationError(f'Invalid JSON: {exc}')
+            continue
+        if not isinstance(row, dict):
+            yield number, ValidationError('Each line must be a JSON object.')
+            continue
+        yield number, row
+
+
+def update_fields(row):
+    """The columns an upsert of `row` overwrites: those it carries, even empty."""
+    return tuple(name for name in UPDATE_FIELDS if name in row) + ('updated_at',)
+
+
+def decode_lines(stream, encoding='utf-8'):
+    """Iterate a binary stream (file, `HttpRequest`) as decoded text lines."""
+    for line in stream:
+        yield line.decode(encoding) if isinstance(line, bytes) else line
+
+
+class ProductImporter:
+    """Validate and upsert product rows in batches keyed on `sku`."""
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.categories = dict(Category.objects.values_list('slug', 'id'))
+        self.brands = dict(Brand.objects.values_list('slug', 'id'))
+        self.fields = {name: Product._meta.get_field(name) for name in TEXT_FIELDS + VALUE_FIELDS}
+
+    def run(self, rows):
+        """Import `(line_number, row)` pairs and return a summary report."""
+        start = time.perf_counter()
+        report = {'processed': 0, 'created': 0, 'updated': 0, 'failed': 0, 'errors': []}
+        batch = {}
+        for number, row in rows:
+            report['processed'] += 1
+            try:
+                if isinstance(row, ValidationError):
+                    raise row
+                product = self.build(row)
+            except ValidationError as exc:
+                self._fail(report, number, row, exc)
+                continue
+            # A later row for the same SKU wins; ON CONFLICT cannot touch a row twice.
+            batch[product.sku] = (number, product, update_fields(row))
+            if len(batch) >= self.batch_size:
+                self.flush(batch, report)
+                batch = {}
+        if batch:
+            self.flush(batch, report)
+
+        if report['created'] or report['updated']:
+            bump_version(Product)
+        elapsed = time.perf_counter() - start
+        report['elapsed_seconds'] = round(elapsed, 3)
+        report['rows_per_second'] = round(report['processed'] / elapsed, 1) if elapsed else None
+        return report
+
+    def build(self, row):
+        """Turn a raw row into an unsaved `Product`, raising `ValidationError`."""
+        errors = {}
+        values = {}
+        for name in ('name', 'sku', 'price'):
+            if row.get(name) in (None, ''):
+                errors[name] = 'This field is required.'
+        for name, field in self.fields.items():
+            raw = row.get(name)
+            if raw in (None, ''):
+                continue
+            if name in ('is_active', 'is_featured') and isinstance(raw, str):
+                lowered = raw.strip().lower()
+                raw = True if lowered in TRUE_VALUES else False if lowered in FALSE_VALUES else raw
+            try:
+                values[name] = field.clean(raw, None)
+            except ValidationError as exc:
+                errors[name] = ' '.join(exc.messages)
+
+        for name, lookup in (('category', self.categories), ('brand', self.brands)):
+            slug = row.get(name)
+            if slug in (None, ''):
+                values[name + '_id'] = None
+            elif slug in lookup:
+                values[name + '_id'] = lookup[slug]
+            else:
+                errors[name] = f'Unknown {name} slug "{slug}".'
+
+        if errors:
+            raise ValidationError(errors)
+        values.setdefault('slug', slugify(f"{values['name']}-{values['sku']}")[:200])
+        values.setdefault('description', '')
+        return Product(**values)
+
+    def flush(self, batch, report):
+        """Upsert one batch; on a constraint error retry row by row."""
+        # One statement per set of columns, so absent columns keep their values.
+        groups = {}
+        for _, product, fields in batch.values():
+            groups.setdefault(fields, []).append(product)
+        existing = set(Product.objects.filter(sku__in=batch.keys()).values_list('sku', flat=True))
+        try:
+            with transaction.atomic():
+                for fields, products in groups.items():
+                    Product.objects.bulk_create(
+                        products, update_conflicts=True, unique_fields=['sku'], update_fields=fields,
+                    )
+        except IntegrityError:
+            # Usually a slug clash with a different SKU; isolate the bad rows.
+            for number, product, fields in batch.values():
+                try:
+                    with transaction.atomic():
+                        Product.objects.bulk_create(
+                            [product], update_conflicts=True, unique_fields=['sku'], update_fields=fields,
+                        )
+                except IntegrityError as exc:
+                    self._fail(report, number, {'sku': product.sku}, ValidationError(str(exc)))
+                    continue
+                report['updated' if product.sku in existing else 'created'] += 1
+            return
+        updated = len(existing)
+        report['updated'] += updated
+        report['created'] += len(batch) - updated
+
+    @staticmethod
+    def _fail(report, number, row, exc):
+        report['failed'] += 1
+        errors = exc.message_dict if hasattr(exc, 'error_dict') else {'non_field_errors': exc.messages}
+        sku = row.get('sku') if isinstance(row, dict) else None
+        report['errors'].append({'line': number, 'sku': sku, 'errors': errors})
@@ -0,0 +1,78 @@
+"""Generate a large synthetic catalog for performance testing.
+
+Writes users, a category tree, brands, products, images and reviews in
+`bulk_create` batches with Zipf-skewed popularity (see
+`products.generator`). Output is reproducible from `--seed`.
+"""
+
+import argparse
+import json
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.generator import DEFAULT_PASSWORD, CatalogGenerator
+
+MULTIPLIERS = {'': 1, 'k': 1_000, 'm': 1_000_000}
+
+
+def size(value):
+    """Parse a row count such as `50000`, `100k` or `1m`."""
+    match = re.fullmatch(r'(\d+)([km]?)', value.strip().lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f'invalid size "{value}" (e.g. 50000, 100k, 1m)')
+    return int(match[1]) * MULTIPLIERS[match[2]]
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generate a synthetic catalog (products, categories, brands, users, images, reviews).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=size, default=10_000,
+                            help='Number of products, e.g. 50000 or 1m (default 10000).')
+        parser.add_argument('--users', type=size, default=None,
+                            help='Number of users (default: products / 10, at least 100).')
+        parser.add_argument('--brands', type=int, default=200)
+        parser.add_argument('--depth', type=int, default=4, help='Category tree depth (default 4).')
+        parser.add_argument('--branching', type=int, default=5, help='Children per category (default 5).')
+        parser.add_argument('--reviews-per-product', type=float, default=3,
+                            help='Mean reviews per product; the Zipf skew decides who gets them.')
+        parser.add_argument('--max-images', type=int, default=4)
+        parser.add_argument('--zipf', type=float, default=1.1, help='Popularity skew exponent (default 1.1).')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--prefix', default='gen',
+                            help='Prefix for generated slugs, SKUs and usernames (default "gen").')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Password of every generated user.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per INSERT (default 2000).')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes generating products in parallel (not with SQLite).')
+        parser.add_argument('--reset', action='store_true',
+                            help='Delete rows previously generated with the same prefix first.')
+        parser.add_argument('--report', help='Write the JSON timing report here.')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix'].lower()
+        if not prefix.isalnum():
+            raise CommandError('--prefix must be alphanumeric.')
+        generator = CatalogGenerator(prefix=prefix, seed=options['seed'], batch_size=options['batch_size'],
+                                     zipf=options['zipf'], stdout=self.stdout)
+        if options['reset']:
+            self.stdout.write(f'Deleting rows generated with prefix "{prefix}"...')
+            generator.reset()
+        elif generator.exists():
+            raise CommandError(f'Products with prefix "{prefix}" already exist; pass --reset or another --prefix.')
+
+        products = options['products']
+        users = options['users'] if options['users'] is not None else max(100, products // 10)
+        self.stdout.write(f'Generating {products} products, {users} users (seed {options["seed"]})...')
+        report = generator.run(
+            products=products, users=users, brands=options['brands'], depth=options['depth'],
+            branching=options['branching'], reviews_per_product=options['reviews_per_product'],
+            max_images=options['max_images'], workers=options['workers'], password=options['password'],
+        )
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as out:
+                json.dump(report, out, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f"Inserted {report['rows']} rows in {report['seconds']}s ({report['rows_per_second']} rows/s)."
+        ))
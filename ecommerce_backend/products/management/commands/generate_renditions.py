@@ -0,0 +1,68 @@
+"""Build missing image renditions for every tracked image field.
+
+Uploads get their renditions in the background as they are saved. Run
+this once after deploying, after bulk imports (which bypass model
+signals), after changing `IMAGE_RENDITION_*`, or to catch up on jobs
+lost when a worker restarted.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ecommerce_backend import images
+
+
+class Command(BaseCommand):
+    help = 'Generate resized renditions of product images, category images, brand logos and avatars.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', dest='models', metavar='APP.MODEL',
+                            help='Only process this model, e.g. products.ProductImage (repeatable).')
+        parser.add_argument('--force', action='store_true',
+                            help='Rebuild renditions that are already up to date.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Images processed in parallel (default: number of CPUs).')
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help='Rows read per query (default 200).')
+
+    def handle(self, *args, **options):
+        labels = {model._meta.label_lower: model for model in images.tracked}
+        selected = list(images.tracked)
+        if options['models']:
+            unknown = [label for label in options['models'] if label.lower() not in labels]
+            if unknown:
+                raise CommandError(f'Not a tracked image model: {", ".join(unknown)} '
+                                   f'(choose from {", ".join(sorted(labels))})')
+            selected = [labels[label.lower()] for label in options['models']]
+
+        start = time.perf_counter()
+        total = 0
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as executor:
+            for model in selected:
+                done = self.backfill(model, executor, options['force'], options['batch_size'])
+                self.stdout.write(f'{model._meta.label}: {done} images')
+                total += done
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'Generated renditions for {total} images in {elapsed:.2f}s.'))
+
+    def backfill(self, model, executor, force, batch_size):
+        """Render pending rows of `model` in batches; returns how many were rendered."""
+        field = images.tracked[model]
+        rows = (model._default_manager.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                .order_by('pk').values_list('pk', field, 'renditions'))
+        done, last_pk = 0, None
+        while True:
+            batch = rows.filter(pk__gt=last_pk) if last_pk is not None else rows
+            batch = list(batch[:batch_size])
+            if not batch:
+                return done
+            last_pk = batch[-1][0]
+            pending = [(pk, name) for pk, name, renditions in batch
+                       if force or (renditions or {}).get('source') != name]
+            # Images are decoded and encoded in the pool; rows are written
+            # from this thread.
+            for (pk, name), srcset in zip(pending, executor.map(images.render, [name for _, name in pending])):
+                done += images.apply_renditions(model, pk, name, srcset)
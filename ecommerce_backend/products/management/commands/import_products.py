@@ -0,0 +1,48 @@
+"""Bulk upsert products from a JSONL or CSV supplier feed.
+
+Rows are keyed on `sku`; `category` and `brand` columns hold slugs.
+The file is streamed, so feeds of any size use constant memory.
+"""
+
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importer import ProductImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Import/upsert products from a .jsonl or .csv file (use "-" for stdin).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Feed file, or "-" to read stdin.')
+        parser.add_argument('--format', choices=['jsonl', 'csv'],
+                            help='Feed format (default: inferred from the file extension).')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows per bulk upsert statement (default 1000).')
+        parser.add_argument('--report', help='Write the full JSON report, including every error, here.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        importer = ProductImporter(batch_size=options['batch_size'])
+        try:
+            handle = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(f'Cannot open {path}: {exc}')
+        with handle:
+            report = importer.run(read_rows(handle, fmt))
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as out:
+                json.dump(report, out, indent=2)
+        for error in report['errors'][:20]:
+            self.stderr.write(f"line {error['line']} (sku={error['sku']}): {error['errors']}")
+        if report['failed'] > 20:
+            self.stderr.write(f"... {report['failed'] - 20} more errors")
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {report['processed']} rows: {report['created']} created, "
+            f"{report['updated']} updated, {report['failed']} failed "
+            f"({report['rows_per_second']} rows/s)."
+        ))
@@ -0,0 +1,36 @@
+"""Rebuild the denormalized `Product.rating_*` aggregates from reviews.
+
+The aggregates are normally maintained incrementally; run this after
+bulk imports, raw SQL edits or to repair drift.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from ecommerce_backend.response_cache import bump_version
+from products.models import Product
+from products.ratings import recompute_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute rating_avg/rating_count and the star histogram for products.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Products rewritten per bulk_update (default 1000).')
+        parser.add_argument('--slug', action='append', dest='slugs',
+                            help='Only recompute these products (repeatable).')
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.all()
+        if options['slugs']:
+            queryset = queryset.filter(slug__in=options['slugs'])
+
+        start = time.perf_counter()
+        count = recompute_ratings(queryset, batch_size=options['batch_size'])
+        bump_version(Product)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Recomputed ratings for {count} products in {elapsed:.2f}s.'
+        ))
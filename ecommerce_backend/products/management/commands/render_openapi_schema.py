@@ -0,0 +1,32 @@
+"""Pre-render the OpenAPI schema served at `/swagger.json` and `/swagger.yaml`.
+
+Run during the build or deploy (`start.sh` does, after migrating) so that
+no process has to introspect the API: `SchemaView` loads these files
+from `OPENAPI_SCHEMA_DIR` when it first needs them. Files are replaced
+atomically, so running processes never read a partial schema.
+"""
+
+import os
+
+from django.core.management.base import BaseCommand
+
+from ecommerce_backend.api_schema import RENDERERS, generate_schema, schema_path
+
+
+class Command(BaseCommand):
+    help = 'Write the OpenAPI schema to OPENAPI_SCHEMA_DIR as swagger.json and swagger.yaml.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', help='Directory to write to (default: OPENAPI_SCHEMA_DIR).')
+        parser.add_argument('--format', action='append', dest='formats', choices=sorted(RENDERERS),
+                            help='Only write this format (repeatable; default: all).')
+
+    def handle(self, *args, **options):
+        for format in options['formats'] or RENDERERS:
+            path = schema_path(format, options['output_dir'])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            content = generate_schema(format)
+            with open(path + '.tmp', 'wb') as handle:
+                handle.write(content)
+            os.replace(path + '.tmp', path)
+            self.stdout.write(f'{path}: {len(content)} bytes')
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+PG_INDEX_NAME = 'products_product_search_gin'
+
+PG_VECTOR_SQL = (
+    "to_tsvector('english'::regconfig, "
+    "COALESCE(\"products_product\".\"name\", '') || ' ' || "
+    "COALESCE(\"products_product\".\"description\", '') || ' ' || "
+    "COALESCE(\"products_product\".\"sku\", ''))"
+)
+
+
+def create_search_index(apps, schema_editor):
+    """GIN index for the Postgres engine; SQLite FTS5 is set up post_migrate."""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {PG_INDEX_NAME} ON products_product USING GIN (({PG_VECTOR_SQL}))'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {PG_INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.7 on 2026-10-17 11:25
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_ratings(apps, schema_editor):
+    """Populate the aggregates from the approved reviews already stored."""
+    Product = apps.get_model('products', 'Product')
+    ProductReview = apps.get_model('products', 'ProductReview')
+    histograms = defaultdict(dict)
+    rows = (ProductReview.objects.filter(is_approved=True)
+            .values('product_id', 'rating').annotate(n=Count('id')).order_by())
+    for row in rows:
+        histograms[row['product_id']][row['rating']] = row['n']
+    for product_id, histogram in histograms.items():
+        count = sum(histogram.values())
+        total = sum(stars * n for stars, n in histogram.items())
+        fields = {f'rating_{stars}_count': histogram.get(stars, 0) for stars in range(1, 6)}
+        Product.objects.filter(pk=product_id).update(
+            rating_count=count, rating_sum=total, rating_avg=round(total / count, 2), **fields
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_avg',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 11:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['rating_avg'], name='products_pr_rating__0d63e9_idx'),
+        ),
+    ]
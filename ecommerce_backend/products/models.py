@@ -6,6 +6,7 @@ properties such as `final_price` to reflect discounted pricing.
 """
 
 from django.db import models
+from django.db.models import Q
 from categories.models import Category, Brand
 from django.core.validators import MinValueValidator
 
@@ -13,7 +14,9 @@ class Product(models.Model):
     """Represents a sellable product with pricing and inventory.
 
     The `final_price` property returns `discounted_price` when present
-    otherwise falls back to `price`.
+    otherwise falls back to `price`. The `rating_*` columns hold
+    denormalized aggregates of approved reviews so detail pages do not
+    need to scan `ProductReview`.
     """
     name = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True)
@@ -26,6 +29,15 @@ class Product(models.Model):
     stock_quantity = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
+    # Aggregates over approved reviews, maintained by `products.ratings`.
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_avg = models.DecimalField(max_digits=3, decimal_places=2, default=0, editable=False)
+    rating_1_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -37,6 +49,20 @@ class Product(models.Model):
             models.Index(fields=['category']),
             models.Index(fields=['price']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['rating_avg']),
+            # Public listings only ever read active products: partial
+            # indexes matching `ProductListView`'s filter and ordering
+            # shapes, with `id` last for the keyset tie-breaker.
+            models.Index(fields=['-created_at', '-id'], condition=Q(is_active=True),
+                         name='product_active_created_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], condition=Q(is_active=True),
+                         name='product_active_category_idx'),
+            models.Index(fields=['brand', '-created_at', '-id'], condition=Q(is_active=True),
+                         name='product_active_brand_idx'),
+            models.Index(fields=['price', 'id'], condition=Q(is_active=True),
+                         name='product_active_price_idx'),
+            models.Index(fields=['rating_avg', 'id'], condition=Q(is_active=True),
+                         name='product_active_rating_idx'),
         ]
     
     def __str__(self):
@@ -47,10 +73,16 @@ class Product(models.Model):
         """Return the effective price after discount if applicable."""
         return self.discounted_price if self.discounted_price else self.price
 
+    @property
+    def rating_histogram(self):
+        """Return approved review counts keyed by star rating ("1".."5")."""
+        return {str(stars): getattr(self, f'rating_{stars}_count') for stars in range(1, 6)}
+
 class ProductImage(models.Model):
     """Image associated with a `Product`. Marks one image as primary."""
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='products/')
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     alt_text = models.CharField(max_length=200, blank=True)
     is_primary = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,103 @@
+"""Incremental maintenance of the denormalized rating aggregates.
+
+Only approved reviews count towards `Product.rating_*`. Every change is
+applied as a relative `F()` update, so concurrent reviews on the same
+product never overwrite each other, and `rating_avg` is then derived
+from the stored sum and count. Both paths round the average half up to
+two places, as the column stores it, so the value written, the value a
+cursor encodes and the value `recompute_ratings` writes always agree.
+"""
+
+from collections import Counter, defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Value, When
+from django.db.models.functions import Cast
+
+from ecommerce_backend.response_cache import bump_version
+from .models import Product, ProductReview
+
+
+def apply_rating_changes(changes):
+    """Apply `{(product_id, rating): delta}` to the product aggregates."""
+    changes = {key: delta for key, delta in changes.items() if delta}
+    if not changes:
+        return
+    with transaction.atomic():
+        for (product_id, rating), delta in changes.items():
+            Product.objects.filter(pk=product_id).update(**{
+                'rating_count': F('rating_count') + delta,
+                'rating_sum': F('rating_sum') + delta * rating,
+                f'rating_{rating}_count': F(f'rating_{rating}_count') + delta,
+            })
+        refresh_average({product_id for product_id, _ in changes})
+    # Relative updates bypass `post_save`, so invalidate cached payloads here.
+    bump_version(Product)
+
+
+def refresh_average(product_ids):
+    """Recompute `rating_avg` from `rating_sum`/`rating_count`."""
+    # Integer arithmetic (identical on SQLite and Postgres) gives the
+    # average in hundredths, rounded half up.
+    hundredths = (F('rating_sum') * 200 + F('rating_count')) / (F('rating_count') * 2)
+    Product.objects.filter(pk__in=product_ids).update(rating_avg=Case(
+        When(rating_count__gt=0, then=Cast(hundredths, FloatField()) / 100),
+        default=Value(0.0),
+        output_field=FloatField(),
+    ))
+
+
+def approve_reviews(queryset):
+    """Approve the reviews in `queryset` and count them in the aggregates.
+
+    Used instead of a bare `queryset.update(is_approved=True)`, which
+    would bypass the model signals.
+    """
+    with transaction.atomic():
+        pending = list(
+            queryset.filter(is_approved=False).select_for_update()
+            .values_list('pk', 'product_id', 'rating')
+        )
+        ProductReview.objects.filter(pk__in=[pk for pk, _, _ in pending]).update(is_approved=True)
+        apply_rating_changes(Counter((product_id, rating) for _, product_id, rating in pending))
+    bump_version(ProductReview)
+    return len(pending)
+
+
+def recompute_ratings(queryset=None, batch_size=1000):
+    """Rebuild the aggregates from scratch for `queryset` (default: all products).
+
+    Products are processed in primary-key batches: one grouped aggregate
+    query and one `bulk_update` per batch. Returns the number of
+    products rewritten.
+    """
+    queryset = (queryset if queryset is not None else Product.objects.all()).order_by('pk')
+    fields = ['rating_count', 'rating_sum', 'rating_avg'] + [f'rating_{stars}_count' for stars in range(1, 6)]
+    total = 0
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).only('pk')[:batch_size])
+        if not batch:
+            return total
+        last_pk = batch[-1].pk
+
+        histograms = defaultdict(Counter)
+        rows = (ProductReview.objects.filter(product__in=batch, is_approved=True)
+                .values('product_id', 'rating').annotate(n=Count('id')).order_by())
+        for row in rows:
+            histograms[row['product_id']][row['rating']] = row['n']
+
+        for product in batch:
+            histogram = histograms.get(product.pk, Counter())
+            product.rating_count = sum(histogram.values())
+            product.rating_sum = sum(stars * n for stars, n in histogram.items())
+            product.rating_avg = (
+                (Decimal(product.rating_sum) / product.rating_count).quantize(Decimal('0.01'), ROUND_HALF_UP)
+                if product.rating_count else Decimal('0')
+            )
+            for stars in range(1, 6):
+                setattr(product, f'rating_{stars}_count', histogram[stars])
+        with transaction.atomic():
+            Product.objects.bulk_update(batch, fields)
+        total += len(batch)
@@ -0,0 +1,172 @@
+"""Pluggable full-text search for the product catalog.
+
+`ProductSearchFilter` keeps the public `?search=` contract of DRF's
+`SearchFilter` but hands the terms to a database-specific engine:
+
+* `PostgresSearchEngine` matches a `tsvector` over name, description
+  and sku (backed by a GIN expression index) and ranks with `ts_rank`.
+* `SQLiteSearchEngine` queries an FTS5 external-content table kept in
+  sync with `products_product` by triggers and ranks with `bm25`.
+
+Set `PRODUCT_SEARCH_ENGINE` to `auto` (pick by database vendor),
+`postgres`, `sqlite` or `basic` (the original `icontains` scans).
+"""
+
+import logging
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'products_product_fts'
+
+# Must stay identical to the expression indexed in migration 0003 so the
+# planner can use the GIN index.
+PG_VECTOR_SQL = (
+    "to_tsvector('english'::regconfig, "
+    "COALESCE(\"products_product\".\"name\", '') || ' ' || "
+    "COALESCE(\"products_product\".\"description\", '') || ' ' || "
+    "COALESCE(\"products_product\".\"sku\", ''))"
+)
+
+SQLITE_FTS_SQL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "name, description, sku, content='products_product', content_rowid='id')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products_product BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, description, sku) "
+    "VALUES (new.id, new.name, new.description, new.sku); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products_product BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, sku) "
+    "VALUES ('delete', old.id, old.name, old.description, old.sku); END",
+    # Only text edits touch the index; stock/price/rating updates skip it.
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au_text "
+    "AFTER UPDATE OF name, description, sku ON products_product BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, sku) "
+    "VALUES ('delete', old.id, old.name, old.description, old.sku); "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, description, sku) "
+    "VALUES (new.id, new.name, new.description, new.sku); END",
+]
+SQLITE_FTS_OBJECTS = {FTS_TABLE, f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au_text'}
+# Replaced by `_au_text`, which ignores non-text column updates.
+SQLITE_FTS_OBSOLETE = [f'{FTS_TABLE}_au']
+
+_fts_ready = set()
+
+
+def tokenize(terms):
+    """Split search terms into word tokens safe for tsquery/FTS5 syntax."""
+    return [token for term in terms for token in re.findall(r'\w+', term)]
+
+
+class PostgresSearchEngine:
+    """Prefix-matching `tsvector @@ tsquery` search ranked by `ts_rank`."""
+
+    def search(self, queryset, tokens):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+
+        vector = RawSQL(PG_VECTOR_SQL, [], output_field=SearchVectorField())
+        query = SearchQuery(
+            ' & '.join(f'{token}:*' for token in tokens), config='english', search_type='raw'
+        )
+        return queryset.alias(search_vector=vector).filter(search_vector=query).annotate(
+            search_rank=SearchRank(vector, query)
+        )
+
+
+class SQLiteSearchEngine:
+    """FTS5 prefix search ranked by `bm25` (negated so higher is better)."""
+
+    def search(self, queryset, tokens):
+        match = ' '.join('"%s"*' % token.replace('"', '""') for token in tokens)
+        table = queryset.model._meta.db_table
+        # A join (rather than a correlated rank subquery) lets FTS5 run
+        # the MATCH once and hand back `rank` for every hit.
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = "{table}"."id"', f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+            select={'search_rank': f'-{FTS_TABLE}.rank'},
+        )
+
+
+def ensure_sqlite_fts(using='default'):
+    """Create the FTS5 table and sync triggers if missing, then rebuild.
+
+    SQLite drops triggers whenever Django rebuilds `products_product`
+    during a migration, so this runs from `post_migrate` rather than
+    from a one-off migration.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s)" % ','.join(['%s'] * len(SQLITE_FTS_OBJECTS)),
+            sorted(SQLITE_FTS_OBJECTS),
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if existing != SQLITE_FTS_OBJECTS:
+            try:
+                for trigger in SQLITE_FTS_OBSOLETE:
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+                for statement in SQLITE_FTS_SQL:
+                    cursor.execute(statement)
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            except Exception:
+                logger.warning('SQLite FTS5 unavailable; product search falls back to icontains.')
+                return
+    _fts_ready.add(using)
+
+
+def _sqlite_fts_available(using):
+    if using not in _fts_ready:
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+            if cursor.fetchone():
+                _fts_ready.add(using)
+    return using in _fts_ready
+
+
+def get_search_engine(using='default'):
+    """Return the configured engine for `using`, or None for `icontains`."""
+    choice = getattr(settings, 'PRODUCT_SEARCH_ENGINE', 'auto')
+    vendor = connections[using].vendor
+    if choice == 'auto':
+        choice = {'postgresql': 'postgres', 'sqlite': 'sqlite'}.get(vendor, 'basic')
+    if choice == 'postgres' and vendor == 'postgresql':
+        return PostgresSearchEngine()
+    if choice == 'sqlite' and vendor == 'sqlite' and _sqlite_fts_available(using):
+        return SQLiteSearchEngine()
+    return None
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """`SearchFilter` that delegates `?search=` to a full-text engine.
+
+    Must run after `OrderingFilter`: when the client does not pass
+    `?ordering=`, results are ordered by relevance first and the view's
+    default ordering second.
+    """
+
+    @classmethod
+    def ranks_by_relevance(cls, request):
+        """Whether `request` searches without `?ordering=`, i.e. wants relevance order."""
+        return (bool(tokenize(cls().get_search_terms(request)))
+                and not request.query_params.get(api_settings.ORDERING_PARAM))
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        tokens = tokenize(terms)
+        engine = get_search_engine(queryset.db) if tokens else None
+        if engine is None:
+            return super().filter_queryset(request, queryset, view)
+
+        queryset = engine.search(queryset, tokens)
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('-search_rank', *queryset.query.order_by)
+        return queryset
@@ -5,16 +5,22 @@ list representations for `Product`, plus serializers for `ProductImage`
 and `ProductReview` used by nested representations.
 """
 
+from django.db.models import DecimalField, F, Value
+from django.db.models.functions import Coalesce, NullIf
 from rest_framework import serializers
+from ecommerce_backend.images import SrcsetField, srcset_urls
+from ecommerce_backend.row_serializers import RowSerializer, decimal_string, file_url
 from .models import Product, ProductImage, ProductReview
 from categories.serializers import CategorySerializer, BrandSerializer
 from categories.models import Category, Brand
 
 class ProductImageSerializer(serializers.ModelSerializer):
-    """Serializer for `ProductImage` model."""
+    """Serializer for `ProductImage` model, with its resized renditions."""
+    srcset = SrcsetField()
+
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'alt_text', 'is_primary']
+        fields = ['id', 'image', 'srcset', 'alt_text', 'is_primary']
 
 class ProductReviewSerializer(serializers.ModelSerializer):
     """Serializer for `ProductReview` model.
@@ -29,17 +35,25 @@ class ProductReviewSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'rating', 'title', 'comment', 'is_approved', 'created_at']
         read_only_fields = ['user', 'is_approved']
 
+# Number of latest approved reviews embedded in the product detail payload;
+# the rest are served by the paginated reviews endpoint.
+DETAIL_REVIEW_LIMIT = 5
+
 class ProductSerializer(serializers.ModelSerializer):
     """Detailed serializer for `Product` including relations.
 
-    Includes nested `Category`, `Brand`, `images` and `reviews`.
-    Accepts `category_id`/`brand_id` for writes while keeping nested
+    Includes nested `Category`, `Brand`, `images`, the latest approved
+    `reviews` and precomputed rating aggregates. Accepts
+    `category_id`/`brand_id` for writes while keeping nested
     representations read-only.
     """
     category = CategorySerializer(read_only=True)
     brand = BrandSerializer(read_only=True)
     images = ProductImageSerializer(many=True, read_only=True)
-    reviews = ProductReviewSerializer(many=True, read_only=True)
+    reviews = serializers.SerializerMethodField()
+    average_rating = serializers.DecimalField(source='rating_avg', max_digits=3, decimal_places=2, read_only=True)
+    review_count = serializers.IntegerField(source='rating_count', read_only=True)
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(
         queryset=Category.objects.all(), source='category', write_only=True
     )
@@ -52,29 +66,125 @@ class ProductSerializer(serializers.ModelSerializer):
         model = Product
         fields = ['id', 'name', 'slug', 'sku', 'description', 'price', 'discounted_price',
                  'final_price', 'category', 'category_id', 'brand', 'brand_id',
-                 'stock_quantity', 'images', 'reviews', 'is_active', 'is_featured',
+                 'stock_quantity', 'images', 'average_rating', 'review_count',
+                 'rating_histogram', 'reviews', 'is_active', 'is_featured',
                  'created_at', 'updated_at']
         read_only_fields = ['slug', 'final_price']
 
+    def get_reviews(self, obj):
+        """Return the latest approved reviews.
+
+        Uses the `latest_reviews` list prefetched by the detail view when
+        available, otherwise queries them directly.
+        """
+        reviews = getattr(obj, 'latest_reviews', None)
+        if reviews is None:
+            reviews = (obj.reviews.filter(is_approved=True)
+                       .select_related('user')[:DETAIL_REVIEW_LIMIT])
+        return ProductReviewSerializer(reviews, many=True, context=self.context).data
+
 class ProductListSerializer(serializers.ModelSerializer):
     """Compact serializer used for product listing endpoints.
 
-    Exposes a `primary_image` helper field and lightweight
-    category/brand string fields for faster list responses.
+    Exposes `primary_image` (the original) and `primary_image_srcset`
+    (its renditions) helper fields and lightweight category/brand string
+    fields for faster list responses.
     """
     category = serializers.StringRelatedField()
     brand = serializers.StringRelatedField()
     primary_image = serializers.SerializerMethodField()
+    primary_image_srcset = serializers.SerializerMethodField()
     final_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     
     class Meta:
         model = Product
         fields = ['id', 'name', 'slug', 'sku', 'price', 'discounted_price', 'final_price',
-                 'category', 'brand', 'stock_quantity', 'primary_image', 'is_featured']
+                 'category', 'brand', 'stock_quantity', 'primary_image', 'primary_image_srcset',
+                 'is_featured',
+                 'rating_avg', 'rating_count']
     
+    def _primary_image(self, obj):
+        """Return the primary `ProductImage` or `None` if missing.
+
+        Uses the `primary_images` list attached by the list view's
+        filtered `Prefetch` when available, so rendering a page does not
+        issue one query per product.
+        """
+        if not hasattr(obj, 'primary_images'):
+            obj.primary_images = list(obj.images.filter(is_primary=True)[:1])
+        return obj.primary_images[0] if obj.primary_images else None
+
     def get_primary_image(self, obj):
         """Return the URL of the primary image or `None` if missing."""
-        primary_image = obj.images.filter(is_primary=True).first()
+        primary_image = self._primary_image(obj)
         if primary_image:
             return primary_image.image.url
         return None
+
+    def get_primary_image_srcset(self, obj):
+        """Return the primary image's rendition URLs keyed by width (`{}` until built)."""
+        primary_image = self._primary_image(obj)
+        return srcset_urls(primary_image.renditions, primary_image.image.name) if primary_image else {}
+
+
+class ProductListRowSerializer(RowSerializer):
+    """`ProductListSerializer` output built from `.values()` rows.
+
+    Category and brand names are joined in as columns and `final_price`
+    is computed in SQL (a zero discount counts as none, as in
+    `Product.final_price`). Primary images for the page are loaded in one
+    query by `prepare`.
+    """
+    columns = ('id', 'name', 'slug', 'sku', 'price', 'discounted_price', 'stock_quantity',
+               'is_featured', 'rating_avg', 'rating_count')
+    annotations = {
+        'category_name': F('category__name'),
+        'brand_name': F('brand__name'),
+        'final_price': Coalesce(NullIf('discounted_price', Value(0)), 'price',
+                                output_field=DecimalField(max_digits=10, decimal_places=2)),
+    }
+
+    def prepare(self, rows):
+        self.primary_images = {}
+        ids = [row['id'] for row in rows]
+        if not ids:
+            return
+        images = (ProductImage.objects.filter(product_id__in=ids, is_primary=True)
+                  .values_list('product_id', 'image', 'renditions'))
+        for product_id, image, renditions in images:
+            self.primary_images.setdefault(product_id, (image, renditions))
+
+    def to_representation(self, row):
+        image, renditions = self.primary_images.get(row['id'], (None, None))
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'slug': row['slug'],
+            'sku': row['sku'],
+            'price': decimal_string(row['price']),
+            'discounted_price': decimal_string(row['discounted_price']),
+            'final_price': decimal_string(row['final_price']),
+            'category': row['category_name'],
+            'brand': row['brand_name'],
+            'stock_quantity': row['stock_quantity'],
+            'primary_image': file_url(image),
+            'primary_image_srcset': srcset_urls(renditions, image),
+            'is_featured': row['is_featured'],
+            'rating_avg': decimal_string(row['rating_avg']),
+            'rating_count': row['rating_count'],
+        }
+
+
+class StockLineSerializer(serializers.Serializer):
+    """One `{sku, qty}` line of a stock reservation or release."""
+    sku = serializers.CharField(max_length=50)
+    qty = serializers.IntegerField(min_value=1)
+
+
+class StockBatchSerializer(serializers.Serializer):
+    """A batch of stock lines applied in one transaction.
+
+    With `allow_partial` false (the default) the batch is all-or-nothing.
+    """
+    lines = StockLineSerializer(many=True, allow_empty=False)
+    allow_partial = serializers.BooleanField(default=False)
@@ -0,0 +1,39 @@
+"""Signal receivers keeping `Product.rating_*` in sync with reviews."""
+
+from collections import Counter
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import ProductReview
+from .ratings import apply_rating_changes
+
+
+@receiver(pre_save, sender=ProductReview, dispatch_uid='products.review_pre_save')
+def remember_previous_rating(sender, instance, raw=False, **kwargs):
+    """Stash the stored rating/approval so `post_save` can diff against it."""
+    previous = None
+    if instance.pk and not raw:
+        previous = sender.objects.filter(pk=instance.pk).values(
+            'product_id', 'rating', 'is_approved'
+        ).first()
+    instance._previous_rating = previous
+
+
+@receiver(post_save, sender=ProductReview, dispatch_uid='products.review_post_save')
+def update_ratings_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    changes = Counter()
+    previous = getattr(instance, '_previous_rating', None)
+    if previous and previous['is_approved']:
+        changes[(previous['product_id'], previous['rating'])] -= 1
+    if instance.is_approved:
+        changes[(instance.product_id, instance.rating)] += 1
+    apply_rating_changes(changes)
+
+
+@receiver(post_delete, sender=ProductReview, dispatch_uid='products.review_post_delete')
+def update_ratings_on_delete(sender, instance, **kwargs):
+    if instance.is_approved:
+        apply_rating_changes({(instance.product_id, instance.rating): -1})
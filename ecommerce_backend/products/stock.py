@@ -0,0 +1,111 @@
+"""Atomic stock reservation and release by SKU.
+
+Each line is applied as a single conditional UPDATE
+(`stock_quantity = stock_quantity - qty WHERE stock_quantity >= qty`),
+so the check and the decrement happen in one statement on the database
+and concurrent checkouts can never oversell, on SQLite or Postgres,
+without a read-modify-write in Python. Lines are applied in SKU order so
+two overlapping batches always take row locks in the same order.
+
+SQLite has no row locks and (before Django 5.1) no `BEGIN IMMEDIATE`:
+a second writer fails fast with "database is locked" instead of
+waiting, so on SQLite a batch that is not nested in an outer
+transaction is retried with a short backoff.
+"""
+
+import random
+import time
+
+from django.db import OperationalError, connections, router, transaction
+from django.db.models import F
+
+from ecommerce_backend.response_cache import bump_version
+from .models import Product
+
+RESERVED = 'reserved'
+RELEASED = 'released'
+INSUFFICIENT_STOCK = 'insufficient_stock'
+NOT_FOUND = 'not_found'
+ROLLED_BACK = 'rolled_back'
+
+
+SQLITE_LOCK_RETRIES = 50
+
+
+class _Rollback(Exception):
+    def __init__(self, stock):
+        self.stock = stock
+
+
+def _apply(lines, reserve, allow_partial):
+    connection = connections[router.db_for_write(Product)]
+    retry = connection.vendor == 'sqlite' and not connection.in_atomic_block
+    for attempt in range(SQLITE_LOCK_RETRIES if retry else 1):
+        try:
+            results, stock = _apply_atomic(lines, reserve, allow_partial)
+            break
+        except OperationalError as exc:
+            if not retry or 'locked' not in str(exc) or attempt == SQLITE_LOCK_RETRIES - 1:
+                raise
+            time.sleep(random.uniform(0.005, 0.02) * (attempt + 1))
+
+    if any(result in (RESERVED, RELEASED) for result in results):
+        bump_version(Product)
+    return [
+        {'sku': line['sku'], 'qty': line['qty'], 'status': result, 'ok': result in (RESERVED, RELEASED),
+         'stock_quantity': stock.get(line['sku'])}
+        for line, result in zip(lines, results)
+    ]
+
+
+def _apply_atomic(lines, reserve, allow_partial):
+    """Apply every line in one transaction; return `(statuses, stock_by_sku)`.
+
+    Nothing is read or written outside the transaction, so a retried
+    attempt can never apply a line twice.
+    """
+    results = [None] * len(lines)
+    applied = {}
+    # Process in SKU order for a consistent lock order; report in request order.
+    order = sorted(range(len(lines)), key=lambda index: lines[index]['sku'])
+    try:
+        with transaction.atomic():
+            for index in order:
+                sku, qty = lines[index]['sku'], lines[index]['qty']
+                delta = -qty if reserve else qty
+                products = Product.objects.filter(sku=sku, is_active=True)
+                if reserve:
+                    products_with_stock = products.filter(stock_quantity__gte=qty)
+                else:
+                    products_with_stock = products
+                if products_with_stock.update(stock_quantity=F('stock_quantity') + delta):
+                    results[index] = RESERVED if reserve else RELEASED
+                    applied[sku] = applied.get(sku, 0) + delta
+                elif reserve and products.exists():
+                    results[index] = INSUFFICIENT_STOCK
+                else:
+                    results[index] = NOT_FOUND
+            stock = dict(
+                Product.objects.filter(sku__in={line['sku'] for line in lines}).values_list('sku', 'stock_quantity')
+            )
+            if not allow_partial and any(result not in (RESERVED, RELEASED) for result in results):
+                raise _Rollback(stock)
+    except _Rollback as rollback:
+        stock = {sku: value - applied.get(sku, 0) for sku, value in rollback.stock.items()}
+        results = [result if result in (INSUFFICIENT_STOCK, NOT_FOUND) else ROLLED_BACK for result in results]
+    return results, stock
+
+
+def reserve_stock(lines, allow_partial=False):
+    """Decrement stock for `[{'sku', 'qty'}, ...]` and return per-line results.
+
+    By default the batch is all-or-nothing: if any line cannot be
+    reserved, nothing is. With `allow_partial` the lines that fit are
+    kept.
+    """
+    return _apply(lines, reserve=True, allow_partial=allow_partial)
+
+
+def release_stock(lines, allow_partial=False):
+    """Return previously reserved stock; the inverse of `reserve_stock`."""
+    return _apply(lines, reserve=False, allow_partial=allow_partial)
@@ -1,10 +1,64 @@
-from rest_framework.test import APITestCase
+import gzip
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.admin.sites import AdminSite
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+from PIL import Image
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
-from users.models import User
-from categories.models import Category
-from products.models import Product
+from ecommerce_backend import api_schema, images, response_cache
+from ecommerce_backend.instrumentation import BudgetExceeded
+from ecommerce_backend.renderers import FastJSONParser, FastJSONRenderer
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from users.models import User, UserProfile
+from categories.models import Brand, Category
+from categories.views import AsyncCategoryListView
+from products.admin import ProductReviewAdmin
+from products.importer import ProductImporter
+from products.models import Product, ProductImage, ProductReview
+from products.ratings import recompute_ratings
+from products.serializers import ProductListSerializer
+from products.views import AsyncProductDetailView, AsyncProductListView
+
+
+def explain(sql):
+	"""The query plan for `sql`, one line per node."""
+	with connection.cursor() as cursor:
+		if connection.vendor == 'postgresql':
+			# Tiny test tables make sequential scans cheapest; only fall
+			# back to one when no index fits.
+			cursor.execute('SET LOCAL enable_seqscan = off')
+			cursor.execute('EXPLAIN ' + sql)
+			return '\n'.join(row[0] for row in cursor.fetchall())
+		cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+		return '\n'.join(row[-1] for row in cursor.fetchall())
+
 
+def full_scans(plan):
+	"""Plan lines reading every row of the product table."""
+	return [line for line in plan.splitlines()
+			if re.search(r'Seq Scan on products_product\b|^SCAN (TABLE )?products_product$', line.strip())]
 
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)
 class ProductIntegrationTests(APITestCase):
 	def setUp(self):
 		# Create admin user
@@ -17,6 +71,8 @@ class ProductIntegrationTests(APITestCase):
 
 		self.create_url = '/api/products/create/'
 		self.list_url = '/api/products/'
+		# Cache versions are bumped on commit, which never happens in these tests.
+		cache.clear()
 
 	def obtain_token_for_user(self, email, password):
 		resp = self.client.post('/api/users/login/', {'email': email, 'password': password}, format='json')
@@ -69,3 +125,709 @@ class ProductIntegrationTests(APITestCase):
 		}
 		resp = self.client.post(self.create_url, payload, format='json')
 		self.assertIn(resp.status_code, (status.HTTP_403_FORBIDDEN, status.HTTP_401_UNAUTHORIZED))
+
+	def test_cursor_pagination_walks_every_product_once_for_each_ordering(self):
+		# Duplicate prices/names force the `id` tie-breaker to do its job.
+		for i in range(25):
+			Product.objects.create(
+				name=f'Item {i % 5}', slug=f'item-{i}', sku=f'ITEM{i}',
+				description='desc', price=f'{i % 3}.00', category=self.category, stock_quantity=1
+			)
+		expected_ids = set(Product.objects.values_list('id', flat=True))
+
+		for ordering in ('price', '-price', 'created_at', '-created_at', 'name', '-name'):
+			seen = []
+			url = f'{self.list_url}?pagination=cursor&page_size=7&ordering={ordering}'
+			pages = []
+			while url:
+				resp = self.client.get(url)
+				self.assertEqual(resp.status_code, status.HTTP_200_OK)
+				self.assertNotIn('count', resp.data)
+				pages.append(resp.data)
+				seen.extend(item['id'] for item in resp.data['results'])
+				url = resp.data['next']
+			self.assertEqual(len(seen), len(expected_ids), ordering)
+			self.assertEqual(set(seen), expected_ids, ordering)
+
+			# Following `previous` from the last page returns the prior page.
+			prev = self.client.get(pages[-1]['previous'])
+			self.assertEqual(
+				[item['id'] for item in prev.data['results']],
+				[item['id'] for item in pages[-2]['results']],
+				ordering,
+			)
+
+	def test_cursor_pagination_walks_non_terminating_rating_averages_once(self):
+		# 13/3, 4/3 and 33/8 (a rounding tie) do not fit the two decimals stored.
+		scores = [[5, 4, 4], [5, 5, 3], [1, 1, 2], [2, 1, 1], [5, 4, 4, 4, 4, 4, 4, 4], [4, 5, 4]]
+		reviewers = [User.objects.create_user(email=f'c{i}@example.com', username=f'c{i}', password='pw')
+					 for i in range(8)]
+		for i, ratings in enumerate(scores):
+			product = Product.objects.create(
+				name=f'Avg {i}', slug=f'avg-{i}', sku=f'AVG{i}', description='desc',
+				price='2.00', category=self.category, stock_quantity=1
+			)
+			for reviewer, rating in zip(reviewers, ratings):
+				ProductReview.objects.create(
+					product=product, user=reviewer, rating=rating, title='t', comment='c', is_approved=True
+				)
+		for ordering in ('rating_avg', '-rating_avg'):
+			seen = []
+			url = f'{self.list_url}?pagination=cursor&page_size=2&ordering={ordering}'
+			while url:
+				page = self.client.get(url).json()
+				seen.extend(item['slug'] for item in page['results'])
+				url = page['next'] if len(seen) <= len(scores) else None
+			self.assertEqual(sorted(seen), [f'avg-{i}' for i in range(len(scores))], ordering)
+
+		incremental = dict(Product.objects.values_list('slug', 'rating_avg'))
+		self.assertEqual((incremental['avg-0'], incremental['avg-4']), (Decimal('4.33'), Decimal('4.13')))
+		recompute_ratings()
+		self.assertEqual(dict(Product.objects.values_list('slug', 'rating_avg')), incremental)
+
+	def test_cursor_pagination_count_is_opt_in(self):
+		resp = self.client.get(self.list_url + '?pagination=cursor&with_count=true')
+		self.assertEqual(resp.status_code, status.HTTP_200_OK)
+		self.assertEqual(resp.data['count'], 0)
+
+		resp = self.client.get(self.list_url + '?cursor=not-a-cursor')
+		self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+	def test_list_query_count_is_constant_regardless_of_page_size(self):
+		for i in range(30):
+			product = Product.objects.create(
+				name=f'Pic {i}', slug=f'pic-{i}', sku=f'PIC{i}',
+				description='desc', price='3.00', category=self.category, stock_quantity=1
+			)
+			ProductImage.objects.create(product=product, image=f'products/pic-{i}.jpg', is_primary=True)
+			ProductImage.objects.create(product=product, image=f'products/pic-{i}-alt.jpg')
+
+		# count + page + one batched primary image prefetch
+		with self.assertNumQueries(3):
+			small = self.client.get(self.list_url + '?page_size=5')
+		with self.assertNumQueries(3):
+			large = self.client.get(self.list_url + '?page_size=30')
+		self.assertEqual(len(small.data['results']), 5)
+		self.assertEqual(len(large.data['results']), 30)
+		for item in large.data['results']:
+			self.assertEqual(item['primary_image'], f"/media/products/{item['slug']}.jpg")
+
+	@override_settings(PRODUCT_SEARCH_ENGINE='auto')
+	def test_search_matches_prefixes_ranks_by_relevance_and_tracks_updates(self):
+		def make(slug, name, description, sku):
+			return Product.objects.create(
+				name=name, slug=slug, sku=sku, description=description,
+				price='1.00', category=self.category, stock_quantity=1
+			)
+		# Created before the weaker match, so relevance must beat -created_at.
+		galaxy = make('galaxy', 'Samsung Galaxy S24', 'Galaxy phone, galaxy camera', 'GALS24-256')
+		make('case', 'Phone case', 'Fits the Galaxy S24', 'CASE-1')
+		make('laptop', 'Dell XPS 13', 'Laptop', 'DELL-XPS13')
+
+		resp = self.client.get(self.list_url + '?search=galax')
+		self.assertEqual([item['slug'] for item in resp.data['results']], ['galaxy', 'case'])
+
+		resp = self.client.get(self.list_url + '?search=gals24')
+		self.assertEqual([item['slug'] for item in resp.data['results']], ['galaxy'])
+
+		# Explicit ordering wins over relevance.
+		resp = self.client.get(self.list_url + '?search=galaxy&ordering=name')
+		self.assertEqual([item['slug'] for item in resp.data['results']], ['case', 'galaxy'])
+
+		# A keyset cannot follow relevance, so ranked searches keep page numbers.
+		resp = self.client.get(self.list_url + '?search=galax&pagination=cursor&page_size=1')
+		self.assertEqual(([item['slug'] for item in resp.data['results']], resp.data['count']), (['galaxy'], 2))
+		self.assertIn('page=2', resp.data['next'])
+		resp = self.client.get(self.list_url + '?search=galax&ordering=name&pagination=cursor')
+		self.assertEqual([item['slug'] for item in resp.data['results']], ['case', 'galaxy'])
+		self.assertNotIn('count', resp.data)
+
+		galaxy.name = 'Renamed handset'
+		galaxy.description = 'No longer matching'
+		galaxy.save()
+		resp = self.client.get(self.list_url + '?search=galaxy')
+		self.assertEqual([item['slug'] for item in resp.data['results']], ['case'])
+
+		with override_settings(PRODUCT_SEARCH_ENGINE='basic'):
+			resp = self.client.get(self.list_url + '?search=XPS1')
+		self.assertEqual([item['slug'] for item in resp.data['results']], ['laptop'])
+
+	def test_anonymous_list_is_cached_until_catalog_changes(self):
+		product = Product.objects.create(
+			name='Cached', slug='cached', sku='CACHED1', description='desc',
+			price='2.00', category=self.category, stock_quantity=1
+		)
+		first = self.client.get(self.list_url)
+		self.assertEqual(first['X-Cache'], 'MISS')
+
+		with self.assertNumQueries(0):
+			second = self.client.get(self.list_url)
+		self.assertEqual(second['X-Cache'], 'HIT')
+		self.assertEqual(second.content, first.content)
+
+		not_modified = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=first['ETag'])
+		self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+		versions = response_cache.get_versions([Product])
+		with self.captureOnCommitCallbacks(execute=True):
+			product.price = '3.00'
+			product.save()
+			# Not bumped before commit, or readers could cache the old payload under the new version.
+			self.assertEqual(response_cache.get_versions([Product]), versions)
+		self.assertNotEqual(response_cache.get_versions([Product]), versions)
+		third = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=first['ETag'])
+		self.assertEqual(third.status_code, status.HTTP_200_OK)
+		self.assertEqual(third['X-Cache'], 'MISS')
+		self.assertEqual(third.json()['results'][0]['price'], '3.00')
+
+		# Versions in a per-process cache do not reach the other workers.
+		self.assertEqual([w.id for w in response_cache.check_shared_cache(None)], ['response_cache.W001'])
+		with override_settings(RESPONSE_CACHE_ENABLED=False):
+			self.assertEqual(response_cache.check_shared_cache(None), [])
+
+	def test_detail_embeds_latest_approved_reviews_and_maintained_aggregates(self):
+		product = Product.objects.create(
+			name='Rated', slug='rated', sku='RATED1', description='desc',
+			price='2.00', category=self.category, stock_quantity=1
+		)
+		ratings = [5, 4, 4, 2, 5, 5, 1]
+		for i, rating in enumerate(ratings):
+			reviewer = User.objects.create_user(email=f'r{i}@example.com', username=f'r{i}', password='pw')
+			ProductReview.objects.create(
+				product=product, user=reviewer, rating=rating, title=f'Review {i}', comment='ok'
+			)
+
+		# Nothing is approved yet.
+		resp = self.client.get('/api/products/rated/')
+		self.assertEqual(resp.data['review_count'], 0)
+		self.assertEqual(resp.data['reviews'], [])
+
+		admin = ProductReviewAdmin(ProductReview, AdminSite())
+		with self.captureOnCommitCallbacks(execute=True):
+			admin.approve_reviews(None, ProductReview.objects.exclude(rating=1))
+		unapproved = ProductReview.objects.get(rating=1)
+
+		# product + images + latest reviews (with users) + category children
+		with self.assertNumQueries(4):
+			resp = self.client.get('/api/products/rated/')
+		self.assertEqual(resp.data['review_count'], 6)
+		self.assertEqual(resp.data['average_rating'], '4.17')
+		self.assertEqual(resp.data['rating_histogram'], {'1': 0, '2': 1, '3': 0, '4': 2, '5': 3})
+		self.assertEqual(len(resp.data['reviews']), 5)
+		self.assertNotIn(unapproved.id, [review['id'] for review in resp.data['reviews']])
+
+		# Deleting and re-rating approved reviews keeps the aggregates in sync.
+		ProductReview.objects.filter(rating=2).delete()
+		review = ProductReview.objects.filter(rating=4).first()
+		review.rating = 3
+		review.save()
+		product.refresh_from_db()
+		self.assertEqual((product.rating_count, product.rating_sum), (5, 22))
+		self.assertEqual(product.rating_histogram, {'1': 0, '2': 0, '3': 1, '4': 1, '5': 3})
+
+		resp = self.client.get('/api/products/rated/reviews/?page_size=4')
+		self.assertEqual(resp.data['count'], 5)
+		self.assertEqual(len(resp.data['results']), 4)
+		self.assertIsNotNone(resp.data['next'])
+
+	def test_list_orders_and_filters_by_rating_and_command_repairs_drift(self):
+		scores = {'low': [1, 2], 'mid': [3, 4], 'high': [5, 5, 4]}
+		for slug, ratings in scores.items():
+			product = Product.objects.create(
+				name=slug, slug=slug, sku=slug.upper(), description='desc',
+				price='2.00', category=self.category, stock_quantity=1
+			)
+			for i, rating in enumerate(ratings):
+				reviewer, _ = User.objects.get_or_create(email=f'v{i}@example.com', username=f'v{i}')
+				ProductReview.objects.create(
+					product=product, user=reviewer, rating=rating, title='t', comment='c', is_approved=True
+				)
+
+		resp = self.client.get(self.list_url + '?ordering=-rating_avg')
+		self.assertEqual([item['slug'] for item in resp.data['results']], ['high', 'mid', 'low'])
+		self.assertEqual(resp.data['results'][0]['rating_avg'], '4.67')
+		self.assertEqual(resp.data['results'][0]['rating_count'], 3)
+
+		resp = self.client.get(self.list_url + '?min_rating=3.5')
+		self.assertEqual({item['slug'] for item in resp.data['results']}, {'high', 'mid'})
+		for query in ('?min_rating=abc', '?min_price=abc', '?max_price=NaN'):
+			resp = self.client.get(self.list_url + query)
+			self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, query)
+
+		# Bulk writes that bypass signals leave drift for the command to fix.
+		Product.objects.update(rating_count=0, rating_sum=0, rating_avg=0)
+		call_command('recompute_ratings', stdout=StringIO())
+		high = Product.objects.get(slug='high')
+		self.assertEqual((high.rating_count, high.rating_sum, str(high.rating_avg)), (3, 14, '4.67'))
+		self.assertEqual(high.rating_histogram['5'], 2)
+
+	def test_bulk_import_upserts_by_sku_and_reports_bad_rows(self):
+		Product.objects.create(
+			name='Existing', slug='existing', sku='EXIST1', description='old',
+			price='1.00', category=self.category, stock_quantity=1
+		)
+		lines = [
+			{'sku': 'EXIST1', 'name': 'Existing v2', 'price': '2.50', 'category': 'test-cat', 'stock_quantity': 7},
+			{'sku': 'NEW1', 'name': 'New one', 'price': '3.00', 'category': 'test-cat'},
+			{'sku': 'NEW2', 'name': 'Bad price', 'price': '-1'},
+			{'sku': 'NEW3', 'name': 'Bad category', 'price': '1.00', 'category': 'nope'},
+			{'sku': 'NEW1', 'name': 'New one (later row wins)', 'price': '4.00', 'category': 'test-cat'},
+		]
+		body = '\n'.join(json.dumps(line) for line in lines) + '\nnot json\n'
+
+		access, _ = self.obtain_token_for_user('admin@example.com', 'adminpass')
+		self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+		resp = self.client.post('/api/products/import/?batch_size=2', body, content_type='application/x-ndjson')
+		self.assertEqual(resp.status_code, status.HTTP_200_OK)
+		self.assertEqual(
+			{key: resp.data[key] for key in ('processed', 'created', 'updated', 'failed')},
+			{'processed': 6, 'created': 1, 'updated': 2, 'failed': 3},
+		)
+		self.assertEqual(sorted(error['line'] for error in resp.data['errors']), [3, 4, 6])
+
+		existing = Product.objects.get(sku='EXIST1')
+		self.assertEqual((existing.name, existing.slug, existing.stock_quantity), ('Existing v2', 'existing', 7))
+		self.assertEqual(Product.objects.get(sku='NEW1').name, 'New one (later row wins)')
+
+		with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as feed:
+			feed.write('sku,name,price,category,is_featured\nCSV1,From csv,9.99,test-cat,yes\n')
+		self.addCleanup(os.remove, feed.name)
+		call_command('import_products', feed.name, stdout=StringIO(), stderr=StringIO())
+		self.assertTrue(Product.objects.get(sku='CSV1').is_featured)
+
+	def test_bulk_import_only_overwrites_the_columns_a_row_carries(self):
+		brand = Brand.objects.create(name='Acme', slug='acme')
+		Product.objects.create(
+			name='Delisted', slug='delisted', sku='PART1', description='keep me', price='5.00',
+			category=self.category, brand=brand, stock_quantity=12, is_active=False, is_featured=True,
+		)
+		report = ProductImporter().run(enumerate([
+			{'sku': 'PART1', 'name': 'Delisted', 'price': '6.00'},
+			{'sku': 'PART2', 'name': 'Full row', 'price': '1.00', 'stock_quantity': 3, 'category': 'test-cat'},
+		], start=1))
+		self.assertEqual((report['created'], report['updated'], report['failed']), (1, 1, 0))
+		product = Product.objects.get(sku='PART1')
+		self.assertEqual(
+			(product.price, product.stock_quantity, product.description, product.category_id,
+			 product.brand_id, product.is_active, product.is_featured),
+			(Decimal('6.00'), 12, 'keep me', self.category.id, brand.id, False, True),
+		)
+		self.assertEqual(Product.objects.get(sku='PART2').stock_quantity, 3)
+
+		with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as feed:
+			feed.write('sku,name,price,stock_quantity\nPART1,Delisted,7.00,4\n')
+		self.addCleanup(os.remove, feed.name)
+		call_command('import_products', feed.name, stdout=StringIO(), stderr=StringIO())
+		product.refresh_from_db()
+		self.assertEqual((product.price, product.stock_quantity, product.is_active), (Decimal('7.00'), 4, False))
+
+	def test_admin_export_streams_filtered_catalog_as_ndjson_and_csv(self):
+		for i in range(5):
+			Product.objects.create(
+				name=f'Export {i}', slug=f'export-{i}', sku=f'EXP{i}', description='desc',
+				price=f'{i + 1}.00', category=self.category, stock_quantity=1, is_active=i != 4
+			)
+		Product.objects.filter(sku__in=['EXP0', 'EXP1']).update(updated_at='2020-01-01T00:00:00Z')
+		url = '/api/products/export/'
+
+		access, _ = self.obtain_token_for_user('user@example.com', 'userpass')
+		self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+		self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+		access, _ = self.obtain_token_for_user('admin@example.com', 'adminpass')
+		self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+		resp = self.client.get(url + '?min_price=2', HTTP_ACCEPT='text/csv')
+		self.assertEqual(resp.status_code, status.HTTP_200_OK)
+		self.assertTrue(resp.streaming)
+		rows = [json.loads(line) for line in b''.join(resp.streaming_content).decode().splitlines()]
+		self.assertEqual([row['sku'] for row in rows], ['EXP1', 'EXP2', 'EXP3'])
+		self.assertEqual((rows[0]['category'], rows[0]['final_price']), ('test-cat', '2.00'))
+
+		resp = self.client.get(url + '?output=csv&updated_since=2021-01-01&search=export')
+		lines = b''.join(resp.streaming_content).decode().splitlines()
+		self.assertEqual(resp['Content-Type'], 'text/csv; charset=utf-8')
+		self.assertTrue(lines[0].startswith('id,sku,slug,name'))
+		self.assertEqual(sorted(line.split(',')[1] for line in lines[1:]), ['EXP2', 'EXP3'])
+
+		for value in ('yesterday', '2021-13-45', '2021-02-30T10:00:00'):
+			self.assertEqual(self.client.get(url + f'?updated_since={value}').status_code, status.HTTP_400_BAD_REQUEST)
+
+	def test_stock_batch_is_all_or_nothing_unless_partial(self):
+		Product.objects.create(name='A', slug='a', sku='A1', description='d', price='1.00', category=self.category, stock_quantity=5)
+		Product.objects.create(name='B', slug='b', sku='B1', description='d', price='1.00', category=self.category, stock_quantity=1)
+		url = '/api/products/stock/reserve/'
+		lines = [{'sku': 'B1', 'qty': 2}, {'sku': 'A1', 'qty': 3}, {'sku': 'NOPE', 'qty': 1}]
+
+		self.client.force_authenticate(self.user)
+		self.assertEqual(self.client.post(url, {'lines': lines}, format='json').status_code, status.HTTP_403_FORBIDDEN)
+
+		self.client.force_authenticate(self.admin)
+		resp = self.client.post(url, {'lines': lines}, format='json')
+		self.assertEqual(resp.status_code, status.HTTP_409_CONFLICT)
+		self.assertEqual([line['status'] for line in resp.data['lines']], ['insufficient_stock', 'rolled_back', 'not_found'])
+		self.assertEqual(Product.objects.get(sku='A1').stock_quantity, 5)
+
+		resp = self.client.post(url, {'lines': lines, 'allow_partial': True}, format='json')
+		self.assertEqual([line['ok'] for line in resp.data['lines']], [False, True, False])
+		self.assertEqual(resp.data['lines'][1]['stock_quantity'], 2)
+
+		resp = self.client.post('/api/products/stock/release/', {'lines': [{'sku': 'A1', 'qty': 3}]}, format='json')
+		self.assertEqual(resp.status_code, status.HTTP_200_OK)
+		self.assertEqual(Product.objects.get(sku='A1').stock_quantity, 5)
+		self.assertEqual(self.client.post(url, {'lines': [{'sku': 'A1', 'qty': 0}]}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+
+
+	@override_settings(SERVER_TIMING_ENABLED=True, REQUEST_BUDGETS_ENFORCE=True)
+	def test_requests_report_server_timing_metrics_and_enforce_budgets(self):
+		Product.objects.create(name='P', slug='p', sku='P1', description='d', price='1.00', category=self.category, stock_quantity=1)
+		resp = self.client.get(self.list_url + '?page_size=5')
+		self.assertRegex(resp['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", serializer;dur=[\d.]+, total;dur=[\d.]+$')
+
+		self.client.force_authenticate(self.admin)
+		metrics = self.client.get('/api/metrics/').data
+		self.assertGreaterEqual(metrics['routes']['product-list']['count'], 1)
+		self.assertEqual(
+			sum(metrics['routes']['product-list']['metrics']['queries']['histogram'].values()),
+			metrics['routes']['product-list']['count'],
+		)
+
+		with override_settings(REQUEST_BUDGETS={'product-list': {'queries': 0}}):
+			with self.assertRaisesMessage(BudgetExceeded, 'product-list'):
+				self.client.get(self.list_url + '?page_size=6')
+
+	def test_generate_catalog_is_reproducible_with_consistent_aggregates(self):
+		options = dict(products=60, users=20, brands=3, depth=3, branching=2, seed=5, stdout=StringIO())
+		call_command('generate_catalog', **options)
+		generated = Product.objects.filter(sku__startswith='GEN-')
+		snapshot = list(generated.order_by('sku').values_list('sku', 'name', 'price', 'rating_count', 'rating_avg'))
+		self.assertEqual(len(snapshot), 60)
+		self.assertEqual(ProductImage.objects.filter(product__in=generated, is_primary=True).count(), 60)
+
+		root = Category.objects.get(slug='gen-cat-0')
+		self.assertEqual(Category.objects.descendants_of([root]).count(), 2 + 4)
+
+		call_command('recompute_ratings', stdout=StringIO())
+		self.assertEqual(
+			list(generated.order_by('sku').values_list('sku', 'name', 'price', 'rating_count', 'rating_avg')), snapshot
+		)
+		# Generated users who logged in, out and saved a profile own
+		# token and profile rows that `--reset` must clear first.
+		login = self.client.post('/api/users/login/', {'email': 'gen-user-0@example.com', 'password': 'password123'},
+								 format='json')
+		self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {login.data["access"]}')
+		self.client.post('/api/users/logout/', {'refresh': login.data['refresh']}, format='json')
+		UserProfile.objects.create(user=User.objects.get(email='gen-user-0@example.com'))
+		self.client.credentials()
+		self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+		call_command('generate_catalog', reset=True, **options)
+		self.assertFalse(OutstandingToken.objects.filter(user__username__startswith='gen-user-').exists())
+		self.assertEqual(
+			list(generated.order_by('sku').values_list('sku', 'name', 'price', 'rating_count', 'rating_avg')), snapshot
+		)
+
+	def test_async_catalog_views_match_sync_views_and_share_their_cache(self):
+		Category.objects.create(name='Child Cat', slug='child-cat', parent=self.category)
+		for i in range(3):
+			product = Product.objects.create(
+				name=f'Async {i}', slug=f'async-{i}', sku=f'ASYNC{i}', description='desc',
+				price=f'{i + 1}.00', category=self.category, stock_quantity=1
+			)
+			ProductImage.objects.create(product=product, image=f'products/async-{i}.jpg', is_primary=True)
+		factory = RequestFactory()
+
+		def call(view_class, path, **kwargs):
+			return async_to_sync(view_class.as_view())(factory.get(path), **kwargs)
+
+		cases = [
+			(AsyncProductListView, '/api/products/?page_size=2&ordering=-price&min_price=1.5', {}),
+			(AsyncProductListView, '/api/products/?page=9', {}),
+			(AsyncProductDetailView, '/api/products/async-1/', {'slug': 'async-1'}),
+			(AsyncProductDetailView, '/api/products/missing/', {'slug': 'missing'}),
+			(AsyncCategoryListView, '/api/categories/', {}),
+		]
+		with override_settings(RESPONSE_CACHE_ENABLED=False):
+			for view_class, path, kwargs in cases:
+				expected = self.client.get(path)
+				actual = call(view_class, path, **kwargs)
+				self.assertEqual((actual.status_code, actual.content), (expected.status_code, expected.content), path)
+
+		# Entries written by the async path are served by the sync view.
+		self.assertEqual(call(AsyncProductListView, self.list_url)['X-Cache'], 'MISS')
+		with self.assertNumQueries(0):
+			self.assertEqual(call(AsyncProductListView, self.list_url)['X-Cache'], 'HIT')
+		self.assertEqual(self.client.get(self.list_url)['X-Cache'], 'HIT')
+
+		# Keyset paging is delegated to the sync view.
+		resp = call(AsyncProductListView, self.list_url + '?pagination=cursor&page_size=2')
+		self.assertIn('next', json.loads(resp.content))
+
+	def test_uploads_get_resized_renditions_listed_in_srcset(self):
+		def upload(name, size, image_format):
+			buffer = BytesIO()
+			Image.new('RGB', size, (200, 30, 30)).save(buffer, image_format)
+			return SimpleUploadedFile(name, buffer.getvalue())
+
+		media = tempfile.TemporaryDirectory()
+		self.addCleanup(media.cleanup)
+		product = Product.objects.create(
+			name='Pictured', slug='pictured', sku='PIC1', description='desc',
+			price='5.00', category=self.category, stock_quantity=1
+		)
+		with override_settings(MEDIA_ROOT=media.name, IMAGE_PROCESSING_THREADS=0,
+							   IMAGE_RENDITION_WIDTHS=[160, 320, 640, 1280]):
+			with self.captureOnCommitCallbacks(execute=True):
+				image = ProductImage.objects.create(product=product, image=upload('shot.jpg', (800, 600), 'JPEG'), is_primary=True)
+			image.refresh_from_db()
+			self.assertEqual(image.renditions['source'], image.image.name)
+			self.assertEqual(list(image.renditions['srcset']), ['160w', '320w', '640w'])
+			with Image.open(os.path.join(media.name, image.renditions['srcset']['320w'])) as rendition:
+				self.assertEqual((rendition.format, rendition.size), ('WEBP', (320, 240)))
+
+			resp = self.client.get(self.list_url)
+			listed = resp.data['results'][0]
+			self.assertEqual(listed['primary_image_srcset']['160w'], '/media/' + image.renditions['srcset']['160w'])
+			detail = self.client.get(f'/api/products/{product.slug}/').data
+			self.assertEqual(detail['images'][0]['srcset']['640w'],
+							 'http://testserver/media/' + image.renditions['srcset']['640w'])
+
+			# Same stem, other extension: separate renditions, nothing overwritten.
+			other = Product.objects.create(
+				name='Other', slug='other', sku='PIC2', description='desc',
+				price='5.00', category=self.category, stock_quantity=1
+			)
+			with self.captureOnCommitCallbacks(execute=True):
+				twin = ProductImage.objects.create(product=other, image=upload('shot.png', (400, 300), 'PNG'))
+			twin.refresh_from_db()
+			self.assertFalse(set(twin.renditions['srcset'].values()) & set(image.renditions['srcset'].values()))
+			with Image.open(os.path.join(media.name, image.renditions['srcset']['160w'])) as rendition:
+				self.assertEqual(rendition.size, (160, 120))
+
+			# Replacing the file rebuilds; small images are not scaled up.
+			image.image = upload('icon.png', (100, 80), 'PNG')
+			with self.captureOnCommitCallbacks(execute=True):
+				image.save()
+			image.refresh_from_db()
+			self.assertEqual(list(image.renditions['srcset']), ['100w'])
+
+			# Until the background job has rebuilt them, the old image's
+			# renditions are not served for the new file.
+			image.image = upload('next.jpg', (700, 500), 'JPEG')
+			with override_settings(IMAGE_PROCESSING_THREADS=1), mock.patch.object(images.pool, 'submit') as submit:
+				with self.captureOnCommitCallbacks(execute=True):
+					image.save()
+			self.assertEqual(submit.call_count, 1)
+			listed = self.client.get(self.list_url + '?search=Pictured').data['results'][0]
+			self.assertEqual((listed['primary_image'], listed['primary_image_srcset']), ('/media/products/next.jpg', {}))
+			self.assertEqual(self.client.get(f'/api/products/{product.slug}/').data['images'][0]['srcset'], {})
+			with self.captureOnCommitCallbacks(execute=True):
+				submit.call_args.args[0](*submit.call_args.args[1:])
+			listed = self.client.get(self.list_url + '?search=Pictured').data['results'][0]
+			self.assertEqual(list(listed['primary_image_srcset']), ['160w', '320w', '640w'])
+
+			# Rows written without signals are picked up by the backfill.
+			ProductImage.objects.filter(pk=image.pk).update(renditions={})
+			call_command('generate_renditions', model=['products.ProductImage'], workers=2, stdout=StringIO())
+			image.refresh_from_db()
+			self.assertEqual(image.renditions['source'], image.image.name)
+			self.assertEqual(list(image.renditions['srcset']), ['160w', '320w', '640w'])
+
+	def test_row_serializer_matches_product_list_serializer(self):
+		brand = Brand.objects.create(name='Acme', slug='acme')
+		rows = [
+			('Plain', '10.00', None, None),
+			('Discounted', '20.00', '15.50', brand),
+			('Zero discount', '7.25', '0.00', brand),
+			('Whole', '3', None, None),
+		]
+		for i, (name, price, discounted, product_brand) in enumerate(rows):
+			product = Product.objects.create(
+				name=name, slug=f'row-{i}', sku=f'ROW{i}', description='desc', price=price,
+				discounted_price=discounted, category=self.category, brand=product_brand, stock_quantity=i
+			)
+			if i % 2:
+				ProductImage.objects.create(product=product, image=f'products/row-{i}.jpg', is_primary=True,
+											renditions={'source': f'products/row-{i}.jpg',
+														'srcset': {'160w': f'renditions/products/row-{i}.jpg/160w.webp'}})
+			ProductImage.objects.create(product=product, image=f'products/row-{i}-side.jpg')
+		Product.objects.filter(slug='row-3').update(rating_avg='4.5', rating_count=2)
+
+		with override_settings(RESPONSE_CACHE_ENABLED=False):
+			for query in ('', '?ordering=price', '?pagination=cursor&page_size=3'):
+				resp = self.client.get(self.list_url + query)
+				self.assertEqual(resp.status_code, 200)
+				results = json.loads(resp.content)['results']
+				products = {product.pk: product for product in Product.objects.all()}
+				expected = ProductListSerializer([products[row['id']] for row in results], many=True).data
+				self.assertEqual(results, json.loads(json.dumps(expected)), query)
+				self.assertEqual(len(results), 3 if 'cursor' in query else 4)
+
+			# Keyset cursors are built from the rows.
+			next_page = self.client.get(json.loads(resp.content)['next'])
+			self.assertEqual([row['slug'] for row in next_page.data['results']], ['row-0'])
+
+	def test_fast_json_renderer_and_parser_match_drf(self):
+		for i in range(3):
+			Product.objects.create(
+				name=f'Caf\u00e9 {i} \u2028', slug=f'json-{i}', sku=f'JSON{i}', description='desc',
+				price='19.99', discounted_price='9.50' if i else None, category=self.category
+			)
+		page = {'count': 3, 'next': None, 'results': ProductListSerializer(Product.objects.all(), many=True).data}
+		values = {
+			'decimal': Decimal('12.50'),
+			'utc': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+			'offset': datetime(2024, 5, 1, 12, 30, tzinfo=dt_timezone(timedelta(hours=5, minutes=30))),
+			'naive': datetime(2024, 5, 1, 12, 30),
+			'lazy': gettext_lazy('Products'),
+			1: ['\u2029', None, True, 1.5, 2 ** 70],
+		}
+		for data in (page, values):
+			self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+		self.assertEqual(FastJSONRenderer().render(values, 'application/json; indent=2'),
+						 JSONRenderer().render(values, 'application/json; indent=2'))
+		with override_settings(JSON_BACKEND='stdlib'):
+			self.assertEqual(FastJSONRenderer().render(page), JSONRenderer().render(page))
+
+		for body in (b'{"sku": "A1", "qty": 2, "big": 123456789012345678901234567890, "name": "Caf\xc3\xa9"}',
+					 b'[1.5, null, "\\u2028"]'):
+			self.assertEqual(FastJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+		for body in (b'{"sku": ', b'{"price": NaN}'):
+			with self.assertRaises(ParseError) as fast:
+				FastJSONParser().parse(BytesIO(body))
+			with self.assertRaises(ParseError) as drf:
+				JSONParser().parse(BytesIO(body))
+			self.assertEqual(str(fast.exception.detail), str(drf.exception.detail))
+
+	def test_large_responses_are_compressed_and_cache_hits_reuse_the_stored_variant(self):
+		for i in range(20):
+			Product.objects.create(
+				name=f'Compressed {i}', slug=f'compressed-{i}', sku=f'GZ{i}', description='desc',
+				price='19.99', category=self.category, stock_quantity=1
+			)
+		identity = self.client.get(self.list_url)
+		self.assertFalse(identity.has_header('Content-Encoding'))
+		self.assertIn('Accept-Encoding', identity['Vary'])
+		cache.clear()
+
+		first = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING='br;q=0.9, gzip, deflate')
+		self.assertEqual((first['X-Cache'], first['Content-Encoding']), ('MISS', 'gzip'))
+		self.assertEqual(first['ETag'], 'W/' + identity['ETag'])
+		self.assertEqual(gzip.decompress(first.content), identity.content)
+		self.assertEqual(int(first['Content-Length']), len(first.content))
+		with self.assertNumQueries(0):
+			second = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING='gzip')
+		self.assertEqual((second['X-Cache'], second.content), ('HIT', first.content))
+		self.assertEqual(self.client.get(self.list_url, HTTP_ACCEPT_ENCODING='gzip;q=0').content, identity.content)
+
+		for etag in (first['ETag'], identity['ETag']):
+			resp = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+			self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+		small = self.client.get(self.list_url + '?search=nothing', HTTP_ACCEPT_ENCODING='gzip')
+		self.assertFalse(small.has_header('Content-Encoding'))
+		with override_settings(COMPRESSION_MIN_SIZE=10 ** 6):
+			cache.clear()
+			self.assertFalse(self.client.get(self.list_url, HTTP_ACCEPT_ENCODING='gzip').has_header('Content-Encoding'))
+
+		# BREACH: HTML embedding CSRF tokens next to reflected input, and
+		# the token responses of login, are never compressed.
+		with override_settings(COMPRESSION_MIN_SIZE=1):
+			for url in (self.list_url + '?search=csrfToken', '/admin/login/'):
+				resp = self.client.get(url, HTTP_ACCEPT='text/html', HTTP_ACCEPT_ENCODING='gzip')
+				self.assertTrue(resp['Content-Type'].startswith('text/html'))
+				self.assertFalse(resp.has_header('Content-Encoding'), url)
+			resp = self.client.post('/api/users/login/', {'email': 'admin@example.com', 'password': 'adminpass'},
+									format='json', HTTP_ACCEPT_ENCODING='gzip')
+			self.assertIn('access', resp.json())
+			self.assertFalse(resp.has_header('Content-Encoding'))
+
+		access, _ = self.obtain_token_for_user('admin@example.com', 'adminpass')
+		self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+		resp = self.client.get('/api/products/export/', HTTP_ACCEPT_ENCODING='gzip')
+		self.assertEqual(resp['Content-Encoding'], 'gzip')
+		lines = gzip.decompress(b''.join(resp.streaming_content)).decode().splitlines()
+		self.assertEqual(len(lines), 20)
+
+	def test_openapi_schema_is_generated_once_and_revalidated_by_etag(self):
+		with tempfile.TemporaryDirectory() as directory, \
+				override_settings(OPENAPI_SCHEMA_CACHE=True, OPENAPI_SCHEMA_DIR=directory):
+			api_schema.schema_cache.clear()
+			self.addCleanup(api_schema.schema_cache.clear)
+			first = self.client.get('/swagger.json')
+			self.assertEqual((first.status_code, first['X-Cache']), (200, 'MISS'))
+			schema = json.loads(first.content)
+			self.assertIn('/products/', schema['paths'])
+			self.assertNotIn('host', schema)
+			self.assertIn('category', [p['name'] for p in schema['paths']['/products/']['get']['parameters']])
+
+			with mock.patch.object(api_schema, 'generate_schema', side_effect=AssertionError), \
+					self.assertNumQueries(0):
+				second = self.client.get('/swagger.json')
+				not_modified = self.client.get('/swagger.json', HTTP_IF_NONE_MATCH=first['ETag'])
+			self.assertEqual((second['X-Cache'], second.content), ('HIT', first.content))
+			self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+			self.assertTrue(self.client.get('/swagger.yaml').content.startswith(b'swagger:'))
+
+			out = StringIO()
+			call_command('render_openapi_schema', format=['.json'], stdout=out)
+			self.assertIn('swagger.json', out.getvalue())
+			with open(os.path.join(directory, 'swagger.json'), 'rb') as handle:
+				self.assertEqual(handle.read(), first.content)
+			api_schema.schema_cache.clear()
+			with mock.patch.object(api_schema, 'generate_schema', side_effect=AssertionError):
+				self.assertEqual(self.client.get('/swagger.json').content, first.content)
+
+	def test_list_query_shapes_use_indexes_instead_of_full_scans(self):
+		brand = Brand.objects.create(name='Plan', slug='plan')
+		for i in range(30):
+			Product.objects.create(
+				name=f'Plan {i}', slug=f'plan-{i}', sku=f'PLAN{i}', description='desc', price=f'{i + 1}.00',
+				category=self.category, brand=brand, stock_quantity=1, is_active=i % 5 != 0
+			)
+		queries = [
+			'', '?category__slug=test-cat', f'?category={self.category.pk}', f'?brand={brand.pk}',
+			'?min_price=5&max_price=20', '?ordering=price', '?ordering=-price', '?ordering=-rating_avg',
+			'?min_rating=4', f'?category={self.category.pk}&ordering=created_at', '?pagination=cursor&page_size=5',
+		]
+		urls = [self.list_url + query for query in queries]
+		urls.append(self.client.get(urls[-1]).json()['next'])
+		for url in urls:
+			cache.clear()
+			with self.subTest(url=url):
+				with CaptureQueriesContext(connection) as captured:
+					self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+				selects = [query['sql'] for query in captured
+						   if query['sql'].startswith('SELECT') and 'FROM "products_product"' in query['sql']]
+				self.assertTrue(selects)
+				for sql in selects:
+					plan = explain(sql)
+					self.assertFalse(full_scans(plan), f'{sql}\n{plan}')
+
+
+class StockConcurrencyTests(TransactionTestCase):
+	def test_parallel_reservations_never_oversell(self):
+		admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='adminpass')
+		category = Category.objects.create(name='Cat', slug='cat')
+		Product.objects.create(name='Hot', slug='hot', sku='HOT1', description='d', price='1.00', category=category, stock_quantity=10)
+		statuses = []
+		barrier = threading.Barrier(25)
+
+		def checkout():
+			client = APIClient()
+			client.force_authenticate(admin)
+			barrier.wait()
+			try:
+				resp = client.post('/api/products/stock/reserve/', {'lines': [{'sku': 'HOT1', 'qty': 1}]}, format='json')
+				statuses.append(resp.status_code)
+			finally:
+				connection.close()
+
+		threads = [threading.Thread(target=checkout) for _ in range(25)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+
+		self.assertEqual(statuses.count(status.HTTP_200_OK), 10)
+		self.assertEqual(statuses.count(status.HTTP_409_CONFLICT), 15)
+		self.assertEqual(Product.objects.get(sku='HOT1').stock_quantity, 0)
@@ -1,11 +1,21 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.ASYNC_CATALOG_VIEWS:
+    list_view, detail_view = views.AsyncProductListView, views.AsyncProductDetailView
+else:
+    list_view, detail_view = views.ProductListView, views.ProductDetailView
+
 urlpatterns = [
-    path('', views.ProductListView.as_view(), name='product-list'),
+    path('', list_view.as_view(), name='product-list'),
     path('create/', views.ProductCreateView.as_view(), name='product-create'),
-    path('<slug:slug>/', views.ProductDetailView.as_view(), name='product-detail'),
+    path('import/', views.ProductImportView.as_view(), name='product-import'),
+    path('export/', views.ProductExportView.as_view(), name='product-export'),
+    path('stock/reserve/', views.StockReservationView.as_view(operation='reserve'), name='product-stock-reserve'),
+    path('stock/release/', views.StockReservationView.as_view(operation='release'), name='product-stock-release'),
+    path('<slug:slug>/', detail_view.as_view(), name='product-detail'),
     path('<slug:slug>/update/', views.ProductUpdateView.as_view(), name='product-update'),
     path('<slug:slug>/delete/', views.ProductDeleteView.as_view(), name='product-delete'),
-    path('<slug:slug>/reviews/', views.ProductReviewCreateView.as_view(), name='product-review-create'),
+    path('<slug:slug>/reviews/', views.ProductReviewListCreateView.as_view(), name='product-review-create'),
 ]
@@ -5,36 +5,70 @@ managing `Product` objects and creating product reviews. Views are
 implemented using Django REST Framework generic views and expose
 filtering/search/ordering hooks used by the public API.
 """
-from rest_framework import generics, permissions, filters
+from decimal import Decimal, InvalidOperation
+
+from rest_framework import generics, permissions, filters, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
+from rest_framework.negotiation import BaseContentNegotiation
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
-from .models import Product, ProductReview
-from .serializers import ProductSerializer, ProductListSerializer, ProductReviewSerializer
+from django.db.models import Q, Prefetch
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
+from categories.models import Category, Brand
+from ecommerce_backend.async_views import AsyncListView, AsyncRetrieveView
+from ecommerce_backend.response_cache import CachedResponseMixin
+from ecommerce_backend.row_serializers import ValuesListMixin
+from .models import Product, ProductImage, ProductReview
+from .export import export_rows, render_csv, render_ndjson
+from .importer import ProductImporter, decode_lines, read_rows
+from .pagination import KeysetPagination
+from .search import ProductSearchFilter
+from .stock import release_stock, reserve_stock
+from .serializers import (ProductSerializer, ProductListSerializer, ProductListRowSerializer,
+                          ProductReviewSerializer, StockBatchSerializer, DETAIL_REVIEW_LIMIT)
 
-class ProductListView(generics.ListAPIView):
-    """List view returning lightweight product representations.
+class ProductFilterMixin:
+    """Filtering, search and ordering shared by product listing endpoints.
 
-    Supports filtering by category/brand, price range, search and
-    ordering. Uses `ProductListSerializer` for compact responses.
+    Supports filtering by category/brand, price range, minimum rating,
+    full-text search (see `products.search`) and ordering. Views build
+    their base queryset and pass it through `filter_by_params`.
     """
-    serializer_class = ProductListSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # `ProductSearchFilter` runs last so it can put relevance ahead of the
+    # default ordering when `?search=` is used without `?ordering=`.
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, ProductSearchFilter]
     # Allow filtering by category id or slug (via 'category' param), brand id, and featured flag
     filterset_fields = ['category', 'category__slug', 'brand', 'is_featured']
     search_fields = ['name', 'description', 'sku']
-    ordering_fields = ['price', 'created_at', 'name']
+    ordering_fields = ['price', 'created_at', 'name', 'rating_avg', 'rating_count']
     ordering = ['-created_at']
-    
-    def get_queryset(self):
-        queryset = Product.objects.filter(is_active=True).select_related(
-            'category', 'brand'
-        ).prefetch_related('images')
-        # Use select_related for FK lookups (single row joins) and
-        # prefetch_related for related sets (`images`) to minimize queries.
 
+    def decimal_param(self, name):
+        """Return query parameter `name` as a `Decimal`, or `None` if absent.
+
+        Raises a 400 `ValidationError` for values that are not finite
+        numbers instead of letting the ORM fail on them.
+        """
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            number = Decimal(value)
+        except InvalidOperation:
+            number = None
+        if number is None or not number.is_finite():
+            raise ValidationError({name: 'A valid number is required.'})
+        return number
+
+    def filter_by_params(self, queryset):
+        """Apply the category, price range and rating query parameters."""
         # Price range filter
-        min_price = self.request.query_params.get('min_price')
-        max_price = self.request.query_params.get('max_price')
+        min_price = self.decimal_param('min_price')
+        max_price = self.decimal_param('max_price')
+        min_rating = self.decimal_param('min_rating')
         # Category filter can be provided as id or slug via ?category=123 or ?category=slug
         category_param = self.request.query_params.get('category')
         if category_param:
@@ -46,27 +80,205 @@ class ProductListView(generics.ListAPIView):
             else:
                 queryset = queryset.filter(category__slug=category_param)
         
-        if min_price:
+        if min_price is not None:
             # Apply minimum price (inclusive) if provided.
             queryset = queryset.filter(price__gte=min_price)
-        if max_price:
+        if max_price is not None:
             # Apply maximum price (inclusive) if provided.
             queryset = queryset.filter(price__lte=max_price)
+        if min_rating is not None:
+            # Filter on the denormalized average of approved reviews.
+            queryset = queryset.filter(rating_avg__gte=min_rating)
         
         return queryset
 
-class ProductDetailView(generics.RetrieveAPIView):
-    """Retrieve a single active product by `slug`."""
-    queryset = Product.objects.filter(is_active=True)
+class ProductListView(CachedResponseMixin, ValuesListMixin, ProductFilterMixin, generics.ListAPIView):
+    """List view returning lightweight product representations.
+
+    Renders `ProductListSerializer`'s shape from `.values()` rows with
+    `ProductListRowSerializer` and applies the filters of
+    `ProductFilterMixin`. Clients crawling deep into the catalog can
+    opt into keyset paging with `?pagination=cursor` (see
+    `KeysetPagination`), except for relevance-ranked searches.
+    Anonymous responses are served from the versioned response cache.
+    """
+    serializer_class = ProductListSerializer
+    row_serializer_class = ProductListRowSerializer
+    cache_dependencies = (Product, ProductImage, Category, Brand)
+
+    @property
+    def paginator(self):
+        """Switch to keyset pagination when the client passes `?pagination=cursor`.
+
+        Page-number pagination stays the default; cursor links carry the
+        opt-in forward so subsequent pages keep using the keyset mode.
+        """
+        if not hasattr(self, '_paginator'):
+            if self.uses_keyset(getattr(self, 'request', None)):
+                self._paginator = KeysetPagination()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    @staticmethod
+    def uses_keyset(request):
+        """Whether `request` is paged by `KeysetPagination`.
+
+        Relevance-ranked searches (`?search=` without `?ordering=`) keep
+        page-number paging even with `?pagination=cursor`: a keyset needs
+        a column ordering, and would silently replace the ranking.
+        """
+        return KeysetPagination.is_requested(request) and not ProductSearchFilter.ranks_by_relevance(request)
+    
+    def get_queryset(self):
+        queryset = Product.objects.filter(is_active=True).select_related(
+            'category', 'brand'
+        ).prefetch_related(
+            Prefetch(
+                'images',
+                queryset=ProductImage.objects.filter(is_primary=True),
+                to_attr='primary_images',
+            )
+        )
+        # Use select_related for FK lookups (single row joins) and a
+        # filtered Prefetch so the primary image of every product on the
+        # page is loaded in one batched query. Both only matter for
+        # `ProductListSerializer`; the row path selects its own columns.
+        return self.filter_by_params(queryset)
+
+class AsyncProductListView(AsyncListView):
+    """`ProductListView` for ASGI; keyset paging falls back to the sync view."""
+    sync_view = ProductListView
+
+    def supports(self, request):
+        return not ProductListView.uses_keyset(request)
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """Skip `Accept` negotiation for views that stream their own format."""
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
+
+class ProductExportView(ProductFilterMixin, generics.GenericAPIView):
+    """Admin-only streaming export of the active catalog.
+
+    Accepts the same filter, search and ordering parameters as the
+    product list (default ordering is by `id`), plus `?updated_since=`
+    (ISO date or datetime) for incremental syncs on
+    `Product.updated_at`. `?output=csv` streams CSV, otherwise NDJSON.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    content_negotiation_class = IgnoreClientContentNegotiation
+    pagination_class = None
+    swagger_schema = None  # raw stream, no serializer to describe
+    ordering = ['id']
+    chunk_size = 2000
+
+    def get_queryset(self):
+        queryset = self.filter_by_params(Product.objects.filter(is_active=True))
+        updated_since = self.request.query_params.get('updated_since')
+        if updated_since:
+            # Both parsers return None for malformed input but raise
+            # ValueError for well-formed, impossible values (2021-13-45).
+            try:
+                since = parse_datetime(updated_since)
+                day = parse_date(updated_since) if since is None else None
+            except ValueError:
+                since = day = None
+            if since is None:
+                if day is None:
+                    raise ValidationError({'updated_since': 'Expected an ISO 8601 date or datetime.'})
+                since = timezone.datetime.combine(day, timezone.datetime.min.time())
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            queryset = queryset.filter(updated_at__gte=since)
+        return queryset
+
+    def get(self, request, *args, **kwargs):
+        rows = export_rows(self.filter_queryset(self.get_queryset()), chunk_size=self.chunk_size)
+        if request.query_params.get('output') == 'csv':
+            response = StreamingHttpResponse(render_csv(rows), content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = 'attachment; filename="products.csv"'
+        else:
+            response = StreamingHttpResponse(render_ndjson(rows), content_type='application/x-ndjson')
+        return response
+
+class ProductDetailView(CachedResponseMixin, generics.RetrieveAPIView):
+    """Retrieve a single active product by `slug`.
+
+    Only the latest approved reviews are embedded; rating aggregates come
+    from the denormalized `Product.rating_*` columns.
+    """
+    queryset = Product.objects.filter(is_active=True).select_related(
+        'category', 'brand'
+    ).prefetch_related(
+        'images',
+        Prefetch(
+            'reviews',
+            queryset=ProductReview.objects.filter(is_approved=True)
+            .select_related('user').order_by('-created_at')[:DETAIL_REVIEW_LIMIT],
+            to_attr='latest_reviews',
+        ),
+    )
+    cache_dependencies = (Product, ProductImage, ProductReview, Category, Brand)
     serializer_class = ProductSerializer
     lookup_field = 'slug'
 
+class AsyncProductDetailView(AsyncRetrieveView):
+    """`ProductDetailView` for ASGI."""
+    sync_view = ProductDetailView
+
 class ProductCreateView(generics.CreateAPIView):
     """Admin-only view to create new `Product` instances."""
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAdminUser]
 
+class ProductImportView(APIView):
+    """Admin-only bulk upsert of products keyed on `sku`.
+
+    The request body is streamed line by line rather than parsed into
+    memory: send `Content-Type: text/csv` for CSV (header row required)
+    or `application/x-ndjson` for one JSON object per line. `category`
+    and `brand` are given as slugs. Responds with counts, throughput and
+    a per-line error report; valid rows are written even when others
+    fail.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        fmt = 'csv' if 'csv' in (request.content_type or '') else 'jsonl'
+        batch_size = request.query_params.get('batch_size', '')
+        importer = ProductImporter(batch_size=int(batch_size) if batch_size.isdigit() else 1000)
+        stream = request.stream or []
+        report = importer.run(read_rows(decode_lines(stream), fmt))
+        return Response(report)
+
+class StockReservationView(APIView):
+    """Admin-only atomic stock reservation (`reserve`) or release.
+
+    POST `{"lines": [{"sku": ..., "qty": ...}], "allow_partial": false}`.
+    Every line is applied with a conditional `F()` update in a single
+    transaction and reported with its own status. Responds `200` when
+    every line succeeded and `409` otherwise (with `allow_partial` off,
+    nothing was changed).
+    """
+    permission_classes = [permissions.IsAdminUser]
+    operation = 'reserve'
+
+    def post(self, request):
+        serializer = StockBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        apply = reserve_stock if self.operation == 'reserve' else release_stock
+        lines = apply(serializer.validated_data['lines'], serializer.validated_data['allow_partial'])
+        ok = all(line['ok'] for line in lines)
+        return Response({'ok': ok, 'lines': lines}, status=status.HTTP_200_OK if ok else status.HTTP_409_CONFLICT)
+
 class ProductUpdateView(generics.UpdateAPIView):
     """Admin-only view to update products identified by `slug`."""
     queryset = Product.objects.all()
@@ -81,15 +293,22 @@ class ProductDeleteView(generics.DestroyAPIView):
     permission_classes = [permissions.IsAdminUser]
     lookup_field = 'slug'
 
-class ProductReviewCreateView(generics.CreateAPIView):
-    """Authenticated endpoint to create `ProductReview` for a product.
+class ProductReviewListCreateView(CachedResponseMixin, generics.ListCreateAPIView):
+    """List a product's approved reviews or create a new one.
 
-    The product is determined from the URL `slug` and the authenticated
-    user is attached as the review author in `perform_create`.
+    GET is public and paginated, newest first. POST requires
+    authentication; the product is determined from the URL `slug` and
+    the authenticated user is attached as the review author in
+    `perform_create`.
     """
-    queryset = ProductReview.objects.all()
     serializer_class = ProductReviewSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cache_dependencies = (ProductReview,)
+
+    def get_queryset(self):
+        return ProductReview.objects.filter(
+            product__slug=self.kwargs.get('slug'), product__is_active=True, is_approved=True
+        ).select_related('user').order_by('-created_at')
     
     def perform_create(self, serializer):
         """Attach the `Product` (from URL `slug`) and the current user.
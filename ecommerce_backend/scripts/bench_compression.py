@@ -0,0 +1,95 @@
+"""Measure response compression: bytes on the wire and CPU per request.
+
+Seeds a throwaway test database (see `bench_serializers`) and fetches
+a 20-row and a 100-row product list page and the OpenAPI schema
+through the test client. For each payload it prints the size as is,
+with per-request gzip (and Brotli, when installed) and with the
+cached-entry levels. It also prints the CPU time to compress one
+response at each level, and the time for a full request served from
+the response cache with and without a stored compressed variant.
+
+Usage: python scripts/bench_compression.py --repeat 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '..'))
+for path in (PROJECT_ROOT, SCRIPT_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_backend.settings')
+import django
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+
+from bench_serializers import seed
+from ecommerce_backend.compression import available_encodings, compress
+
+PAYLOADS = (
+    ('products x20', '/api/products/'),
+    ('products x100', '/api/products/?page_size=100'),
+    ('openapi', '/swagger.json'),
+)
+
+
+def median_us(fn, repeat):
+    fn()  # warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        samples.append((time.process_time() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ['*']
+    settings.RESPONSE_CACHE_ENABLED = True
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        seed()
+        client = Client()
+        encodings = available_encodings()
+        print(f'codings available: {", ".join(encodings)}; repeat {args.repeat}')
+        print(f'{"payload":<14} {"coding":<7} {"identity B":>10} {"request B":>10} {"cached B":>10} '
+              f'{"request us":>10} {"cached us":>10}')
+        for label, url in PAYLOADS:
+            body = client.get(url).content
+            for encoding in encodings:
+                dynamic = compress(body, encoding)
+                cached = compress(body, encoding, cached=True)
+                print(f'{label:<14} {encoding:<7} {len(body):>10} {len(dynamic):>10} {len(cached):>10} '
+                      f'{median_us(lambda: compress(body, encoding), args.repeat):>10.0f} '
+                      f'{median_us(lambda: compress(body, encoding, cached=True), args.repeat):>10.0f}')
+
+        print()
+        print('cache HIT, full request (us of CPU):')
+        url = PAYLOADS[1][1]
+        client.get(url)
+        for header in ('identity', *encodings):
+            response = client.get(url, HTTP_ACCEPT_ENCODING=header)
+            assert response['X-Cache'] == 'HIT', response['X-Cache']
+            hit = median_us(lambda: client.get(url, HTTP_ACCEPT_ENCODING=header), args.repeat)
+            print(f'  {header:<9} {hit:>8.0f} us  {len(response.content):>7} B')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Show what persistent database connections save per request.
+
+Two measurements against the configured database:
+
+``connect``
+    Timings of ``SELECT 1`` on a fresh connection (open, query, close)
+    against the same query on a reused connection. The p50 difference is
+    the connection setup cost that ``DB_CONN_MAX_AGE=0`` adds to every
+    request.
+
+``http`` (with ``--http``)
+    Starts gunicorn twice through ``loadtest.py``, once with
+    ``DB_CONN_MAX_AGE=0`` and once with the configured value, and
+    reports the p50/p95 of the ``product_detail`` scenario for each run.
+    The bench catalog must be seeded (``loadtest.py seed``).
+
+Usage:
+    python scripts/bench_connections.py
+    python scripts/bench_connections.py --http --workers 2 --threads 4 --duration 10
+"""
+
+import argparse
+import os
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+import loadtest  # noqa: E402  (sets up Django)
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+
+
+def time_queries(iterations, reconnect):
+    timings = []
+    connection.close()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        if reconnect:
+            connection.close()
+        timings.append((time.perf_counter() - start) * 1000)
+    connection.close()
+    timings.sort()
+    return {'p50': loadtest.percentile(timings, 0.50), 'p95': loadtest.percentile(timings, 0.95)}
+
+
+def http_runs(args):
+    rng = loadtest.random.Random(args.seed)
+    target = loadtest.Target(rng)
+    persistent = str(settings.DB_CONN_MAX_AGE or 60)
+    results = {}
+    for label, max_age in (('DB_CONN_MAX_AGE=0', '0'), (f'DB_CONN_MAX_AGE={persistent}', persistent)):
+        server = loadtest.start_server(args.port, args.workers, args.threads, {'DB_CONN_MAX_AGE': max_age})
+        try:
+            results[label] = loadtest.run_scenario('product_detail', target, '127.0.0.1', args.port,
+                                                   args.concurrency, args.duration, args.warmup)
+        finally:
+            server.terminate()
+            server.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--iterations', type=int, default=500, help='Queries per connect mode (default 500).')
+    parser.add_argument('--http', action='store_true', help='Also compare product_detail p50 through gunicorn.')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f'database: {connection.vendor} ({settings.DATABASES["default"].get("HOST") or "local"})')
+    fresh = time_queries(args.iterations, reconnect=True)
+    reused = time_queries(args.iterations, reconnect=False)
+    print(f'{"SELECT 1, new connection":<32} p50 {fresh["p50"]:>8} ms  p95 {fresh["p95"]:>8} ms')
+    print(f'{"SELECT 1, reused connection":<32} p50 {reused["p50"]:>8} ms  p95 {reused["p95"]:>8} ms')
+    print(f'{"connection setup (p50)":<32}     {round(fresh["p50"] - reused["p50"], 3):>8} ms')
+
+    if args.http:
+        for label, summary in http_runs(args).items():
+            latency = summary['latency_ms']
+            print(f'product_detail {label:<22} {summary["rps"]:>8.1f} req/s  '
+                  f'p50 {latency["p50"]} ms  p95 {latency["p95"]} ms  errors {summary["errors"]}')
+
+
+if __name__ == '__main__':
+    main()
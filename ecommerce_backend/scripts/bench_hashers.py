@@ -0,0 +1,137 @@
+"""Measure password-hasher cost as logins per second per worker.
+
+Each ``--hasher`` is an algorithm with optional parameter overrides, e.g.
+``pbkdf2``, ``pbkdf2:iterations=600000``, ``scrypt:work_factor=32768``
+or ``argon2:time_cost=3,memory_cost=65536``. For every hasher the script
+reports the median time of one hash, then runs ``verify`` (the work a
+login does) from ``--threads`` request threads for ``--duration``
+seconds. This mimics one gunicorn worker with that many threads.
+``--pool N`` routes hashing through the ``PASSWORD_HASHING_THREADS``
+pool instead.
+
+With no ``--hasher``, it compares Django's default PBKDF2 ("before")
+with the configured ``PASSWORD_HASHER`` policy ("after").
+
+Usage:
+    python scripts/bench_hashers.py
+    python scripts/bench_hashers.py --threads 4 --pool 2 --hasher pbkdf2 --hasher scrypt
+    python scripts/bench_hashers.py --output bench-results/hashers.json
+
+End to end, the ``login`` scenario of ``scripts/loadtest.py`` measures
+the same thing through HTTP.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_backend.settings')
+import django
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth import hashers as django_hashers
+
+from users import hashers
+
+PASSWORD = 'correct horse battery staple'
+BASES = {
+    'pbkdf2': hashers.PBKDF2PasswordHasher,
+    'scrypt': hashers.ScryptPasswordHasher,
+    'argon2': hashers.Argon2PasswordHasher,
+}
+# Django's stock parameters, i.e. what the project used before the policy existed.
+DJANGO_DEFAULT = {'iterations': django_hashers.PBKDF2PasswordHasher.iterations}
+
+
+def build_hasher(spec):
+    """Return `(label, hasher)` for a spec such as `scrypt:work_factor=32768`."""
+    name, _, params = spec.partition(':')
+    if name not in BASES:
+        raise SystemExit(f'unknown hasher "{name}" (choose from {", ".join(BASES)})')
+    overrides = {}
+    for pair in filter(None, params.split(',')):
+        key, _, value = pair.partition('=')
+        overrides[key] = int(value)
+    cls = type(f'Bench{BASES[name].__name__}', (BASES[name],), overrides)
+    if name == 'scrypt':
+        cls.maxmem = 2 * 128 * cls.work_factor * cls.block_size * cls.parallelism
+    return spec, cls()
+
+
+def measure(hasher, threads, duration, samples):
+    encoded = hasher.encode(PASSWORD, hasher.salt())
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.verify(PASSWORD, encoded)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    done, counts = threading.Event(), [0] * threads
+
+    def login(index):
+        while not done.is_set():
+            hasher.verify(PASSWORD, encoded)
+            counts[index] += 1
+
+    workers = [threading.Thread(target=login, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    time.sleep(duration)
+    done.set()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    return {
+        'hash_ms_median': round(statistics.median(timings), 2),
+        'logins_per_second': round(sum(counts) / elapsed, 2),
+        'encoded_prefix': encoded.rsplit('$', 2)[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--hasher', action='append', dest='hashers',
+                        help='Algorithm[:param=value,...]; repeatable.')
+    parser.add_argument('--threads', type=int, default=1, help='Request threads per worker (default 1).')
+    parser.add_argument('--pool', type=int, default=0, help='PASSWORD_HASHING_THREADS to use (default 0).')
+    parser.add_argument('--duration', type=float, default=5, help='Seconds per hasher (default 5).')
+    parser.add_argument('--samples', type=int, default=5, help='Single-hash timings per hasher (default 5).')
+    parser.add_argument('--output', help='Also write the results as JSON here.')
+    args = parser.parse_args()
+
+    specs = args.hashers or [
+        'pbkdf2:' + ','.join(f'{k}={v}' for k, v in DJANGO_DEFAULT.items()),
+        settings.PASSWORD_HASHER,
+    ]
+    settings.PASSWORD_HASHING_THREADS = args.pool
+    hashers.pool.shutdown()
+
+    results = []
+    print(f'{"hasher":<40} {"hash ms":>9} {"logins/s/worker":>16}')
+    for spec in specs:
+        label, hasher = build_hasher(spec)
+        result = {'hasher': label, 'threads': args.threads, 'pool': args.pool,
+                  **measure(hasher, args.threads, args.duration, args.samples)}
+        results.append(result)
+        print(f'{label:<40} {result["hash_ms_median"]:>9} {result["logins_per_second"]:>16}')
+    hashers.pool.shutdown()
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as out:
+            json.dump({'cpus': os.cpu_count(), 'results': results}, out, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Measure bulk import throughput against the one-product-per-request path.
+
+On a throwaway test database this times:
+
+1. `ProductImporter` inserting `--rows` new products,
+2. the same feed again (every row becomes an update),
+3. `PATCH /api/products/<slug>/update/` with `ProductSerializer` for
+   `--single` of those rows, the one-request-per-product path supplier
+   feeds used before the bulk importer.
+
+Usage: python scripts/bench_import.py --rows 50000 --single 500
+"""
+
+import argparse
+import os
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_backend.settings')
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import setup_test_environment
+from django.utils.text import slugify
+from rest_framework.test import APIClient
+
+from categories.models import Brand, Category
+from products.importer import ProductImporter
+from users.models import User
+
+
+def feed(count, prefix='BULK'):
+    for i in range(count):
+        yield i + 1, {
+            'sku': f'{prefix}-{i:07d}', 'name': f'Bulk product {i}', 'description': 'Imported row',
+            'price': f'{(i % 500) + 0.99:.2f}', 'stock_quantity': i % 40,
+            'category': f'cat-{i % 20}', 'brand': f'brand-{i % 10}',
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--single', type=int, default=300)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        categories = [Category.objects.create(name=f'Cat {i}', slug=f'cat-{i}') for i in range(20)]
+        for i in range(10):
+            Brand.objects.create(name=f'Brand {i}', slug=f'brand-{i}')
+
+        report = ProductImporter(batch_size=args.batch_size).run(feed(args.rows))
+        print(f"bulk insert : {report['rows_per_second']:>10.1f} rows/s  ({report['created']} created)")
+        report = ProductImporter(batch_size=args.batch_size).run(feed(args.rows))
+        bulk_rate = report['rows_per_second']
+        print(f"bulk upsert : {bulk_rate:>10.1f} rows/s  ({report['updated']} updated)")
+
+        admin = User.objects.create_superuser(email='bench@example.com', username='bench', password='x')
+        client = APIClient()
+        client.force_authenticate(admin)
+        start = time.perf_counter()
+        for _, row in feed(args.single):
+            slug = slugify(f"{row['name']}-{row['sku']}")
+            resp = client.patch(f'/api/products/{slug}/update/', {
+                'name': row['name'], 'description': row['description'], 'price': row['price'],
+                'stock_quantity': row['stock_quantity'], 'category_id': categories[0].id,
+            }, format='json')
+            assert resp.status_code == 200, resp.content
+        single_rate = args.single / (time.perf_counter() - start)
+        print(f'one-by-one  : {single_rate:>10.1f} rows/s  ({args.single} updated via API)')
+        print(f'speedup     : {bulk_rate / single_rate:>10.1f}x')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Time API JSON encoding with DRF's renderer and `FastJSONRenderer`.
+
+Seeds a throwaway test database with 100 products (brands, discounts,
+primary images with renditions, non-ASCII names), builds the paginated
+`ProductListSerializer` payload of one 100-item page and times
+rendering it with DRF's stdlib `JSONRenderer` and with `FastJSONRenderer`
+(`orjson` when installed). Both outputs are checked to be identical.
+Decoding the same document with both parsers is timed too.
+
+Usage: python scripts/bench_json.py --repeat 200
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_backend.settings')
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import setup_test_environment
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from ecommerce_backend.renderers import FastJSONParser, FastJSONRenderer, get_backend
+from products.models import Product
+from products.serializers import ProductListSerializer
+
+from bench_serializers import product_queryset, seed
+
+
+def median_us(fn, repeat):
+    fn()  # warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        seed()
+        Product.objects.filter(pk__in=Product.objects.values('pk')[:30]).update(name='Café crème — édition')
+        products = list(product_queryset().order_by('-created_at')[:100])
+        payload = {
+            'count': len(products),
+            'next': 'http://testserver/api/products/?page=2',
+            'previous': None,
+            'results': ProductListSerializer(products, many=True).data,
+        }
+        stdlib, fast = JSONRenderer(), FastJSONRenderer()
+        body = stdlib.render(payload)
+        assert fast.render(payload) == body, 'renderers disagree'
+
+        backend = get_backend()
+        print(f'100-item product page, {len(body)} bytes; fast backend: '
+              f'{backend.__name__ + " " + backend.__version__ if backend else "stdlib (orjson not installed)"}')
+        print(f'{"":<8} {"stdlib us":>10} {"fast us":>10} {"speedup":>8}')
+        encode = (median_us(lambda: stdlib.render(payload), args.repeat),
+                  median_us(lambda: fast.render(payload), args.repeat))
+        decode = (median_us(lambda: JSONParser().parse(io.BytesIO(body)), args.repeat),
+                  median_us(lambda: FastJSONParser().parse(io.BytesIO(body)), args.repeat))
+        for label, (before, after) in (('encode', encode), ('decode', decode)):
+            print(f'{label:<8} {before:>10.1f} {after:>10.1f} {before / after:>7.1f}x')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
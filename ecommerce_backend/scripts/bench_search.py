@@ -0,0 +1,103 @@
+"""Compare product search engines against the original `icontains` filter.
+
+Seeds a throwaway test database with `--products` synthetic products,
+then times `GET /api/products/?search=...` for a fixed set of queries
+with `PRODUCT_SEARCH_ENGINE=basic` (the old `SearchFilter` scans) and
+with the full-text engine for the configured database (`auto`).
+
+Usage: python scripts/bench_search.py --products 50000 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_backend.settings')
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment
+from rest_framework.test import APIClient
+
+from categories.models import Category
+from products.models import Product
+from products.search import get_search_engine
+
+WORDS = (
+    'wireless bluetooth speaker portable waterproof laptop gaming keyboard '
+    'mechanical mouse ergonomic monitor curved ultra phone galaxy pixel case '
+    'leather wallet running shoes trail jacket winter cotton shirt denim '
+    'kitchen blender stainless kettle coffee grinder garden hose lamp desk'
+).split()
+QUERIES = ['wireless', 'gaming keyboard', 'stain', 'coffee grinder', 'SKU-00042', 'zzzz-nomatch']
+
+
+def seed(count, rng):
+    category = Category.objects.create(name='Bench', slug='bench')
+    batch = []
+    for i in range(count):
+        name = ' '.join(rng.choice(WORDS) for _ in range(3)).title()
+        description = ' '.join(rng.choice(WORDS) for _ in range(30))
+        batch.append(Product(
+            name=name, slug=f'bench-{i}', sku=f'SKU-{i:05d}', description=description,
+            price=rng.randint(1, 500), category=category, stock_quantity=10,
+        ))
+        if len(batch) == 2000:
+            Product.objects.bulk_create(batch)
+            batch = []
+    Product.objects.bulk_create(batch)
+
+
+def time_engine(client, engine, repeat):
+    timings = {}
+    with override_settings(PRODUCT_SEARCH_ENGINE=engine):
+        for query in QUERIES:
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                resp = client.get('/api/products/', {'search': query})
+                samples.append((time.perf_counter() - start) * 1000)
+                assert resp.status_code == 200, resp.status_code
+            timings[query] = (statistics.median(samples), resp.data['count'])
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        seed(args.products, random.Random(args.seed))
+        engine = get_search_engine(connection.alias)
+        print(f'{args.products} products on {connection.vendor}; '
+              f'full-text engine: {type(engine).__name__ if engine else "none"}')
+
+        client = APIClient()
+        basic = time_engine(client, 'basic', args.repeat)
+        fulltext = time_engine(client, 'auto', args.repeat)
+
+        print(f'{"query":<18} {"basic ms":>10} {"hits":>7} {"fts ms":>10} {"hits":>7} {"speedup":>8}')
+        for query in QUERIES:
+            (b_ms, b_hits), (f_ms, f_hits) = basic[query], fulltext[query]
+            print(f'{query:<18} {b_ms:>10.1f} {b_hits:>7} {f_ms:>10.1f} {f_hits:>7} {b_ms / f_ms:>7.1f}x')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
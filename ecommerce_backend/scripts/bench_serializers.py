@@ -0,0 +1,113 @@
+"""Compare model and row serializers for the product and brand lists.
+
+Seeds a throwaway test database, loads one 100-row page the way the list
+views do, and times rendering it with the model serializers
+(`ProductListSerializer`, `BrandSerializer`) and with the `.values()`
+row serializers. Serializer time is reported per row, and the whole
+page (query plus serializer) is timed as well.
+
+Usage: python scripts/bench_serializers.py --repeat 50
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_backend.settings')
+import django
+django.setup()
+
+from django.db import connection
+from django.db.models import Prefetch
+from django.test.utils import setup_test_environment
+from rest_framework.test import APIRequestFactory
+
+from categories.models import Brand, Category
+from categories.serializers import BrandRowSerializer, BrandSerializer
+from products.models import Product, ProductImage
+from products.serializers import ProductListRowSerializer, ProductListSerializer
+
+ROWS = 100
+
+
+def seed():
+    category = Category.objects.create(name='Bench', slug='bench')
+    brands = Brand.objects.bulk_create(
+        Brand(name=f'Brand {i}', slug=f'brand-{i}', description='A brand', logo=f'brands/{i}.png')
+        for i in range(ROWS)
+    )
+    products = Product.objects.bulk_create(
+        Product(name=f'Product {i}', slug=f'product-{i}', sku=f'SKU-{i:05d}', description='desc',
+                price=f'{i + 1}.99', discounted_price=f'{i}.49' if i % 3 else None,
+                category=category, brand=brands[i % len(brands)], stock_quantity=i)
+        for i in range(ROWS)
+    )
+    ProductImage.objects.bulk_create(
+        ProductImage(product=product, image=f'products/{product.slug}.jpg', is_primary=True,
+                     renditions={'source': f'products/{product.slug}.jpg',
+                                 'srcset': {'160w': f'renditions/products/{product.slug}.jpg/160w.webp'}})
+        for product in products
+    )
+
+
+def product_queryset():
+    return Product.objects.filter(is_active=True).select_related('category', 'brand').prefetch_related(
+        Prefetch('images', queryset=ProductImage.objects.filter(is_primary=True), to_attr='primary_images')
+    )
+
+
+def median_ms(fn, repeat):
+    fn()  # warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def compare(label, model_serializer, model_queryset, row_serializer, context, repeat):
+    objects = list(model_queryset[:ROWS])
+    rows = list(row_serializer.rows(model_queryset)[:ROWS])
+    serialize_model = median_ms(lambda: model_serializer(objects, many=True, context=context).data, repeat)
+    serialize_rows = median_ms(lambda: row_serializer(rows, many=True, context=context).data, repeat)
+    page_model = median_ms(lambda: model_serializer(list(model_queryset[:ROWS]), many=True,
+                                                    context=context).data, repeat)
+    page_rows = median_ms(lambda: row_serializer(list(row_serializer.rows(model_queryset)[:ROWS]), many=True,
+                                                 context=context).data, repeat)
+    print(f'{label:<10} {serialize_model * 1000 / ROWS:>12.1f} {serialize_rows * 1000 / ROWS:>12.1f} '
+          f'{serialize_model / serialize_rows:>8.1f}x {page_model:>10.2f} {page_rows:>10.2f} '
+          f'{page_model / page_rows:>8.1f}x')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        seed()
+        context = {'request': APIRequestFactory().get('/api/')}
+        print(f'{ROWS}-row page on {connection.vendor}')
+        print(f'{"list":<10} {"model us/row":>12} {"rows us/row":>12} {"speedup":>9} '
+              f'{"page ms":>10} {"rows ms":>10} {"speedup":>9}')
+        compare('products', ProductListSerializer, product_queryset().order_by('-created_at'),
+                ProductListRowSerializer, context, args.repeat)
+        compare('brands', BrandSerializer, Brand.objects.filter(is_active=True),
+                BrandRowSerializer, context, args.repeat)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
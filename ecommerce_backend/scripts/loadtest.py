@@ -0,0 +1,394 @@
+"""Repeatable load test for the public API against a local gunicorn.
+
+Three subcommands:
+
+``seed``
+    Load a synthetic catalog into the configured database with
+    ``manage.py generate_catalog --prefix bench`` (category tree,
+    brands, products with images, Zipf-skewed reviews, users), plus
+    review-less reviewers for the ``review_create`` scenario.
+    ``--size`` takes ``1k``, ``100k``, ``1m`` or a number and
+    ``--reset`` deletes earlier bench rows first.
+
+``run``
+    Drive the product list, product detail, search, category tree,
+    login and review-create endpoints, one scenario after another, at
+    ``--concurrency`` for ``--duration`` seconds each. With
+    ``--start-server`` a gunicorn is started on ``--port`` for the run.
+    Latency percentiles (p50/p95/p99), requests per second and mean
+    response size per scenario are written as JSON (default ``bench-results/``) together
+    with the git commit and catalog size, so runs can be compared.
+
+``compare``
+    Print the per-scenario change between two result files.
+
+Usage:
+    python scripts/loadtest.py seed --size 100k
+    python scripts/loadtest.py run --start-server --workers 4 --concurrency 16 --duration 20
+    python scripts/loadtest.py run --start-server --server-env DB_CONN_MAX_AGE=0 --output before.json
+    python scripts/loadtest.py run --start-server --asgi --scenarios product_list product_detail category_tree
+    python scripts/loadtest.py run --start-server --accept-encoding gzip --output gzip.json
+    python scripts/loadtest.py compare bench-results/old.json bench-results/new.json
+
+The client is a thread pool using ``http.client``; at very high rates
+the load generator itself can become the bottleneck, so keep the
+client on a separate core budget from the server's workers.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_backend.settings')
+import django
+django.setup()
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import connection
+
+from categories.models import Category
+from products.management.commands.generate_catalog import size
+from products.models import Product, ProductReview
+from users.models import User
+
+BENCH_PASSWORD = 'bench-pass-123'
+SCENARIOS = ['product_list', 'product_detail', 'search', 'category_tree', 'login', 'review_create']
+REVIEWERS = 256
+SEARCH_TERMS = ['wireless', 'gaming keyboard', 'stain', 'coffee grinder', 'leather wallet', 'lamp']
+
+
+# --------------------------------------------------
+# SEED
+# --------------------------------------------------
+
+def seed_catalog(args):
+    call_command(
+        'generate_catalog', products=args.size, users=args.users, prefix='bench', password=BENCH_PASSWORD,
+        reviews_per_product=args.reviews_per_product, batch_size=args.batch_size, seed=args.seed,
+        workers=args.workers, reset=args.reset,
+    )
+    # Reviewers for the `review_create` scenario never get seeded reviews.
+    if args.reset:
+        User.objects.filter(username__startswith='bench-reviewer-').delete()
+    password = make_password(BENCH_PASSWORD)
+    User.objects.bulk_create([
+        User(username=f'bench-reviewer-{i}', email=f'bench-reviewer-{i}@example.com', password=password)
+        for i in range(REVIEWERS)
+    ], ignore_conflicts=True)
+
+
+# --------------------------------------------------
+# RUN
+# --------------------------------------------------
+
+class Target:
+    """Request factory for each scenario; picks inputs from the seeded data."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.slugs = list(
+            Product.objects.filter(sku__startswith='BENCH-', is_active=True).values_list('slug', flat=True)[:5000]
+        ) or list(Product.objects.filter(is_active=True).values_list('slug', flat=True)[:5000])
+        self.roots = list(Category.objects.filter(parent__isnull=True).values_list('slug', flat=True))
+        self.pages = max(1, Product.objects.filter(is_active=True).count() // 20)
+        self.users = list(User.objects.filter(username__startswith='bench-user-').values_list('email', flat=True))
+        self.reviewers = list(
+            User.objects.filter(username__startswith='bench-reviewer-').values_list('email', flat=True))
+        if not self.slugs or not self.users:
+            raise SystemExit('No bench data found; run `loadtest.py seed` first.')
+        self.tokens = {}
+        self._lock = threading.Lock()
+        self._review_slugs = {}
+
+    def product_list(self):
+        return 'GET', f'/api/products/?page={self.rng.randint(1, min(self.pages, 50))}', None, {}
+
+    def product_detail(self):
+        return 'GET', f'/api/products/{self.rng.choice(self.slugs)}/', None, {}
+
+    def search(self):
+        return 'GET', f'/api/products/?search={self.rng.choice(SEARCH_TERMS).replace(" ", "+")}', None, {}
+
+    def category_tree(self):
+        if self.rng.random() < 0.5 or not self.roots:
+            return 'GET', '/api/categories/', None, {}
+        return 'GET', f'/api/categories/{self.rng.choice(self.roots)}/', None, {}
+
+    def login(self):
+        body = {'email': self.rng.choice(self.users), 'password': BENCH_PASSWORD}
+        return 'POST', '/api/users/login/', body, {}
+
+    def review_create(self):
+        # Each worker thread reviews with its own user and walks products
+        # it has not reviewed yet, so (product, user) never collides.
+        worker = threading.get_ident()
+        with self._lock:
+            email, token = self.tokens[worker]
+            remaining = self._review_slugs.setdefault(worker, self.rng.sample(self.slugs, len(self.slugs)))
+        slug = remaining.pop()
+        body = {'rating': self.rng.randint(1, 5), 'title': 'Load test', 'comment': 'Posted by loadtest.py'}
+        return 'POST', f'/api/products/{slug}/reviews/', body, {'Authorization': f'Bearer {token}'}
+
+
+def request(host, port, method, path, body, headers):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    payload = json.dumps(body) if body is not None else None
+    headers = dict(headers, **({'Content-Type': 'application/json'} if payload else {}))
+    try:
+        conn.request(method, path, body=payload, headers=headers)
+        response = conn.getresponse()
+        data = response.read()
+        return response.status, data
+    finally:
+        conn.close()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return round(sorted_values[index], 2)
+
+
+def run_scenario(name, target, host, port, concurrency, duration, warmup, extra_headers=None):
+    make = getattr(target, name)
+    latencies, sizes, errors, statuses = [], [], 0, {}
+    lock = threading.Lock()
+
+    def worker(record_from, stop_at):
+        nonlocal errors
+        if name == 'review_create':
+            claim_reviewer(target, host, port)
+        while time.perf_counter() < stop_at:
+            method, path, body, headers = make()
+            headers = dict(extra_headers or {}, **headers)
+            start = time.perf_counter()
+            try:
+                status, data = request(host, port, method, path, body, headers)
+            except OSError:
+                status = 'error'
+            elapsed = (time.perf_counter() - start) * 1000
+            if start < record_from:
+                continue
+            with lock:
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+                if status == 'error' or status >= 400:
+                    errors += 1
+                else:
+                    latencies.append(elapsed)
+                    sizes.append(len(data))
+
+    begin = time.perf_counter()
+    record_from, stop_at = begin + warmup, begin + warmup + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker, record_from, stop_at) for _ in range(concurrency)]:
+            future.result()
+    latencies.sort()
+    return {
+        'requests': len(latencies) + errors,
+        'errors': errors,
+        'statuses': statuses,
+        'rps': round(len(latencies) / duration, 1),
+        'bytes_mean': round(sum(sizes) / len(sizes)) if sizes else None,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 2) if latencies else None,
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'max': round(latencies[-1], 2) if latencies else None,
+        },
+    }
+
+
+def claim_reviewer(target, host, port):
+    with target._lock:
+        used = {email for email, _ in target.tokens.values()}
+        email = next(email for email in target.reviewers if email not in used)
+        target.tokens[threading.get_ident()] = (email, None)
+    status, data = request(host, port, 'POST', '/api/users/login/',
+                           {'email': email, 'password': BENCH_PASSWORD}, {})
+    if status != 200:
+        raise RuntimeError(f'login for {email} failed with {status}')
+    with target._lock:
+        target.tokens[threading.get_ident()] = (email, json.loads(data)['access'])
+
+
+def start_server(port, workers, threads=1, extra_env=None, asgi=False):
+    env = dict(os.environ, DEBUG=os.environ.get('DEBUG', 'False'), **(extra_env or {}))
+    if asgi:
+        env.setdefault('ASYNC_CATALOG_VIEWS', 'True')
+        app = ['ecommerce_backend.asgi:application', '--worker-class', 'uvicorn_worker.UvicornWorker']
+    else:
+        app = ['ecommerce_backend.wsgi:application', '--threads', str(threads)]
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', *app,
+         '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--log-level', 'warning'],
+        cwd=PROJECT_ROOT, env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            request('127.0.0.1', port, 'GET', '/api/categories/', None, {})
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit('gunicorn did not start within 30s')
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    target = Target(rng)
+    reset_bench_reviews()
+    server_env = dict(pair.split('=', 1) for pair in args.server_env)
+    server = start_server(args.port, args.workers, args.threads, server_env, args.asgi) if args.start_server else None
+    host, port = args.host, args.port
+    extra_headers = {'Accept-Encoding': args.accept_encoding} if args.accept_encoding else {}
+    results = {}
+    try:
+        for name in args.scenarios:
+            if name == 'review_create' and len(target.reviewers) < args.concurrency:
+                print(f'{name:<15} skipped: needs at least {args.concurrency} bench reviewers')
+                continue
+            target.tokens.clear()
+            results[name] = run_scenario(name, target, host, port, args.concurrency, args.duration, args.warmup,
+                                         extra_headers)
+            summary = results[name]
+            print(f"{name:<15} {summary['rps']:>8.1f} req/s  p50 {summary['latency_ms']['p50']} ms  "
+                  f"p95 {summary['latency_ms']['p95']} ms  p99 {summary['latency_ms']['p99']} ms  "
+                  f"{summary['bytes_mean']} B  errors {summary['errors']}")
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        reset_bench_reviews()
+
+    commit = git_commit()
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': commit,
+            'products': Product.objects.count(),
+            'concurrency': args.concurrency,
+            'duration_s': args.duration,
+            'workers': args.workers if args.start_server else None,
+            'threads': args.threads if args.start_server else None,
+            'server_env': server_env if args.start_server else None,
+            'asgi': args.asgi if args.start_server else None,
+            'accept_encoding': args.accept_encoding,
+            'database': connection.vendor,
+            'python': platform.python_version(),
+        },
+        'scenarios': results,
+    }
+    output = args.output or os.path.join(
+        PROJECT_ROOT, 'bench-results', f"{datetime.now():%Y%m%d-%H%M%S}-{commit}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print(f'results written to {output}')
+
+
+def reset_bench_reviews():
+    """Drop reviews left by a previous `review_create` scenario."""
+    ProductReview.objects.filter(user__username__startswith='bench-reviewer-').delete()
+
+
+# --------------------------------------------------
+# COMPARE
+# --------------------------------------------------
+
+def compare(args):
+    with open(args.baseline) as handle:
+        old = json.load(handle)
+    with open(args.candidate) as handle:
+        new = json.load(handle)
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}")
+    print(f"{'scenario':<15} {'req/s':>20} {'p50 ms':>20} {'p95 ms':>20} {'p99 ms':>20} {'bytes':>20}")
+    for name in SCENARIOS:
+        if name not in old['scenarios'] or name not in new['scenarios']:
+            continue
+        a, b = old['scenarios'][name], new['scenarios'][name]
+        cells = [_delta(a['rps'], b['rps'])]
+        cells += [_delta(a['latency_ms'][key], b['latency_ms'][key]) for key in ('p50', 'p95', 'p99')]
+        cells.append(_delta(a.get('bytes_mean'), b.get('bytes_mean')))
+        print(f'{name:<15} ' + ' '.join(f'{cell:>20}' for cell in cells))
+
+
+def _delta(before, after):
+    if not before or after is None:
+        return f'{before} -> {after}'
+    return f'{after} ({(after - before) / before * 100:+.0f}%)'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed = commands.add_parser('seed', help='load a synthetic catalog via generate_catalog')
+    seed.add_argument('--size', type=size, default=1_000, help='1k, 10k, 100k, 1m or a number of products')
+    seed.add_argument('--users', type=int, default=None, help='default: products / 10, at least 100')
+    seed.add_argument('--reviews-per-product', type=float, default=3)
+    seed.add_argument('--batch-size', type=int, default=2000)
+    seed.add_argument('--workers', type=int, default=1)
+    seed.add_argument('--seed', type=int, default=1)
+    seed.add_argument('--reset', action='store_true', help='delete existing bench rows first')
+
+    bench = commands.add_parser('run', help='drive the API and record latency/throughput')
+    bench.add_argument('--host', default='127.0.0.1')
+    bench.add_argument('--port', type=int, default=8765)
+    bench.add_argument('--start-server', action='store_true', help='run gunicorn for the duration')
+    bench.add_argument('--workers', type=int, default=4, help='gunicorn workers with --start-server')
+    bench.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker with --start-server')
+    bench.add_argument('--server-env', action='append', default=[], metavar='KEY=VALUE',
+                       help='extra environment for the --start-server gunicorn (repeatable), '
+                            'e.g. DB_CONN_MAX_AGE=0')
+    bench.add_argument('--asgi', action='store_true',
+                       help='serve ASGI with uvicorn workers and ASYNC_CATALOG_VIEWS with --start-server')
+    bench.add_argument('--accept-encoding', metavar='CODINGS',
+                       help='Accept-Encoding header to send, e.g. "gzip" or "br, gzip" (default: none)')
+    bench.add_argument('--concurrency', type=int, default=16)
+    bench.add_argument('--duration', type=float, default=20, help='measured seconds per scenario')
+    bench.add_argument('--warmup', type=float, default=3, help='unrecorded seconds per scenario')
+    bench.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    bench.add_argument('--seed', type=int, default=1)
+    bench.add_argument('--output', help='result file (default bench-results/<time>-<commit>.json)')
+
+    diff = commands.add_parser('compare', help='compare two result files')
+    diff.add_argument('baseline')
+    diff.add_argument('candidate')
+
+    args = parser.parse_args()
+    if args.command == 'seed':
+        seed_catalog(args)
+    elif args.command == 'run':
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == '__main__':
+    main()
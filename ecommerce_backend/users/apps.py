@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
-    
+
+    def ready(self):
+        from ecommerce_backend.images import track_images
+        from . import signals  # noqa: F401
+        track_images(self.get_model('UserProfile'), 'avatar')
@@ -0,0 +1,88 @@
+"""JWT authentication that trusts signed claims instead of loading the user.
+
+Access tokens issued by the login and refresh endpoints carry
+`is_staff` and `is_active` claims next to `user_id` (see
+`access_token_for`). Refresh tokens never do: every refresh reloads the
+user, refuses inactive accounts and writes fresh claims into the access
+token it mints. For such tokens
+`StatelessJWTAuthentication` returns a `ClaimsUser`: a lazy proxy that
+answers `id`, `pk`, `is_staff`, `is_active`, `is_authenticated` and
+`is_anonymous` from the token and only loads the `User` row when a view
+touches any other attribute. Permission checks such as `IsAdminUser`
+therefore cost no query.
+
+Claims are a snapshot: deactivating or demoting a user takes effect
+when their current access token expires
+(`SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']`).
+Tokens without the claims fall back to the regular database lookup.
+"""
+
+from django.utils.functional import LazyObject, SimpleLazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+USER_CLAIMS = ('is_staff', 'is_active')
+
+
+def add_user_claims(token, user):
+    """Copy the fields `ClaimsUser` answers from into `token`."""
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def access_token_for(refresh, user):
+    """The access token for `refresh`, carrying `user`'s current claims."""
+    return add_user_claims(refresh.access_token, user)
+
+
+class ClaimsUser(SimpleLazyObject):
+    """A user backed by token claims, loaded from the database on demand."""
+
+    def __init__(self, token, user_model):
+        user_id = token[api_settings.USER_ID_CLAIM]
+
+        def load():
+            try:
+                return user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except user_model.DoesNotExist:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        super().__init__(load)
+        # Write through `__dict__`: `LazyObject.__setattr__` would load the user.
+        self.__dict__['_claims'] = {
+            'id': user_id,
+            'pk': user_id,
+            'is_staff': token['is_staff'],
+            'is_active': token['is_active'],
+            'is_authenticated': True,
+            'is_anonymous': False,
+        }
+
+    def __getattr__(self, name):
+        claims = self.__dict__.get('_claims', {})
+        if self._wrapped is empty and name in claims:
+            return claims[name]
+        return LazyObject.__getattr__(self, name)
+
+    def __bool__(self):
+        return True
+
+    @property
+    def is_loaded(self):
+        return self._wrapped is not empty
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """`JWTAuthentication` returning a `ClaimsUser` when the token allows it."""
+
+    def get_user(self, validated_token):
+        required = (api_settings.USER_ID_CLAIM, *USER_CLAIMS)
+        if api_settings.CHECK_REVOKE_TOKEN or any(claim not in validated_token for claim in required):
+            # Older tokens, or password-hash revocation which needs the row anyway.
+            return super().get_user(validated_token)
+        if not validated_token['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return ClaimsUser(validated_token, self.user_model)
@@ -0,0 +1,114 @@
+"""Password hashers configured from settings, with optional offloading.
+
+`PASSWORD_HASHER` picks the preferred algorithm (`scrypt`, `argon2` or
+`pbkdf2`) and the `PASSWORD_*` settings set its cost. The other
+algorithms stay in `PASSWORD_HASHERS` so that existing hashes still
+verify. Django's `check_password` re-encodes a password with the preferred
+hasher after a successful login whenever the algorithm or its parameters
+changed (`must_update`), so changing the policy upgrades users as they log in.
+
+With `PASSWORD_HASHING_THREADS > 0`, key derivation runs on a bounded
+thread pool instead of the request thread. This caps how many cores
+login storms can occupy, leaving threaded or async workers free for
+catalog requests. Once `PASSWORD_HASHING_QUEUE` calls are waiting,
+further ones fail fast with `HashingBusy` (HTTP 429).
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework.exceptions import Throttled
+
+
+class HashingBusy(Throttled):
+    default_detail = 'Too many logins in progress, please retry shortly.'
+    default_code = 'hashing_busy'
+
+
+class HashingPool:
+    """Bounded executor for CPU-heavy hashing; runs inline when disabled."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._local = threading.local()
+
+    def _ensure(self):
+        threads = getattr(settings, 'PASSWORD_HASHING_THREADS', 0)
+        if threads <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                queue = getattr(settings, 'PASSWORD_HASHING_QUEUE', None) or threads * 8
+                self._slots = threading.BoundedSemaphore(threads + queue)
+                self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='password-hashing',
+                                                    initializer=self._mark_worker)
+            return self._executor
+
+    def _mark_worker(self):
+        self._local.worker = True
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule `fn` on the pool and return a `Future` (for async callers)."""
+        executor = self._ensure()
+        if executor is None or getattr(self._local, 'worker', False):
+            # Disabled, or nested (e.g. `verify` calling `encode`): run here.
+            return _completed(fn, *args, **kwargs)
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy(wait=1)
+        future = executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        return self.submit(fn, *args, **kwargs).result()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = self._slots = None
+
+
+def _completed(fn, *args, **kwargs):
+    future = Future()
+    try:
+        future.set_result(fn(*args, **kwargs))
+    except BaseException as exc:
+        future.set_exception(exc)
+    return future
+
+
+pool = HashingPool()
+
+
+class OffloadedHasherMixin:
+    """Run `encode`/`verify` through `pool`."""
+
+    def encode(self, password, salt, *args, **kwargs):
+        return pool.run(super().encode, password, salt, *args, **kwargs)
+
+    def verify(self, password, encoded):
+        return pool.run(super().verify, password, encoded)
+
+
+class PBKDF2PasswordHasher(OffloadedHasherMixin, hashers.PBKDF2PasswordHasher):
+    iterations = getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', hashers.PBKDF2PasswordHasher.iterations)
+
+
+class ScryptPasswordHasher(OffloadedHasherMixin, hashers.ScryptPasswordHasher):
+    work_factor = getattr(settings, 'PASSWORD_SCRYPT_WORK_FACTOR', hashers.ScryptPasswordHasher.work_factor)
+    block_size = getattr(settings, 'PASSWORD_SCRYPT_BLOCK_SIZE', hashers.ScryptPasswordHasher.block_size)
+    parallelism = getattr(settings, 'PASSWORD_SCRYPT_PARALLELISM', hashers.ScryptPasswordHasher.parallelism)
+    # scrypt needs 128 * n * r * p bytes; OpenSSL's 32 MiB default rejects n >= 2**15.
+    maxmem = 2 * 128 * work_factor * block_size * parallelism
+
+
+class Argon2PasswordHasher(OffloadedHasherMixin, hashers.Argon2PasswordHasher):
+    """Requires the optional `argon2-cffi` package."""
+    time_cost = getattr(settings, 'PASSWORD_ARGON2_TIME_COST', hashers.Argon2PasswordHasher.time_cost)
+    memory_cost = getattr(settings, 'PASSWORD_ARGON2_MEMORY_COST', hashers.Argon2PasswordHasher.memory_cost)
+    parallelism = getattr(settings, 'PASSWORD_ARGON2_PARALLELISM', hashers.Argon2PasswordHasher.parallelism)
@@ -0,0 +1,32 @@
+"""Delete expired refresh tokens from the `token_blacklist` tables.
+
+Logins insert an `OutstandingToken` row and logouts a `BlacklistedToken`
+row; neither is useful once the token has expired. Schedule this, e.g.
+hourly from cron: `python manage.py prune_tokens`.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.revocation import prune_expired, table_sizes
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted refresh tokens in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Tokens deleted per transaction (default 5000).')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches (default 0).')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        deleted = prune_expired(batch_size=options['batch_size'], pause=options['pause'])
+        elapsed = time.perf_counter() - start
+        sizes = table_sizes()
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} expired tokens in {elapsed:.2f}s; '
+            f'{sizes["outstanding"]} outstanding, {sizes["blacklisted"]} blacklisted remain.'
+        ))
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+INDEX_NAME = 'token_blacklist_outstandingtoken_expires_at'
+
+
+def create_expiry_index(apps, schema_editor):
+    """Index `expires_at` so `prune_tokens` does not scan the whole table."""
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON token_blacklist_outstandingtoken (expires_at)'
+    )
+
+
+def drop_expiry_index(apps, schema_editor):
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_expiry_index, drop_expiry_index),
+    ]
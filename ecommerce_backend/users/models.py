@@ -27,6 +27,7 @@ class UserProfile(models.Model):
     """Optional one-to-one profile containing additional user fields."""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     date_of_birth = models.DateField(blank=True, null=True)
     gender = models.CharField(max_length=10, choices=[
         ('male', 'Male'),
@@ -0,0 +1,279 @@
+"""Refresh-token revocation with an in-process filter in front of the database.
+
+simplejwt's `token_blacklist` tables stay the source of truth: logout
+still writes a `BlacklistedToken` row. Every refresh, however, used to
+run a JOIN against those tables. `RevocationStore` answers most lookups
+from memory:
+
+* a Bloom filter of blacklisted JTIs. A miss means "not revoked" with
+  certainty, which is the common case for a refresh.
+* an LRU of database answers for Bloom hits, so false positives and
+  repeated replays of a revoked token cost one query each.
+
+The filter is loaded incrementally (`BlacklistedToken.id > last seen`)
+whenever the shared revocation version in the cache changes, and at
+least every `TOKEN_REVOCATION_SYNC_SECONDS` for deployments whose cache
+is not shared between processes. Ids are not committed in order (two
+concurrent logouts on Postgres can commit id N+1 before N), so ids a
+sync skipped over are kept as gaps and looked up again on the following
+syncs until their row shows up or `TOKEN_REVOCATION_GAP_SECONDS` pass
+(rolled-back inserts leave permanent gaps). As a backstop the filter is
+rebuilt from scratch every `TOKEN_REVOCATION_REBUILD_SECONDS`.
+`prune_tokens` deletes expired rows.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from .authentication import USER_CLAIMS
+
+VERSION_KEY = 'auth:revocation:version'
+# Upper bounds (ms) of the lookup latency histogram; the last bucket is open-ended.
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 50)
+SOURCES = ('bloom', 'lru', 'db')
+# Only the newest ids can still be in flight; bounds the gaps kept per sync.
+MAX_GAPS = 100
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        # Double hashing (Kirsch-Mitzenmacher) from one 128-bit digest.
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.bits for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.array[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+def _cache():
+    return caches[getattr(settings, 'TOKEN_REVOCATION_CACHE_ALIAS', 'default')]
+
+
+def bump_version():
+    """Tell every process to pick up newly blacklisted tokens."""
+    cache = _cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time() * 1000), None)
+
+
+class RevocationStore:
+    """Process-wide cache of the refresh-token blacklist; see module docs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0
+        self._gaps = {}
+        self._generation = 0
+        self._version = None
+        self._synced_at = 0.0
+        self._built_at = 0.0
+        self._answers = OrderedDict()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._lookups = dict.fromkeys(SOURCES, 0)
+        self._latency = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._latency_sum = 0.0
+        self._latency_max = 0.0
+
+    def _new_bloom(self):
+        capacity = getattr(settings, 'TOKEN_REVOCATION_BLOOM_CAPACITY', 100_000)
+        if self._bloom is not None:
+            # Grow instead of rebuilding on every sync once the blacklist outgrows the setting.
+            capacity = max(capacity, 2 * self._bloom.count)
+        return BloomFilter(capacity, getattr(settings, 'TOKEN_REVOCATION_BLOOM_ERROR_RATE', 0.001))
+
+    def _sync(self):
+        """Load blacklist rows added since the last sync (caller holds the lock)."""
+        version = _cache().get(VERSION_KEY)
+        interval = getattr(settings, 'TOKEN_REVOCATION_SYNC_SECONDS', 5)
+        now = time.monotonic()
+        fresh = self._bloom is not None and version == self._version
+        if fresh and now - self._synced_at < interval:
+            return
+        rebuild_after = getattr(settings, 'TOKEN_REVOCATION_REBUILD_SECONDS', 600)
+        if (self._bloom is None or self._bloom.count > self._bloom.capacity
+                or now - self._built_at >= rebuild_after):
+            # Start over with live rows only; pruned JTIs drop out here.
+            self._bloom, self._last_id, self._built_at = self._new_bloom(), 0, now
+            self._gaps.clear()
+            self._answers.clear()
+            rows = BlacklistedToken.objects.filter(token__expires_at__gt=aware_utcnow())
+        else:
+            rows = BlacklistedToken.objects.filter(Q(id__gt=self._last_id) | Q(id__in=list(self._gaps)))
+        seen = []
+        for row_id, jti in rows.order_by('id').values_list('id', 'token__jti').iterator():
+            seen.append(row_id)
+            if jti not in self._bloom:
+                self._bloom.add(jti)
+            if jti in self._answers:
+                self._answers[jti] = True
+        self._track_gaps(seen, now)
+        self._generation += 1
+        self._version, self._synced_at = version, now
+
+    def _track_gaps(self, ids, now):
+        """Advance `_last_id` over `ids`, remembering the ids skipped on the way."""
+        for row_id in ids:
+            self._gaps.pop(row_id, None)
+        top = max(ids, default=self._last_id)
+        if top > self._last_id:
+            new = set(range(max(self._last_id + 1, top - MAX_GAPS), top)).difference(ids)
+            self._gaps.update(dict.fromkeys(new, now))
+            self._last_id = top
+        expiry = now - getattr(settings, 'TOKEN_REVOCATION_GAP_SECONDS', 60)
+        self._gaps = {row_id: since for row_id, since in self._gaps.items() if since > expiry}
+
+    def _remember(self, jti, revoked):
+        self._answers[jti] = revoked
+        self._answers.move_to_end(jti)
+        while len(self._answers) > getattr(settings, 'TOKEN_REVOCATION_LRU_SIZE', 10_000):
+            self._answers.popitem(last=False)
+
+    def is_revoked(self, jti):
+        start = time.perf_counter()
+        with self._lock:
+            self._sync()
+            if jti not in self._bloom:
+                source, revoked = 'bloom', False
+            elif jti in self._answers:
+                source, revoked = 'lru', self._answers[jti]
+                self._answers.move_to_end(jti)
+            else:
+                source, generation = None, self._generation
+        if source is None:
+            source, revoked = 'db', BlacklistedToken.objects.filter(token__jti=jti).exists()
+            with self._lock:
+                # A sync or logout during the query may have added `jti`;
+                # never cache a "not revoked" that could predate it.
+                if revoked or generation == self._generation:
+                    self._remember(jti, revoked)
+        self._record(source, time.perf_counter() - start)
+        return revoked
+
+    def revoked(self, jti):
+        """Record a revocation made by this process."""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+            self._generation += 1
+            self._remember(jti, True)
+        bump_version()
+
+    def _record(self, source, seconds):
+        ms = seconds * 1000
+        with self._lock:
+            self._lookups[source] += 1
+            self._latency_sum += ms
+            self._latency_max = max(self._latency_max, ms)
+            index = next((i for i, bound in enumerate(LATENCY_BUCKETS) if ms <= bound), len(LATENCY_BUCKETS))
+            self._latency[index] += 1
+
+    def stats(self):
+        with self._lock:
+            total = sum(self._lookups.values())
+            labels = [f'le_{bound}' for bound in LATENCY_BUCKETS] + ['inf']
+            return {
+                'lookups': dict(self._lookups, total=total),
+                'latency_ms': {
+                    'avg': round(self._latency_sum / total, 4) if total else 0,
+                    'max': round(self._latency_max, 4),
+                    'histogram': dict(zip(labels, self._latency)),
+                },
+                'bloom': {
+                    'entries': self._bloom.count if self._bloom else 0,
+                    'capacity': self._bloom.capacity if self._bloom else None,
+                    'bits': self._bloom.bits if self._bloom else None,
+                },
+                'lru_entries': len(self._answers),
+                'pending_gaps': len(self._gaps),
+            }
+
+    def reset(self):
+        """Drop the in-memory state; the next lookup reloads from the database."""
+        with self._lock:
+            self._bloom, self._last_id, self._version = None, 0, None
+            self._gaps.clear()
+            self._answers.clear()
+            self._reset_stats()
+
+
+revocations = RevocationStore()
+
+
+def table_sizes():
+    now = aware_utcnow()
+    return {
+        'outstanding': OutstandingToken.objects.count(),
+        'outstanding_expired': OutstandingToken.objects.filter(expires_at__lte=now).count(),
+        'blacklisted': BlacklistedToken.objects.count(),
+    }
+
+
+class RevocableRefreshToken(RefreshToken):
+    """`RefreshToken` whose blacklist check goes through `revocations`."""
+    # Claims written by older logins must not outlive a demotion: access
+    # tokens get them fresh from `TokenRefreshRevocableSerializer`.
+    no_copy_claims = (*RefreshToken.no_copy_claims, *USER_CLAIMS)
+
+    def check_blacklist(self):
+        if revocations.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        result = super().blacklist()
+        revocations.revoked(self.payload[api_settings.JTI_CLAIM])
+        return result
+
+
+def prune_expired(batch_size=5000, pause=0.0):
+    """Delete expired outstanding tokens and their blacklist rows in batches.
+
+    Each batch is its own short transaction, so logins and logouts are
+    never blocked for long. Returns the number of outstanding tokens deleted.
+    """
+    now, deleted = aware_utcnow(), 0
+    expired = OutstandingToken.objects.filter(expires_at__lte=now).order_by('id')
+    while True:
+        ids = list(expired.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            blacklisted = BlacklistedToken.objects.filter(token_id__in=ids)
+            blacklisted._raw_delete(blacklisted.db)
+            outstanding = OutstandingToken.objects.filter(id__in=ids)
+            deleted += outstanding._raw_delete(outstanding.db)
+        if pause:
+            time.sleep(pause)
@@ -6,14 +6,24 @@ extension that returns serialized user data alongside tokens.
 
 from rest_framework import serializers
 from django.contrib.auth import authenticate, get_user_model
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.contrib.auth.models import update_last_login
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (TokenObtainPairSerializer, TokenObtainSerializer,
+                                                  TokenRefreshSerializer)
+from rest_framework_simplejwt.settings import api_settings
+from ecommerce_backend.images import SrcsetField
+from .authentication import access_token_for
 from .models import User, UserProfile
+from .revocation import RevocableRefreshToken
 
 class UserProfileSerializer(serializers.ModelSerializer):
     """Serializer for the `UserProfile` model."""
+    avatar_srcset = SrcsetField()
+
     class Meta:
         model = UserProfile
-        fields = ['avatar', 'date_of_birth', 'gender']
+        fields = ['avatar', 'avatar_srcset', 'date_of_birth', 'gender']
 
 class UserSerializer(serializers.ModelSerializer):
     """Full user serializer including nested `UserProfile`."""
@@ -25,6 +35,25 @@ class UserSerializer(serializers.ModelSerializer):
                  'address', 'is_email_verified', 'profile', 'date_joined']
         read_only_fields = ['id', 'date_joined', 'is_email_verified']
 
+def profile_version(user):
+    """ETag of `user`'s profile resource; changes whenever user or profile is saved."""
+    return f'"{user.pk}-{int(user.updated_at.timestamp() * 1_000_000)}"'
+
+class LoginUserSerializer(serializers.ModelSerializer):
+    """Compact user summary returned by login; built from the row already loaded."""
+    name = serializers.SerializerMethodField()
+    profile_version = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'email', 'name', 'profile_version']
+
+    def get_name(self, obj):
+        return obj.get_full_name() or obj.username
+
+    def get_profile_version(self, obj):
+        return profile_version(obj)
+
 class RegisterSerializer(serializers.ModelSerializer):
     """Serializer for user registration with password confirmation."""
     password = serializers.CharField(write_only=True, min_length=8)
@@ -64,13 +93,59 @@ class TokenObtainPairEmailSerializer(TokenObtainPairSerializer):
     This serializer relies on the project's `AUTH_USER_MODEL` having
     `USERNAME_FIELD = 'email'`, so it accepts `email` and `password` in the
     request body (the base class respects the user model username field).
+    The access token carries `is_staff`/`is_active` claims so that
+    `StatelessJWTAuthentication` can skip the per-request user query;
+    the refresh token does not, so refreshes never copy stale claims.
+
+    The `user` summary is compact (`LoginUserSerializer`); its
+    `profile_version` is the profile ETag, so clients can revalidate a
+    cached profile with `If-None-Match`. `?expand=profile` returns the
+    full `UserSerializer` instead.
+    """
+    token_class = RevocableRefreshToken
+
+    def validate(self, attrs):
+        # `TokenObtainPairSerializer.validate`, with the claims added to
+        # the access token only.
+        data = TokenObtainSerializer.validate(self, attrs)
+        refresh = self.get_token(self.user)
+        data['refresh'] = str(refresh)
+        data['access'] = str(access_token_for(refresh, self.user))
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, self.user)
+        request = self.context.get('request')
+        if request is not None and request.query_params.get('expand') == 'profile':
+            user = User.objects.select_related('profile').get(pk=self.user.pk)
+            data['user'] = UserSerializer(user).data
+        else:
+            data['user'] = LoginUserSerializer(self.user).data
+        return data
+
+class TokenRefreshRevocableSerializer(TokenRefreshSerializer):
+    """Refresh serializer that checks the blacklist through `revocations`.
+
+    The user is reloaded on every refresh: inactive or deleted accounts
+    are refused, and the new access token gets their current claims.
     """
+    token_class = RevocableRefreshToken
+    default_error_messages = {'no_active_account': _('No active account found for the given token.')}
 
     def validate(self, attrs):
-        data = super().validate(attrs)
-        # include user details
-        user_data = UserSerializer(self.user).data
-        data.update({'user': user_data})
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]}
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], code='no_active_account')
+        data = {'access': str(access_token_for(refresh, user))}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
         return data
 
 class ChangePasswordSerializer(serializers.Serializer):
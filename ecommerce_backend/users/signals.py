@@ -0,0 +1,16 @@
+"""Signal receivers keeping `User.updated_at` a version for the whole profile."""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import User, UserProfile
+
+
+@receiver(post_save, sender=UserProfile, dispatch_uid='users.profile_post_save')
+@receiver(post_delete, sender=UserProfile, dispatch_uid='users.profile_post_delete')
+def touch_user(sender, instance, raw=False, **kwargs):
+    """Bump the owner's `updated_at` so profile ETags change with the profile."""
+    if raw:
+        return
+    User.objects.filter(pk=instance.user_id).update(updated_at=timezone.now())
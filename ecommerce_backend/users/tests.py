@@ -1,10 +1,26 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import override_settings
 from rest_framework.test import APITestCase
 from rest_framework import status
-from users.models import User
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+from users.authentication import add_user_claims
+from users.hashers import pool
+from users.models import User, UserProfile
+from users.revocation import bump_version, revocations
 
 
 class UserAuthIntegrationTests(APITestCase):
 	def setUp(self):
+		revocations.reset()
 		self.register_url = '/api/users/register/'
 		self.login_url = '/api/users/login/'
 		self.refresh_url = '/api/users/token/refresh/'
@@ -48,3 +64,200 @@ class UserAuthIntegrationTests(APITestCase):
 		logout_resp = self.client.post(self.logout_url, {'refresh': refresh}, format='json')
 		# Logout returns 205 Reset Content on success
 		self.assertIn(logout_resp.status_code, (status.HTTP_205_RESET_CONTENT, status.HTTP_200_OK,))
+
+	def test_access_token_claims_authorize_without_user_query(self):
+		self.client.post(self.register_url, self.user_data, format='json')
+		login_resp = self.client.post(self.login_url, {
+			'email': self.user_data['email'],
+			'password': self.user_data['password']
+		}, format='json')
+		self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {login_resp.data["access"]}')
+
+		# Permission checks are answered from the signed claims.
+		with self.assertNumQueries(0):
+			resp = self.client.post('/api/products/create/', {}, format='json')
+		self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+		# Views that need the row still load it lazily.
+		resp = self.client.get('/api/users/profile/')
+		self.assertEqual(resp.status_code, status.HTTP_200_OK)
+		self.assertEqual(resp.data['email'], self.user_data['email'])
+
+		# Refreshed access tokens keep the claims.
+		refresh_resp = self.client.post(self.refresh_url, {'refresh': login_resp.data['refresh']}, format='json')
+		self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh_resp.data["access"]}')
+		with self.assertNumQueries(0):
+			resp = self.client.post('/api/products/create/', {}, format='json')
+		self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+		# A token minted for an inactive user is refused up front.
+		user = User.objects.get(email=self.user_data['email'])
+		user.is_active = False
+		token = add_user_claims(RefreshToken.for_user(user), user)
+		self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+		self.assertEqual(self.client.get('/api/users/profile/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+	def test_refresh_reloads_the_user_so_demotion_and_deactivation_apply(self):
+		admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='adminpass')
+		login_resp = self.client.post(self.login_url, {'email': 'admin@example.com', 'password': 'adminpass'}, format='json')
+		refresh = login_resp.data['refresh']
+		self.assertNotIn('is_staff', RefreshToken(refresh).payload)
+		for url in (self.refresh_url, '/api/token/refresh/'):
+			access = self.client.post(url, {'refresh': refresh}, format='json').data['access']
+			self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+			self.assertEqual(self.client.get('/api/metrics/').status_code, status.HTTP_200_OK)
+
+		admin.is_staff = False
+		admin.save()
+		for url in (self.refresh_url, '/api/token/refresh/'):
+			access = self.client.post(url, {'refresh': refresh}, format='json').data['access']
+			self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+			self.assertEqual(self.client.get('/api/metrics/').status_code, status.HTTP_403_FORBIDDEN)
+
+		admin.is_active = False
+		admin.save()
+		self.client.credentials()
+		for url in (self.refresh_url, '/api/token/refresh/'):
+			resp = self.client.post(url, {'refresh': refresh}, format='json')
+			self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+			self.assertNotIn('access', resp.data)
+
+	def test_revocations_committed_out_of_order_or_during_a_lookup_are_not_missed(self):
+		expires_at = aware_utcnow() + timedelta(hours=1)
+		tokens = [OutstandingToken.objects.create(jti=f'jti-{i}', token='', expires_at=expires_at) for i in range(3)]
+		revocations.is_revoked('jti-0')
+		# Concurrent logouts: id 11 commits, and is synced, before id 10.
+		BlacklistedToken.objects.create(id=11, token=tokens[1])
+		bump_version()
+		self.assertTrue(revocations.is_revoked('jti-1'))
+		BlacklistedToken.objects.create(id=10, token=tokens[0])
+		bump_version()
+		self.assertTrue(revocations.is_revoked('jti-0'))
+
+		# A logout lands while a Bloom false positive is checked in the
+		# database: the stale "not revoked" must not be cached.
+		revocations._bloom.add('jti-2')
+
+		def exists_then_revoked(queryset):
+			revocations.revoked('jti-2')
+			return False
+
+		with mock.patch.object(QuerySet, 'exists', exists_then_revoked):
+			self.assertFalse(revocations.is_revoked('jti-2'))
+		BlacklistedToken.objects.create(token=tokens[2])
+		self.assertTrue(revocations.is_revoked('jti-2'))
+
+		# Periodic rebuilds start over from the table.
+		bump_version()
+		with override_settings(TOKEN_REVOCATION_REBUILD_SECONDS=0):
+			revocations.is_revoked('jti-0')
+		self.assertEqual(revocations.stats()['bloom']['entries'], 3)
+
+	def test_revoked_refresh_tokens_are_answered_from_memory_and_pruned(self):
+		self.client.post(self.register_url, self.user_data, format='json')
+		login_resp = self.client.post(self.login_url, {
+			'email': self.user_data['email'],
+			'password': self.user_data['password']
+		}, format='json')
+		refresh = login_resp.data['refresh']
+
+		# Live tokens miss the Bloom filter and never reach the blacklist
+		# table; the only query reloads the user.
+		self.client.post(self.refresh_url, {'refresh': refresh}, format='json')
+		with self.assertNumQueries(1):
+			resp = self.client.post(self.refresh_url, {'refresh': refresh}, format='json')
+		self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+		self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {login_resp.data["access"]}')
+		self.client.post(self.logout_url, {'refresh': refresh}, format='json')
+		self.client.post(self.refresh_url, {'refresh': refresh}, format='json')
+		with self.assertNumQueries(0):
+			resp = self.client.post(self.refresh_url, {'refresh': refresh}, format='json')
+		self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+		# A fresh process loads the blacklist from the database.
+		revocations.reset()
+		resp = self.client.post(self.refresh_url, {'refresh': refresh}, format='json')
+		self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+		self.assertEqual(revocations.stats()['lookups']['db'], 1)
+
+		expired = [
+			OutstandingToken.objects.create(jti=f'expired-{i}', token='', expires_at=aware_utcnow() - timedelta(hours=1))
+			for i in range(3)
+		]
+		BlacklistedToken.objects.create(token=expired[0])
+		out = StringIO()
+		call_command('prune_tokens', batch_size=2, stdout=out)
+		self.assertIn('Deleted 3 expired tokens', out.getvalue())
+		self.assertEqual(OutstandingToken.objects.count(), 1)
+		self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+		admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='adminpass')
+		self.client.force_authenticate(admin)
+		stats = self.client.get('/api/users/token/revocations/').data
+		self.assertEqual(stats['tables'], {'outstanding': 1, 'outstanding_expired': 0, 'blacklisted': 1})
+		self.assertGreater(stats['lookups']['total'], 0)
+
+	def test_login_upgrades_legacy_hashes_and_sheds_load_when_hashing_is_saturated(self):
+		user = User.objects.create(email='legacy@example.com', username='legacy',
+		                           password=make_password('legacypass123', hasher='pbkdf2_sha256'))
+		credentials = {'email': 'legacy@example.com', 'password': 'legacypass123'}
+
+		resp = self.client.post(self.login_url, credentials, format='json')
+		self.assertEqual(resp.status_code, status.HTTP_200_OK)
+		user.refresh_from_db()
+		self.assertTrue(user.password.startswith('scrypt$'))
+
+		pool.shutdown()
+		release = threading.Event()
+		try:
+			with override_settings(PASSWORD_HASHING_THREADS=1, PASSWORD_HASHING_QUEUE=1):
+				resp = self.client.post(self.login_url, credentials, format='json')
+				self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+				# One call hashing, one queued: the next login is refused, not queued.
+				pool.submit(release.wait)
+				pool.submit(release.wait)
+				resp = self.client.post(self.login_url, credentials, format='json')
+				self.assertEqual(resp.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+		finally:
+			release.set()
+			pool.shutdown()
+
+	def test_login_returns_compact_user_and_profile_supports_conditional_get(self):
+		self.client.post(self.register_url, self.user_data, format='json')
+		credentials = {'email': self.user_data['email'], 'password': self.user_data['password']}
+
+		# One user lookup plus the outstanding-token insert; no profile query.
+		with self.assertNumQueries(2):
+			login_resp = self.client.post(self.login_url, credentials, format='json')
+		user = login_resp.data['user']
+		self.assertEqual(set(user), {'id', 'email', 'name', 'profile_version'})
+		self.assertEqual(user['name'], 'Test User')
+
+		expanded = self.client.post(self.login_url + '?expand=profile', credentials, format='json')
+		self.assertIn('date_joined', expanded.data['user'])
+
+		self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {login_resp.data["access"]}')
+		with self.assertNumQueries(1):
+			resp = self.client.get('/api/users/profile/')
+		self.assertEqual(resp['ETag'], user['profile_version'])
+		resp = self.client.get('/api/users/profile/', HTTP_IF_NONE_MATCH=user['profile_version'])
+		self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+		# Compression weakens the ETag; the weak form still revalidates.
+		with override_settings(COMPRESSION_MIN_SIZE=1):
+			compressed = self.client.get('/api/users/profile/', HTTP_ACCEPT_ENCODING='gzip')
+			self.assertEqual(compressed['ETag'], 'W/' + user['profile_version'])
+			resp = self.client.get('/api/users/profile/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=compressed['ETag'])
+		self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+		resp = self.client.patch('/api/users/profile/', {'first_name': 'Renamed'}, format='json')
+		self.assertNotEqual(resp['ETag'], user['profile_version'])
+		resp = self.client.get('/api/users/profile/', HTTP_IF_NONE_MATCH=user['profile_version'])
+		self.assertEqual(resp.status_code, status.HTTP_200_OK)
+		self.assertEqual(resp.data['first_name'], 'Renamed')
+
+		# Profile edits (admin, other apps) invalidate the ETag too.
+		etag = resp['ETag']
+		UserProfile.objects.create(user_id=user['id'], gender='other')
+		self.assertNotEqual(self.client.get('/api/users/profile/')['ETag'], etag)
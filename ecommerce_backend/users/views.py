@@ -6,13 +6,16 @@ the authenticated user's profile, changing password and logging out.
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.contrib.auth import update_session_auth_hash
+from django.http import HttpResponseNotModified
+from ecommerce_backend.response_cache import etag_matches
 from .models import User
+from .revocation import RevocableRefreshToken, revocations, table_sizes
 from .serializers import (UserSerializer, RegisterSerializer, 
                          LoginSerializer, ChangePasswordSerializer,
-                         TokenObtainPairEmailSerializer)
+                         TokenObtainPairEmailSerializer, TokenRefreshRevocableSerializer,
+                         profile_version)
 
 class RegisterView(generics.CreateAPIView):
     """Public endpoint to register a new user."""
@@ -25,13 +28,37 @@ class LoginView(TokenObtainPairView):
     serializer_class = TokenObtainPairEmailSerializer
     permission_classes = [permissions.AllowAny]
 
+class RefreshView(TokenRefreshView):
+    """Exchange a refresh token for a new access token."""
+    serializer_class = TokenRefreshRevocableSerializer
+
 class UserProfileView(generics.RetrieveUpdateAPIView):
-    """Retrieve/update the currently authenticated user's profile."""
+    """Retrieve/update the currently authenticated user's profile.
+
+    Responses carry an `ETag` derived from `User.updated_at` (which
+    profile saves bump too); `If-None-Match` gets `304 Not Modified`.
+    """
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
+        # One query for user and profile; `request.user` may be a claims-only proxy.
+        return User.objects.select_related('profile').get(pk=self.request.user.pk)
+
+    def retrieve(self, request, *args, **kwargs):
+        user = self.get_object()
+        etag = profile_version(user)
+        # Weak comparison: compressed responses carry `W/"..."`.
+        if etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            response = Response(self.get_serializer(user).data)
+        response['ETag'] = etag
+        return response
+
+    def perform_update(self, serializer):
+        # `finalize_response` copies `self.headers` onto the response.
+        self.headers['ETag'] = profile_version(serializer.save())
 
 class ChangePasswordView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -62,10 +89,17 @@ class LogoutView(APIView):
         """Blacklist the provided refresh token to log the user out."""
         try:
             refresh_token = request.data["refresh"]
-            token = RefreshToken(refresh_token)
+            token = RevocableRefreshToken(refresh_token)
             # Blacklist the refresh token so it can no longer be used to
             # obtain new access tokens. Requires the token_blacklist app.
             token.blacklist()
             return Response(status=status.HTTP_205_RESET_CONTENT)
         except Exception:
             return Response(status=status.HTTP_400_BAD_REQUEST)
+
+class TokenRevocationStatsView(APIView):
+    """Admin-only blacklist lookup metrics for this process and table sizes."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({**revocations.stats(), 'tables': table_sizes()})
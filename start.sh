@@ -1,3 +1,38 @@
- #!/usr/bin/env bash
-python manage.py migrate
-gunicorn ecommerce_backend.wsgi:application --bind 0.0.0.0:$PORT
+#!/usr/bin/env bash
+# Apply migrations and serve the API with gunicorn. Tuning comes from the
+# environment; see ENVIRONMENT.md ("Server") for the variables and defaults.
+set -euo pipefail
+cd "$(dirname "$0")/ecommerce_backend"
+
+python manage.py migrate --noinput
+# Served from these files instead of introspecting the API per process.
+python manage.py render_openapi_schema
+
+CPUS=$(python -c 'import os; print(os.cpu_count() or 1)')
+WORKERS=${WEB_CONCURRENCY:-$((2 * CPUS + 1))}
+THREADS=${GUNICORN_THREADS:-1}
+if [ "${SERVER_MODE:-wsgi}" = asgi ]; then
+    # Async catalog views on uvicorn workers. Connections opened by the
+    # async ORM's worker threads are not tied to a request, so they are
+    # not reused by default.
+    APP=ecommerce_backend.asgi:application
+    DEFAULT_CLASS=uvicorn_worker.UvicornWorker
+    export ASYNC_CATALOG_VIEWS=${ASYNC_CATALOG_VIEWS:-True}
+    export DB_CONN_MAX_AGE=${DB_CONN_MAX_AGE:-0}
+elif [ "$THREADS" -gt 1 ]; then
+    APP=ecommerce_backend.wsgi:application
+    DEFAULT_CLASS=gthread
+else
+    APP=ecommerce_backend.wsgi:application
+    DEFAULT_CLASS=sync
+fi
+
+exec gunicorn "$APP" \
+    --bind "0.0.0.0:${PORT:-8000}" \
+    --workers "$WORKERS" \
+    --threads "$THREADS" \
+    --worker-class "${GUNICORN_WORKER_CLASS:-$DEFAULT_CLASS}" \
+    --timeout "${GUNICORN_TIMEOUT:-30}" \
+    --keep-alive "${GUNICORN_KEEPALIVE:-5}" \
+    --max-requests "${GUNICORN_MAX_REQUESTS:-0}" \
+    --max-requests-jitter "${GUNICORN_MAX_REQUESTS_JITTER:-0}"